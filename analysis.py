@@ -0,0 +1,357 @@
+# Analisis pemilihan jumlah klaster: sweep K paralel beserta kurva biaya
+# (elbow) dan silhouette untuk data campuran numerik-kategorikal,
+# klasterisasi terpisah per kelompok (Kelas atau sekolah) secara paralel,
+# serta uji stabilitas klaster dengan bootstrap.
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from pipeline import fit_kprototypes, feature_matrix, data_fingerprint, preprocess_frame, make_kprototypes, assign_clusters
+
+MAX_CACHED_MODELS = 32
+SILHOUETTE_SAMPLE_SIZE = 2000
+# Kolom yang dapat dipakai untuk klasterisasi per kelompok, bila ada di data.
+GROUP_COLUMNS = ("Kelas", "Sekolah")
+GROUP_K_RANGE = range(2, 7)
+EMPTY_GROUP_LABEL = "(kosong)"
+STABILITY_RESAMPLES = 30
+# Siswa dengan keyakinan penempatan di bawah batas ini dianggap tidak stabil.
+STABILITY_CONFIDENCE_THRESHOLD = 0.8
+
+# Cache model hasil fit per proses, kunci: (sidik jari data, K).
+_MODEL_CACHE = OrderedDict()
+_SWEEP_SCORES = {}
+_CACHE_LOCK = threading.Lock()
+# Satu kunci per (sidik jari, K) yang sedang di-fit: permintaan identik menunggu dan memakai hasil yang sama.
+_FIT_LOCKS = {}
+
+
+def _cache_put(key, result):
+    with _CACHE_LOCK:
+        _MODEL_CACHE[key] = result
+        _MODEL_CACHE.move_to_end(key)
+        while len(_MODEL_CACHE) > MAX_CACHED_MODELS:
+            old_key, _ = _MODEL_CACHE.popitem(last=False)
+            _SWEEP_SCORES.pop(old_key, None)
+
+
+def get_cached_fit(df_preprocessed, n_clusters, fingerprint=None):
+    key = (fingerprint or data_fingerprint(df_preprocessed), n_clusters)
+    with _CACHE_LOCK:
+        result = _MODEL_CACHE.get(key)
+        if result is not None:
+            _MODEL_CACHE.move_to_end(key)
+    return result
+
+
+def _fit_lock(key):
+    with _CACHE_LOCK:
+        return _FIT_LOCKS.setdefault(key, threading.Lock())
+
+
+def cached_fit(df_preprocessed, n_clusters, fingerprint=None, progress=None, n_jobs=-1):
+    fingerprint = fingerprint or data_fingerprint(df_preprocessed)
+    key = (fingerprint, n_clusters)
+    result = get_cached_fit(df_preprocessed, n_clusters, fingerprint)
+    if result is not None:
+        return result
+    with _fit_lock(key):
+        # Diperiksa ulang: permintaan lain dengan kunci sama mungkin baru saja selesai.
+        result = get_cached_fit(df_preprocessed, n_clusters, fingerprint)
+        if result is None:
+            result = fit_kprototypes(df_preprocessed, n_clusters, n_jobs=n_jobs, progress=progress)
+            _cache_put(key, result)
+    with _CACHE_LOCK:
+        _FIT_LOCKS.pop(key, None)
+    return result
+
+
+def mixed_dissimilarity_matrix(X_num, X_cat, gamma):
+    # Jarak K-Prototypes antar titik: kuadrat Euclidean + gamma * jumlah ketidakcocokan.
+    sq_norms = np.einsum("ij,ij->i", X_num, X_num)
+    num_part = sq_norms[:, None] + sq_norms[None, :] - 2.0 * X_num @ X_num.T
+    np.maximum(num_part, 0.0, out=num_part)
+    cat_part = np.zeros(num_part.shape)
+    for j in range(X_cat.shape[1]):
+        cat_part += X_cat[:, j][:, None] != X_cat[:, j][None, :]
+    dist = num_part + gamma * cat_part
+    np.fill_diagonal(dist, 0.0)
+    return dist
+
+
+def mixed_silhouette(X, categorical, labels, gamma, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=42):
+    labels = np.asarray(labels)
+    if len(np.unique(labels)) < 2:
+        return float("nan")
+    if len(labels) > sample_size:
+        rng = np.random.RandomState(random_state)
+        idx = np.sort(rng.choice(len(labels), sample_size, replace=False))
+        X, labels = X[idx], labels[idx]
+        if len(np.unique(labels)) < 2:
+            return float("nan")
+    numeric = [i for i in range(X.shape[1]) if i not in categorical]
+    X_num = X[:, numeric].astype(np.float64)
+    X_cat = X[:, categorical].astype(str)
+    dist = mixed_dissimilarity_matrix(X_num, X_cat, gamma)
+    from sklearn.metrics import silhouette_score
+    return float(silhouette_score(dist, labels, metric="precomputed"))
+
+
+def _fit_for_sweep(df_preprocessed, n_clusters):
+    # n_jobs=1 di dalam worker agar jumlah proses tidak berlipat dengan pool sweep.
+    result = fit_kprototypes(df_preprocessed, n_clusters, n_jobs=1)
+    df_clustered, kproto, categorical_feature_indices = result
+    X, _ = feature_matrix(df_clustered)
+    silhouette = mixed_silhouette(X, categorical_feature_indices, kproto.labels_, kproto.gamma)
+    return n_clusters, result, float(kproto.cost_), silhouette
+
+
+def sweep_k(df_preprocessed, k_values, max_workers=None, fingerprint=None, progress=None):
+    # progress(selesai, total, K): dipanggil setiap satu K selesai; pengecualian darinya
+    # menghentikan sweep dan membatalkan K yang belum mulai.
+    fingerprint = fingerprint or data_fingerprint(df_preprocessed)
+    k_values = list(k_values)
+    rows = {}
+    pending = []
+    for k in k_values:
+        if get_cached_fit(df_preprocessed, k, fingerprint) is not None and (fingerprint, k) in _SWEEP_SCORES:
+            rows[k] = _SWEEP_SCORES[(fingerprint, k)]
+        else:
+            pending.append(k)
+
+    def collect(fitted):
+        k, result, cost, silhouette = fitted
+        _cache_put((fingerprint, k), result)
+        _SWEEP_SCORES[(fingerprint, k)] = (cost, silhouette)
+        rows[k] = (cost, silhouette)
+        if progress is not None:
+            progress(len(rows), len(k_values), k)
+
+    if pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        if workers <= 1:
+            for k in pending:
+                collect(_fit_for_sweep(df_preprocessed, k))
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            try:
+                futures = [executor.submit(_fit_for_sweep, df_preprocessed, k) for k in pending]
+                for future in as_completed(futures):
+                    collect(future.result())
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    return pd.DataFrame(
+        [(k, rows[k][0], rows[k][1]) for k in k_values],
+        columns=["K", "Biaya (Cost)", "Silhouette"],
+    )
+
+
+def recommend_k(sweep_summary):
+    valid = sweep_summary.dropna(subset=["Silhouette"])
+    if valid.empty:
+        return None
+    return int(valid.loc[valid["Silhouette"].idxmax(), "K"])
+
+
+def compare_minibatch_with_full(df_original, minibatch_pipeline):
+    # Kedua model dievaluasi pada matriks fitur yang sama (skala dari mode
+    # mini-batch); kualitas label diukur dengan ARI.
+    df_preprocessed, _, _ = preprocess_frame(df_original, scaler=minibatch_pipeline.scaler_)
+    df_full, full_model, categorical_feature_indices = fit_kprototypes(
+        df_preprocessed, minibatch_pipeline.n_clusters, n_init=minibatch_pipeline.n_init,
+        random_state=minibatch_pipeline.random_state, engine="native"
+    )
+    X, _ = feature_matrix(df_preprocessed)
+    minibatch_labels, point_costs = minibatch_pipeline.model_.predict_with_cost(X, categorical=categorical_feature_indices)
+    from sklearn.metrics import adjusted_rand_score
+    full_cost = float(full_model.cost_)
+    minibatch_cost = float(point_costs.sum())
+    return {
+        "full_cost": full_cost,
+        "minibatch_cost": minibatch_cost,
+        "cost_gap": (minibatch_cost - full_cost) / full_cost if full_cost else 0.0,
+        "ari": float(adjusted_rand_score(df_full["Klaster"], minibatch_labels)),
+    }
+
+
+# --- KLASTERISASI PER KELOMPOK ---
+
+def group_label(group, cluster_id):
+    return f"{group}-{cluster_id}"
+
+
+def group_keys(values):
+    # Nilai kelompok sebagai teks; sel kosong dijadikan satu kelompok tersendiri.
+    return values.astype(object).where(values.notna(), EMPTY_GROUP_LABEL).astype(str)
+
+
+def _fit_group(task):
+    # Satu kelompok per pemanggilan; n_jobs=1 karena paralelisme ada di pool antar kelompok.
+    group, positions, df_group, n_clusters, k_range, n_init, random_state = task
+    n_distinct = len(df_group.drop_duplicates())
+    candidates = list(k_range) if n_clusters == "auto" else [n_clusters]
+    candidates = [k for k in candidates if k <= n_distinct]
+    if not candidates:
+        # Terlalu sedikit siswa berbeda untuk dibagi: seluruh kelompok menjadi satu klaster.
+        return group, positions, np.zeros(len(df_group), dtype=int), 1, None, float("nan"), None, "satu klaster (data terlalu sedikit)"
+    best = None
+    error = None
+    for k in candidates:
+        try:
+            df_clustered, kproto, categorical_feature_indices = fit_kprototypes(
+                df_group, k, n_init=n_init, random_state=random_state, n_jobs=1
+            )
+            silhouette = float("nan")
+            if n_clusters == "auto":
+                X, _ = feature_matrix(df_clustered)
+                silhouette = mixed_silhouette(X, categorical_feature_indices, kproto.labels_, kproto.gamma)
+        except Exception as e:
+            # K yang gagal dilewati; kelompok baru gagal bila tidak ada K yang berhasil.
+            error = e
+            continue
+        # Silhouette NaN (kelompok terlalu kecil) tidak mengunci K pertama; bila semuanya NaN, K terkecil dipakai.
+        if best is None or silhouette > best[3] or (np.isnan(best[3]) and not np.isnan(silhouette)):
+            best = (k, kproto, df_clustered["Klaster"].to_numpy(), silhouette)
+    if best is None:
+        return group, positions, np.full(len(df_group), -1), None, None, float("nan"), None, f"gagal: {error}"
+    k, kproto, labels, silhouette = best
+    return group, positions, labels, k, float(kproto.cost_), silhouette, kproto, "ok"
+
+
+def cluster_by_group(df_original, df_preprocessed, group_col, n_clusters=3, k_per_group=None,
+                     k_range=GROUP_K_RANGE, max_workers=None, n_init=10, random_state=42, progress=None):
+    # Model independen untuk setiap nilai group_col. n_clusters: K untuk semua
+    # kelompok atau "auto" (silhouette terbaik dalam k_range); k_per_group
+    # menimpa K kelompok tertentu. Label dikembalikan sebagai ID berkualifikasi
+    # kelompok, misalnya "XI-2", sejajar dengan baris df_original.
+    # progress(selesai, total, kelompok) dipanggil setiap satu kelompok selesai;
+    # pengecualian dari progress menghentikan kelompok yang belum berjalan.
+    if group_col not in df_original.columns:
+        raise ValueError(f"Kolom kelompok '{group_col}' tidak ditemukan dalam data.")
+    k_per_group = k_per_group or {}
+    groups = group_keys(df_original[group_col])
+    tasks = [
+        (group, positions, df_preprocessed.iloc[positions], k_per_group.get(group, n_clusters), k_range, n_init, random_state)
+        for group, positions in groups.groupby(groups.to_numpy(), sort=True).indices.items()
+    ]
+    # Kelompok terbesar dikerjakan lebih dulu agar worker selesai hampir bersamaan.
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+    workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if progress is not None:
+            progress(len(results), len(tasks), result[0])
+
+    if workers <= 1:
+        for task in tasks:
+            collect(_fit_group(task))
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            # Ratusan kelompok kecil dikirim bertumpuk agar biaya antarproses tidak mendominasi.
+            for result in executor.map(_fit_group, tasks, chunksize=max(1, len(tasks) // (workers * 4))):
+                collect(result)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    qualified = np.empty(len(df_original), dtype=object)
+    rows, models = [], {}
+    for group, positions, labels, k, cost, silhouette, kproto, status in sorted(results, key=lambda r: r[0]):
+        qualified[positions] = [group_label(group, label) if label >= 0 else None for label in labels]
+        models[group] = kproto
+        rows.append((group, len(positions), k, cost, silhouette, status))
+    assignments = pd.Series(qualified, index=df_original.index, name=f"Klaster per {group_col}")
+    summary = pd.DataFrame(rows, columns=[group_col, "Jumlah Siswa", "K", "Biaya (Cost)", "Silhouette", "Status"])
+    return assignments, summary, models
+
+
+# --- STABILITAS KLASTER (BOOTSTRAP) ---
+
+# Data bersama untuk worker bootstrap; dikirim sekali per proses lewat initializer, bukan per tugas.
+_BOOTSTRAP_DATA = None
+
+
+def _init_bootstrap_worker(X, categorical, n_clusters, n_init, engine):
+    global _BOOTSTRAP_DATA
+    _BOOTSTRAP_DATA = (X, categorical, n_clusters, n_init, engine)
+
+
+def align_labels(reference, labels, n_clusters):
+    # Nomor klaster hasil fit ulang bersifat acak; dipetakan ke nomor acuan yang
+    # paling banyak beririsan (penugasan Hungaria pada tabel kontingensi).
+    size = max(n_clusters, int(labels.max()) + 1, int(reference.max()) + 1)
+    contingency = np.zeros((size, size), dtype=np.int64)
+    np.add.at(contingency, (labels, reference), 1)
+    from scipy.optimize import linear_sum_assignment
+    rows, cols = linear_sum_assignment(-contingency)
+    mapping = np.arange(size)
+    mapping[rows] = cols
+    return mapping[labels]
+
+
+def _fit_bootstrap(seed):
+    # Satu replikasi: sampel ulang siswa dengan pengembalian, fit dengan seed sendiri,
+    # lalu seluruh siswa ditempatkan ke prototipe hasil fit tersebut.
+    X, categorical, n_clusters, n_init, engine = _BOOTSTRAP_DATA
+    rng = np.random.RandomState(seed)
+    sample = rng.randint(0, len(X), size=len(X))
+    kproto = make_kprototypes(X[sample], categorical, n_clusters, n_init=n_init, random_state=seed,
+                              n_jobs=1, engine=engine)
+    kproto.fit(X[sample], categorical=categorical)
+    labels, _ = assign_clusters(kproto, X, categorical)
+    return seed, labels, float(kproto.cost_)
+
+
+def bootstrap_stability(df_preprocessed, reference_labels, n_clusters, n_resamples=STABILITY_RESAMPLES,
+                        n_init=10, engine="auto", random_state=42, max_workers=None, progress=None):
+    # Distribusi ARI antara label acuan dan label setiap replikasi, serta keyakinan
+    # penempatan per siswa: proporsi replikasi yang menempatkannya di klaster yang sama.
+    from sklearn.metrics import adjusted_rand_score
+    X, categorical = feature_matrix(df_preprocessed)
+    reference = np.asarray(reference_labels, dtype=np.int64)
+    seeds = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max, size=n_resamples)
+    agreement = np.zeros(len(reference), dtype=np.int32)
+    rows = []
+
+    def collect(fitted):
+        seed, labels, cost = fitted
+        aligned = align_labels(reference, np.asarray(labels, dtype=np.int64), n_clusters)
+        agreement[:] += aligned == reference
+        rows.append((len(rows) + 1, int(seed), float(adjusted_rand_score(reference, aligned)), cost))
+        if progress is not None:
+            progress(len(rows), n_resamples)
+
+    initargs = (X, categorical, n_clusters, n_init, engine)
+    workers = max_workers or min(n_resamples, os.cpu_count() or 1)
+    if workers <= 1:
+        _init_bootstrap_worker(*initargs)
+        try:
+            for seed in seeds:
+                collect(_fit_bootstrap(int(seed)))
+        finally:
+            _init_bootstrap_worker(None, None, None, None, None)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_bootstrap_worker, initargs=initargs)
+        try:
+            futures = [executor.submit(_fit_bootstrap, int(seed)) for seed in seeds]
+            for future in as_completed(futures):
+                collect(future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    confidence = (agreement / n_resamples).astype(np.float32)
+    replicates = pd.DataFrame(rows, columns=["Replikasi", "Seed", "ARI", "Biaya (Cost)"])
+    clusters = pd.DataFrame({"Klaster": reference, "Keyakinan": confidence}).groupby("Klaster").agg(
+        **{"Jumlah Siswa": ("Keyakinan", "size"),
+           "Keyakinan Rata-rata": ("Keyakinan", "mean"),
+           "Proporsi Siswa Stabil": ("Keyakinan", lambda c: float((c >= STABILITY_CONFIDENCE_THRESHOLD).mean()))}
+    ).reset_index()
+    return {"n_resamples": n_resamples, "n_init": n_init, "replicates": replicates,
+            "confidence": confidence, "clusters": clusters}
@@ -1,12 +1,30 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import numpy as np
-from sklearn.preprocessing import StandardScaler
-from kmodes.kprototypes import KPrototypes
-from fpdf import FPDF
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import json
+import time
+import uuid
+
+rerun_started = time.perf_counter()
+
+from pipeline import (predict_clusters, data_fingerprint, profile_clusters, format_kehadiran, PROFILE_LABELS,
+                      with_labels)
+from registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+from result_store import FILTER_COLUMNS, SORT_COLUMNS, DEFAULT_PAGE_SIZE
+from analysis import recommend_k, group_keys, GROUP_COLUMNS, STABILITY_RESAMPLES, STABILITY_CONFIDENCE_THRESHOLD
+from upload_cache import UploadCache, file_digest
+from charts import version_charts, CHART_TITLES
+from exports import TABLE_EXPORT_MIME, export_filename
+from reports import (render_student_pdf, filter_students, student_fields, report_filename, EXPORT_FILTERS,
+                     MAX_COMBINED_PDF_ROWS)
+from student_index import build_student_index
+from table_index import TableIndex
+from governor import ComputeGovernor
+from jobs import (JobManager, clustering_job, sweep_job, partition_job, stability_job, export_job, results_export_job,
+                  remove_export, FAILED, CANCELLED)
+from diagnostics import (DiagnosticsLog, begin_rerun, set_rerun_context, stage, instrumented, traced_rerun,
+                         mark_cache_miss, new_session_events, events_frame, summarize_stages, RERUN_STAGE)
 
 # --- KONSTANTA GLOBAL ---
 PRIMARY_COLOR = "#2C2F7F"
@@ -18,16 +36,11 @@ SIDEBAR_HIGHLIGHT_COLOR = "#4A5BAA"
 ACTIVE_BUTTON_BG_COLOR = "#3F51B5"
 ACTIVE_BUTTON_TEXT_COLOR = "#FFFFFF"
 ACTIVE_BUTTON_BORDER_COLOR = "#FFD700"
-
-ID_COLS = ["No", "Nama", "JK", "Kelas"]
-NUMERIC_COLS = ["Rata Rata Nilai Akademik", "Kehadiran"]
-CATEGORICAL_COLS = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian",
-                    "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
-ALL_FEATURES_FOR_CLUSTERING = NUMERIC_COLS + CATEGORICAL_COLS
+# Selang pembaruan tampilan progres pekerjaan latar belakang.
+JOB_POLL_SECONDS = 1
 
 # --- CUSTOM CSS & HEADER ---
 custom_css = f"""
-<style>
     .stApp {{
         background-color: {BACKGROUND_COLOR};
         color: {TEXT_COLOR};
@@ -371,19 +384,6 @@ custom_css = f"""
         font-size: 2.2em;
         margin-bottom: 2rem;
     }}
-    .stButton > button {{
-        background-color: {ACCENT_COLOR};
-        color: white;
-        padding: 10px 25px;
-        border-radius: 8px;
-        border: none;
-        transition: background-color 0.2s ease-in-out, transform 0.1s ease-in-out;
-        margin-top: 15px !important;
-        margin-bottom: 8px !important;
-        font-weight: 600;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-    }}
-</style>
 """
 
 header_html = f"""
@@ -393,139 +393,675 @@ header_html = f"""
 </div>
 """
 
+# Penanda menu aktif di sidebar: dijalankan di dokumen induk dengan satu MutationObserver
+# per tab. Menu aktif dibaca dari window.__menuSidebar dan diperbarui saat tombol menu diklik.
+SIDEBAR_HIGHLIGHTER_JS = r"""
+(function() {
+    function cleanButtonText(text) {
+        return (text || '').replace(/\p{Emoji}/gu, '').trim();
+    }
+    function highlightActiveSidebarButton() {
+        var menu = window.__menuSidebar || {};
+        document.querySelectorAll('[data-testid="stSidebar"] [data-testid="stButton"]').forEach(function(container) {
+            var button = container.querySelector('button');
+            var active = !!button && cleanButtonText(button.innerText || button.textContent) === menu.active;
+            container.classList.toggle('st-sidebar-button-active', active);
+        });
+    }
+    document.addEventListener('click', function(event) {
+        var menu = window.__menuSidebar;
+        var button = event.target.closest && event.target.closest('[data-testid="stSidebar"] [data-testid="stButton"] button');
+        if (!menu || !button) return;
+        var name = cleanButtonText(button.innerText || button.textContent);
+        if (menu.options.indexOf(name) !== -1) {
+            menu.active = name;
+            highlightActiveSidebarButton();
+        }
+    }, true);
+    new MutationObserver(function(mutationsList) {
+        var sidebarChanged = mutationsList.some(function(mutation) {
+            return mutation.target.closest && mutation.target.closest('[data-testid="stSidebar"]');
+        });
+        if (sidebarChanged) {
+            highlightActiveSidebarButton();
+        }
+    }).observe(document.body, { childList: true, subtree: true });
+    window.__highlightSidebarMenu = highlightActiveSidebarButton;
+})();
+"""
+STATIC_ASSETS_ID = "aset-statis-klasterisasi"
+SIDEBAR_HIGHLIGHTER_ID = "penanda-menu-aktif"
+
+
+def _head_injection(element_id, tag, content):
+    # Elemen dibuat di <head> dokumen induk (bukan di iframe komponen) sehingga tetap ada
+    # setelah iframe dibuang pada rerun berikutnya; id yang sama tidak dipasang dua kali.
+    return f"""
+    (function() {{
+        var doc = window.parent.document;
+        if (doc.getElementById({json.dumps(element_id)})) return;
+        var el = doc.createElement({json.dumps(tag)});
+        el.id = {json.dumps(element_id)};
+        el.textContent = {json.dumps(content)};
+        doc.head.appendChild(el);
+    }})();
+    """
+
+
+def install_static_assets():
+    # CSS dikirim sekali per sesi; rerun berikutnya hanya mengirim isi halaman.
+    # (st.markdown/st.html tidak menjalankan <script>, maka lewat komponen HTML.)
+    if st.session_state.get("static_assets_installed"):
+        return
+    components.html(f"<script>{_head_injection(STATIC_ASSETS_ID, 'style', custom_css)}</script>", height=0)
+    st.session_state.static_assets_installed = True
+
+
+def install_sidebar_highlighter(menu_options, current_menu):
+    # Sekali per sesi: peran hanya berganti lewat "Keluar", yang mengosongkan session state.
+    if st.session_state.get("sidebar_highlighter_installed"):
+        return
+    menu = json.dumps({"options": menu_options, "active": current_menu})
+    components.html(f"""<script>
+    window.parent.__menuSidebar = {menu};
+    {_head_injection(SIDEBAR_HIGHLIGHTER_ID, "script", SIDEBAR_HIGHLIGHTER_JS)}
+    window.parent.__highlightSidebarMenu && window.parent.__highlightSidebarMenu();
+    </script>""", height=0)
+    st.session_state.sidebar_highlighter_installed = True
+
+
 st.set_page_config(page_title="Klasterisasi K-Prototype Siswa", layout="wide", initial_sidebar_state="expanded")
-st.markdown(custom_css, unsafe_allow_html=True)
+install_static_assets()
 st.markdown(header_html, unsafe_allow_html=True)
 
 # --- FUNGSI PEMBANTU (dengan caching) ---
 
+@instrumented("pdf_siswa")
 def generate_pdf_profil_siswa(nama, data_siswa_dict, klaster, cluster_desc_map):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.set_text_color(44, 47, 127)
-    pdf.cell(0, 10, "PROFIL SISWA - HASIL KLASTERISASI", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font("Arial", "", 10)
-    pdf.set_text_color(0, 0, 0)
-    keterangan_umum = (
-        "Laporan ini menyajikan profil detail siswa berdasarkan hasil pengelompokan "
-        "menggunakan Algoritma K-Prototype. Klasterisasi dilakukan berdasarkan "
-        "nilai akademik, kehadiran, dan partisipasi ekstrakurikuler siswa. "
-        "Informasi klaster ini dapat digunakan untuk memahami kebutuhan siswa dan "
-        "merancang strategi pembinaan yang sesuai."
-    )
-    pdf.multi_cell(0, 5, keterangan_umum, align='J')
-    pdf.ln(5)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, f"Nama Siswa: {nama}", ln=True)
-    pdf.cell(0, 8, f"Klaster Hasil: {klaster}", ln=True)
-    pdf.ln(3)
-    klaster_desc = cluster_desc_map.get(klaster, "Deskripsi klaster tidak tersedia.")
-    pdf.set_font("Arial", "I", 10)
-    pdf.set_text_color(80, 80, 80)
-    pdf.multi_cell(0, 5, f"Karakteristik Klaster {klaster}: {klaster_desc}", align='J')
-    pdf.ln(5)
-    pdf.set_font("Arial", "", 10)
-    pdf.set_text_color(0, 0, 0)
-    ekskul_diikuti = []
-    ekskul_cols_full_names = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian", "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
-    for col in ekskul_cols_full_names:
-        val = data_siswa_dict.get(col)
-        if val is not None and (val == 1 or str(val).strip() == '1'):
-            ekskul_diikuti.append(col.replace("Ekstrakurikuler ", ""))
-
-    display_data = {
-        "Nomor Induk": data_siswa_dict.get("No", "-"),
-        "Jenis Kelamin": data_siswa_dict.get("JK", "-"),
-        "Kelas": data_siswa_dict.get("Kelas", "-"),
-        "Rata-rata Nilai Akademik": f"{data_siswa_dict.get('Rata Rata Nilai Akademik', '-'):.2f}",
-        "Persentase Kehadiran": f"{data_siswa_dict.get('Kehadiran', '-'):.2%}",
-        "Ekstrakurikuler yang Diikuti": ", ".join(ekskul_diikuti) if ekskul_diikuti else "Tidak mengikuti ekstrakurikuler",
-    }
-    for key, val in display_data.items():
-        pdf.cell(0, 7, f"{key}: {val}", ln=True)
     try:
-        pdf_output = pdf.output(dest='S').encode('latin-1')
-        return bytes(pdf_output)
+        return render_student_pdf({**data_siswa_dict, "Nama": nama, "Klaster": klaster}, cluster_desc_map)
     except Exception as e:
         st.error(f"Error saat mengonversi PDF: {e}. Coba pastikan tidak ada karakter aneh pada data.")
         return None
 
-@st.cache_data(show_spinner="Sedang memproses dan menormalisasi data...")
-def preprocess_data(df):
-    df_processed = df.copy()
-    df_processed.columns = [col.strip() for col in df_processed.columns]
-    missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in df_processed.columns]
-    if missing_cols:
-        st.error(f"Kolom-kolom berikut tidak ditemukan dalam data Anda: {', '.join(missing_cols)}. Harap periksa file Excel Anda dan pastikan nama kolom sudah benar.")
-        return None, None
-    df_clean_for_clustering = df_processed.drop(columns=ID_COLS, errors="ignore")
-    for col in CATEGORICAL_COLS:
-        df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(0).astype(str)
-    for col in NUMERIC_COLS:
-        if df_clean_for_clustering[col].isnull().any():
-            mean_val = df_clean_for_clustering[col].mean()
-            df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(mean_val)
-            st.warning(f"Nilai kosong pada kolom '{col}' diisi dengan rata-rata: {mean_val:.2f}.")
-    scaler = StandardScaler()
-    df_clean_for_clustering[NUMERIC_COLS] = scaler.fit_transform(df_clean_for_clustering[NUMERIC_COLS])
-    return df_clean_for_clustering, scaler
-
-@st.cache_resource(show_spinner="Melakukan klasterisasi data...")
-def run_kprototypes_clustering(df_preprocessed, n_clusters):
-    df_for_clustering = df_preprocessed.copy()
-    X_data = df_for_clustering[ALL_FEATURES_FOR_CLUSTERING]
-    X = X_data.to_numpy()
-    categorical_feature_indices = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
-    try:
-        kproto = KPrototypes(n_clusters=n_clusters, init='Huang', n_init=10, verbose=0, random_state=42, n_jobs=-1)
-        clusters = kproto.fit_predict(X, categorical=categorical_feature_indices)
-    except Exception as e:
-        st.error(f"Terjadi kesalahan saat menjalankan K-Prototypes: {e}. Pastikan data Anda cukup bervariasi untuk jumlah klaster yang dipilih.")
+
+@st.cache_resource
+def get_upload_cache():
+    # Satu cache untuk seluruh sesi: file yang sama (hash byte sama) hanya dibaca dan diproses sekali.
+    return UploadCache()
+
+@st.cache_resource
+def get_diagnostics_log():
+    return DiagnosticsLog()
+
+@st.cache_resource
+def get_compute_governor():
+    # Batas worker komputasi untuk seluruh sesi di server ini.
+    return ComputeGovernor()
+
+@st.cache_resource
+def get_job_manager():
+    # Pekerjaan latar belakang dibagi semua sesi: hasilnya tetap ada walau halaman dimuat ulang.
+    return JobManager(get_compute_governor())
+
+def interactive_slot():
+    # Pembacaan untuk penampil dasbor didahulukan di depan antrean pekerjaan latar belakang.
+    return get_compute_governor().slots(owner=st.session_state.diagnostics_session, interactive=True)
+
+def read_uploaded_file(uploaded_file):
+    # Hash byte dihitung sekali per file unggahan, bukan pada setiap rerun.
+    with stage("baca_data", cached=True) as record:
+        digests = st.session_state.upload_digests
+        if uploaded_file.file_id not in digests:
+            digests[uploaded_file.file_id] = file_digest(uploaded_file.getvalue())
+        digest = digests[uploaded_file.file_id]
+        cache = get_upload_cache()
+        if (digest, "parsed") not in cache:
+            mark_cache_miss()
+        df = cache.parsed(digest, uploaded_file.getvalue(), uploaded_file.name)
+        record.rows = len(df)
+    return digest, df
+
+def preprocess_data(upload_digest, df):
+    with st.spinner("Sedang memproses dan menormalisasi data..."), stage("praproses", cached=True, rows=len(df)):
+        cache = get_upload_cache()
+        digest = upload_digest or data_fingerprint(df)
+        if (digest, "preprocessed") not in cache:
+            mark_cache_miss()
+        result = cache.preprocessed(digest, df)
+    if "error" in result:
+        st.error(result["error"])
         return None, None, None
-    df_for_clustering["Klaster"] = clusters
-    return df_for_clustering, kproto, categorical_feature_indices
-
-@st.cache_data(show_spinner="Membuat deskripsi klaster...")
-def generate_cluster_descriptions(df_clustered, n_clusters, numeric_cols, categorical_cols, df_original):
-    cluster_characteristics_map = {}
-    if df_original is None:
-        return {}
-    
-    df_original_numeric = df_original[NUMERIC_COLS]
-    for i in range(n_clusters):
-        cluster_data = df_clustered[df_clustered["Klaster"] == i]
-        avg_scaled_values = cluster_data[numeric_cols].mean()
-        mode_values = cluster_data[categorical_cols].mode().iloc[0]
-        desc = ""
-        if avg_scaled_values["Rata Rata Nilai Akademik"] > 0.75:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat tinggi. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] > 0.25:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di atas rata-rata. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.75:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat rendah. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.25:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di bawah rata-rata. "
-        else:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung rata-rata. "
-        if avg_scaled_values["Kehadiran"] > 0.75:
-            desc += "Tingkat kehadiran cenderung sangat tinggi. "
-        elif avg_scaled_values["Kehadiran"] > 0.25:
-            desc += "Tingkat kehadiran cenderung di atas rata-rata. "
-        elif avg_scaled_values["Kehadiran"] < -0.75:
-            desc += "Tingkat kehadiran cenderung sangat rendah. "
-        elif avg_scaled_values["Kehadiran"] < -0.25:
-            desc += "Tingkat kehadiran cenderung di bawah rata-rata. "
-        else:
-            desc += "Tingkat kehadiran cenderung rata-rata. "
-        ekskul_aktif_modes = [col_name for col_name in categorical_cols if mode_values[col_name] == '1']
-        if ekskul_aktif_modes:
-            desc += f"Siswa di klaster ini aktif dalam ekstrakurikuler: {', '.join([c.replace('Ekstrakurikuler ', '') for c in ekskul_aktif_modes])}."
-        else:
-            desc += "Siswa di klaster ini kurang aktif dalam kegiatan ekstrakurikuler."
-        cluster_characteristics_map[i] = desc
-    return cluster_characteristics_map
+    for message in result["warnings"]:
+        st.warning(message)
+    return result["df"], result["scaler"], result["fingerprint"]
+
+def current_data_fingerprint():
+    if st.session_state.preprocessed_fingerprint is None:
+        st.session_state.preprocessed_fingerprint = data_fingerprint(st.session_state.df_preprocessed_for_clustering)
+    return st.session_state.preprocessed_fingerprint
+
+@instrumented("profil_dari_registri", cached=True)
+@st.cache_data(show_spinner="Menghitung profil klaster...")
+def load_cluster_profiles(registry_dir, version):
+    mark_cache_miss()
+    # Profil dibaca dari registri; versi lama tanpa profil dihitung sekali per versi.
+    artifact = load_model_version(registry_dir, version)
+    if artifact.profiles is not None:
+        return artifact.profiles
+    with interactive_slot():
+        return profile_clusters(artifact.results)
+
+@instrumented("grafik_klaster", cached=True)
+@st.cache_data(show_spinner="Menyiapkan grafik klaster...", max_entries=16)
+def load_cluster_charts(registry_dir, version):
+    # Byte PNG/SVG per versi model: dirender sekali lalu disimpan di registri,
+    # sehingga rerun dan penampil lain hanya membaca byte yang sudah jadi.
+    mark_cache_miss()
+    with interactive_slot():
+        return version_charts(load_model_version(registry_dir, version))
+
+def show_cluster_charts(version):
+    st.subheader("Grafik Klaster")
+    if version is None:
+        st.info("Grafik tersedia setelah hasil klasterisasi tersimpan sebagai versi model.")
+        return
+    charts = load_cluster_charts(DEFAULT_REGISTRY_DIR, version)
+    for tab, name in zip(st.tabs(list(CHART_TITLES.values())), CHART_TITLES):
+        with tab:
+            st.image(charts[name]["png"], use_column_width=True)
+            col_png, col_svg = st.columns(2)
+            with col_png:
+                st.download_button("Unduh PNG", charts[name]["png"], file_name=f"{name}_{version}.png",
+                                   mime="image/png", key=f"chart_png_{name}")
+            with col_svg:
+                st.download_button("Unduh SVG", charts[name]["svg"], file_name=f"{name}_{version}.svg",
+                                   mime="image/svg+xml", key=f"chart_svg_{name}")
+
+@instrumented("stabilitas_klaster", cached=True)
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_stability_report(registry_dir, version, n_resamples):
+    # Hanya membaca laporan yang sudah dihitung pekerjaan stabilitas; tidak pernah melakukan fit.
+    mark_cache_miss()
+    return load_model_version(registry_dir, version).read_stability(n_resamples)
+
+def show_stability_report(version, key_prefix, can_run):
+    st.subheader("Stabilitas Klaster")
+    if version is None:
+        st.info("Analisis stabilitas tersedia setelah hasil klasterisasi tersimpan sebagai versi model.")
+        return
+    st.write("Model dilatih ulang pada banyak sampel ulang (bootstrap) dengan seed berbeda. ARI (Adjusted Rand Index) "
+             "mengukur kemiripan pengelompokan tiap replikasi dengan hasil saat ini (1 = identik), dan keyakinan "
+             "siswa adalah proporsi replikasi yang menempatkannya di klaster yang sama.")
+    artifact = load_model_version(DEFAULT_REGISTRY_DIR, version)
+    n_resamples = st.select_slider("Jumlah replikasi bootstrap", options=[10, 20, 30, 50, 100],
+                                   value=STABILITY_RESAMPLES, key=f"{key_prefix}_stability_resamples")
+    if not artifact.has_stability(n_resamples):
+        if not can_run:
+            st.info(f"Laporan stabilitas dengan {n_resamples} replikasi untuk versi {version} belum tersedia. "
+                    "Mohon minta Operator TU untuk menjalankannya.")
+            return
+        if st.button("Jalankan Analisis Stabilitas", key=f"{key_prefix}_stability_run",
+                     disabled=session_job("stabilitas") is not None):
+            submit_job("stabilitas", f"Stabilitas {version} ({n_resamples} replikasi)", stability_job,
+                       DEFAULT_REGISTRY_DIR, version, n_resamples, key=("stabilitas", version, n_resamples),
+                       workers=os.cpu_count() or 1)
+        job = take_finished_job("stabilitas")
+        if job is not None and job.status == FAILED:
+            st.error(f"Terjadi kesalahan saat menjalankan analisis stabilitas: {job.error}")
+        if not artifact.has_stability(n_resamples):
+            return
+    report = load_stability_report(DEFAULT_REGISTRY_DIR, version, n_resamples)
+    ari = report["replicates"]["ARI"]
+    col_mean, col_median, col_p5 = st.columns(3)
+    col_mean.metric("ARI Rata-rata", f"{ari.mean():.3f}")
+    col_median.metric("ARI Median", f"{ari.median():.3f}")
+    col_p5.metric("ARI Persentil 5", f"{ari.quantile(0.05):.3f}",
+                  help="Sembilan puluh lima persen replikasi memiliki ARI di atas nilai ini.")
+    if ari.quantile(0.05) < 0.5:
+        st.warning("Pengelompokan kurang stabil: sebagian replikasi menghasilkan kelompok yang cukup berbeda. "
+                   "Pertimbangkan jumlah klaster lain sebelum mengambil keputusan.")
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(7, 3))
+    ax = fig.subplots()
+    ax.hist(ari, bins=min(20, max(len(ari) // 2, 5)), range=(min(ari.min(), 0.0), 1.0), color=PRIMARY_COLOR)
+    ax.set_xlabel("ARI terhadap hasil saat ini")
+    ax.set_ylabel("Jumlah Replikasi")
+    ax.set_title(f"Sebaran ARI ({report['n_resamples']} replikasi)")
+    fig.tight_layout()
+    st.pyplot(fig)
+    st.markdown(f"**Keyakinan per klaster** (siswa stabil: keyakinan ≥ {STABILITY_CONFIDENCE_THRESHOLD:.0%})")
+    show_dataframe(report["clusters"].style.format({"Keyakinan Rata-rata": "{:.1%}", "Proporsi Siswa Stabil": "{:.1%}"}),
+                   hide_index=True)
+    students = artifact.results[[col for col in ("No", "Nama", "Kelas", "Klaster") if col in artifact.results.columns]].copy()
+    students["Keyakinan"] = report["confidence"]
+    st.markdown("**Siswa dengan penempatan paling tidak yakin**")
+    show_dataframe(students.nsmallest(20, "Keyakinan").style.format({"Keyakinan": "{:.0%}"}), hide_index=True)
+    st.download_button("Unduh Keyakinan Seluruh Siswa (CSV)", students.to_csv(index=False).encode("utf-8"),
+                       file_name=f"stabilitas_{version}_{n_resamples}.csv", mime="text/csv",
+                       key=f"{key_prefix}_stability_csv")
+
+@instrumented("penyimpanan_hasil", cached=True)
+@st.cache_resource(show_spinner="Menyiapkan penyimpanan hasil...", max_entries=8)
+def load_result_store(registry_dir, version):
+    # Versi yang terbit sebelum ResultStore ada diisi sekali dari registri; setelah itu hanya kueri.
+    mark_cache_miss()
+    store = ModelRegistry(registry_dir).store()
+    if not store.has_version(version):
+        with interactive_slot():
+            store.ensure_version(load_model_version(registry_dir, version))
+    return store
+
+@instrumented("kueri_hasil", cached=True)
+@st.cache_data(show_spinner=False, max_entries=256)
+def run_store_query(registry_dir, version, query, *args, **kwargs):
+    # Isi sebuah versi tidak pernah berubah, sehingga hasil kueri aman di-cache per versi dan parameter.
+    mark_cache_miss()
+    return getattr(load_result_store(registry_dir, version), query)(version, *args, **kwargs)
+
+def show_results_browser(version, key_prefix):
+    # Filter, agregat, dan halaman tabel dijalankan SQLite; browser hanya menerima satu halaman.
+    cols = st.columns(len(FILTER_COLUMNS))
+    filters = {}
+    for col, column in zip(cols, FILTER_COLUMNS):
+        with col:
+            options = run_store_query(DEFAULT_REGISTRY_DIR, version, "distinct_values", column)
+            filters[column] = tuple(st.multiselect(column, options, key=f"{key_prefix}_store_filter_{column}",
+                                                   placeholder="Semua"))
+    search = st.text_input("Cari No atau awal Nama", key=f"{key_prefix}_store_search").strip()
+    total = run_store_query(DEFAULT_REGISTRY_DIR, version, "count_students", filters, search)
+    if total == 0:
+        st.warning("Tidak ada siswa yang sesuai dengan filter.")
+        return
+
+    st.subheader("Ringkasan per Klaster")
+    summary = run_store_query(DEFAULT_REGISTRY_DIR, version, "cluster_summary", filters, search)
+    percent_cols = [col for col in summary.columns if col.startswith("Partisipasi ")]
+    formats = {"Nilai Rata-rata": "{:.2f}", "Kehadiran Rata-rata": format_kehadiran, **{col: "{:.1%}" for col in percent_cols}}
+    show_dataframe(summary.style.format(formats, na_rep="-"), use_container_width=True, hide_index=True)
+    with st.expander("Jumlah Siswa per Kelas dan Klaster"):
+        st.table(run_store_query(DEFAULT_REGISTRY_DIR, version, "crosstab", "Kelas", filters, search))
+
+    st.subheader(f"Data Siswa ({total} siswa)")
+    col_sort, col_order, col_size = st.columns([2, 1, 1])
+    with col_sort:
+        order_by = st.selectbox("Urutkan berdasarkan", SORT_COLUMNS, key=f"{key_prefix}_store_sort")
+    with col_order:
+        descending = st.radio("Urutan", ["Naik", "Turun"], horizontal=True, key=f"{key_prefix}_store_order") == "Turun"
+    with col_size:
+        page_size = st.selectbox("Baris per halaman", [25, DEFAULT_PAGE_SIZE, 100, 200], index=1,
+                                 key=f"{key_prefix}_store_page_size")
+    n_pages = max((total + page_size - 1) // page_size, 1)
+    page_key = f"{key_prefix}_store_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        # Filter baru bisa membuat halaman yang sedang dibuka tidak ada lagi.
+        st.session_state[page_key] = 1
+    page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, step=1, key=page_key)
+    rows = run_store_query(DEFAULT_REGISTRY_DIR, version, "query_students", filters, search,
+                           order_by=order_by, descending=descending, page=page - 1, page_size=page_size)
+    show_dataframe(rows.style.format({"Rata Rata Nilai Akademik": "{:.2f}", "Kehadiran": format_kehadiran}, na_rep="-"),
+                   use_container_width=True, hide_index=True)
+    start = (page - 1) * page_size
+    st.caption(f"Menampilkan siswa {start + 1}–{start + len(rows)} dari {total}.")
+
+@instrumented("indeks_siswa", cached=True)
+@st.cache_resource(show_spinner="Menyiapkan indeks pencarian siswa...", max_entries=4)
+def load_student_index(registry_dir, version):
+    # Dibangun ulang hanya saat versi model berganti; pencarian berikutnya memakai indeks ini.
+    mark_cache_miss()
+    with interactive_slot():
+        return build_student_index(load_model_version(registry_dir, version))
+
+def show_student_lookup(version, key_prefix):
+    if version is None:
+        st.info("Profil siswa tersedia setelah hasil klasterisasi tersimpan sebagai versi model.")
+        return
+    index = load_student_index(DEFAULT_REGISTRY_DIR, version)
+    query = st.text_input("Cari siswa berdasarkan No atau Nama", key=f"{key_prefix}_student_query",
+                          placeholder="Contoh: 12 atau SITI",
+                          help="Nomor induk dicocokkan persis; nama dicocokkan dari awal kata dan tetap ditemukan walau ada salah ketik.")
+    if not query.strip():
+        st.caption(f"{len(index)} siswa terindeks pada versi model {version}.")
+        return
+    with stage("cari_siswa"):
+        matches = index.search(query)
+    if not matches:
+        st.warning(f"Tidak ada siswa yang cocok dengan '{query}'.")
+        return
+    pos = st.selectbox(f"Siswa yang cocok ({len(matches)})", matches, format_func=index.label,
+                       key=f"{key_prefix}_student_match")
+    record = index.record(pos)
+    data_siswa = record["row"]
+    st.markdown("---")
+    st.subheader(f"Profil: {data_siswa.get('Nama', '-')}")
+    col_klaster, col_jarak = st.columns(2)
+    col_klaster.metric("Klaster", record["Klaster"])
+    col_jarak.metric("Jarak ke Prototipe", f"{record['Jarak ke Prototipe']:.3f}",
+                     help="Semakin kecil, semakin mirip siswa dengan karakteristik khas klasternya.")
+    st.table(pd.DataFrame([(key, str(val)) for key, val in student_fields(data_siswa).items()], columns=["Data", "Keterangan"]))
+    st.markdown(f"**Karakteristik Klaster {record['Klaster']}:** {record['Deskripsi Klaster']}")
+    pdf_bytes = generate_pdf_profil_siswa(data_siswa.get("Nama", "-"), data_siswa, record["Klaster"], index.descriptions)
+    if pdf_bytes is not None:
+        st.download_button("Unduh Profil (PDF)", pdf_bytes, file_name=f"profil_{data_siswa.get('No', 'siswa')}.pdf",
+                           mime="application/pdf", key=f"{key_prefix}_student_pdf")
+
+def get_table_index(df, key_prefix):
+    # Satu indeks per tabel per sesi. Tabel di session state diganti, tidak pernah diubah di tempat,
+    # sehingga identitas objek cukup untuk tahu kapan indeks harus dibangun ulang.
+    entry = st.session_state.table_indexes.get(key_prefix)
+    if entry is None or entry[0].df is not df:
+        with stage("indeks_tabel", rows=len(df)):
+            # Token baru mengosongkan filter lama, yang pilihannya belum tentu ada di tabel baru.
+            entry = st.session_state.table_indexes[key_prefix] = (TableIndex(df), uuid.uuid4().hex[:8])
+    return entry
+
+def show_paged_table(df, key_prefix, **kwargs):
+    # Pengganti st.dataframe untuk tabel siswa: filter, urutan, dan pemotongan halaman dijalankan
+    # di server terhadap indeks terurut; browser hanya menerima baris pada halaman yang dibuka.
+    index, token = get_table_index(df, key_prefix)
+    key = f"{key_prefix}_{token}_table"
+    filters, ranges = {}, {}
+    with st.expander("Filter dan Urutan"):
+        if index.filter_columns:
+            for col, column in zip(st.columns(len(index.filter_columns)), index.filter_columns):
+                with col:
+                    filters[column] = tuple(st.multiselect(column, index.options(column), key=f"{key}_filter_{column}",
+                                                           placeholder="Semua"))
+        range_columns = [(column, index.value_range(column)) for column in index.range_columns]
+        range_columns = [(column, bounds) for column, bounds in range_columns if bounds is not None and bounds[0] < bounds[1]]
+        if range_columns:
+            for col, (column, bounds) in zip(st.columns(len(range_columns)), range_columns):
+                with col:
+                    selected = st.slider(column, bounds[0], bounds[1], bounds, key=f"{key}_range_{column}")
+                    if tuple(selected) != bounds:
+                        ranges[column] = tuple(selected)
+        col_sort, col_order, col_size = st.columns([2, 1, 1])
+        with col_sort:
+            order_by = st.selectbox("Urutkan berdasarkan", [None] + index.sort_columns, key=f"{key}_sort",
+                                    format_func=lambda column: "Urutan data asli" if column is None else column)
+        with col_order:
+            descending = st.radio("Urutan", ["Naik", "Turun"], horizontal=True, key=f"{key}_order") == "Turun"
+        with col_size:
+            page_size = st.selectbox("Baris per halaman", [25, DEFAULT_PAGE_SIZE, 100, 200], index=1, key=f"{key}_page_size")
+    total = index.count(filters, ranges)
+    if total == 0:
+        st.warning("Tidak ada siswa yang sesuai dengan filter.")
+        return
+    n_pages = max((total + page_size - 1) // page_size, 1)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        # Filter baru bisa membuat halaman yang sedang dibuka tidak ada lagi.
+        st.session_state[page_key] = 1
+    page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, step=1, key=page_key)
+    with stage("kueri_tabel", rows=total):
+        _, rows = index.query(filters, ranges, order_by, descending, page=page - 1, page_size=page_size)
+    show_dataframe(rows, **kwargs)
+    start = (page - 1) * page_size
+    st.caption(f"Menampilkan baris {start + 1}–{start + len(rows)} dari {total}"
+               + (f" (tersaring dari {len(df)})." if total < len(df) else "."))
+
+def show_dataframe(data, **kwargs):
+    # Waktu serialisasi tabel ke browser ikut tercatat; tabel besar sering menjadi penyebab lambat.
+    with stage("tampil_tabel", rows=len(data.index)):
+        st.dataframe(data, **kwargs)
+
+def show_cluster_profiles(profiles, cluster_desc_map):
+    st.subheader("Profil Klaster dalam Satuan Asli")
+    st.write("Statistik nilai akademik, kehadiran, dan tingkat partisipasi ekstrakurikuler setiap klaster.")
+    formats = {"Jumlah Siswa": "{:d}", "Persentase Siswa": "{:.1%}"}
+    for col, label in PROFILE_LABELS.items():
+        for kolom in profiles.columns:
+            if kolom.startswith(label):
+                if col == "Kehadiran":
+                    formats[kolom] = format_kehadiran
+                elif col == "Rata Rata Nilai Akademik":
+                    formats[kolom] = "{:.2f}"
+                else:
+                    formats[kolom] = "{:.1%}"
+    show_dataframe(profiles.style.format(formats, na_rep="-"), use_container_width=True)
+    for cluster_id, desc in cluster_desc_map.items():
+        with st.expander(f"Klaster {cluster_id}"):
+            st.markdown(desc)
+
+@instrumented("prediksi")
+def predict_new_students(df_baru, kproto_model, scaler, categorical_features_indices, cluster_desc_map):
+    # Seluruh siswa baru diprediksi dalam satu operasi tervektorisasi.
+    with interactive_slot():
+        labels, distances, warnings = predict_clusters(df_baru, kproto_model, scaler, categorical_features_indices)
+    for message in warnings:
+        st.warning(message)
+    df_prediksi = with_labels(df_baru, labels)
+    df_prediksi["Jarak ke Prototipe"] = distances
+    df_prediksi["Deskripsi Klaster"] = df_prediksi["Klaster"].map(cluster_desc_map)
+    return df_prediksi
+
+@instrumented("muat_model", cached=True)
+@st.cache_resource(show_spinner="Memuat model dari registri...")
+def load_model_version(registry_dir, version):
+    mark_cache_miss()
+    # Satu salinan per versi untuk seluruh sesi; model dan tabel hasil dimuat saat pertama dipakai.
+    with interactive_slot():
+        return ModelRegistry(registry_dir).load(version)
+
+def use_model_version(version, load_results=True):
+    # Dasbor Kepala Sekolah membaca data siswa lewat ResultStore; tabel hasil tidak perlu dimuat.
+    artifact = load_model_version(DEFAULT_REGISTRY_DIR, version)
+    st.session_state.df_clustered = artifact.results if load_results else None
+    st.session_state.kproto_model = artifact.model
+    st.session_state.scaler = artifact.scaler
+    st.session_state.categorical_features_indices = artifact.categorical_indices
+    st.session_state.n_clusters = artifact.n_clusters
+    st.session_state.cluster_characteristics_map = artifact.descriptions
+    st.session_state.cluster_profiles = load_cluster_profiles(DEFAULT_REGISTRY_DIR, version)
+    st.session_state.model_version = version
+
+# --- PEKERJAAN LATAR BELAKANG ---
+
+def submit_job(kind, label, func, *args, key=None, cleanup=None, workers=1):
+    # Satu pekerjaan per jenis untuk setiap sesi; ID-nya disimpan agar hasil dapat diambil pada rerun berikutnya.
+    # Pekerjaan mengantre di governor bersama pekerjaan sesi lain, digilir per sesi.
+    job = get_job_manager().submit(kind, label, func, *args, key=key, cleanup=cleanup,
+                                   owner=st.session_state.diagnostics_session, workers=workers)
+    st.session_state.jobs[kind] = job.id
+    return job
+
+def session_job(kind):
+    job_id = st.session_state.jobs.get(kind)
+    return None if job_id is None else get_job_manager().get(job_id)
+
+@st.experimental_fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(kind):
+    # Hanya fragmen ini yang diperbarui tiap detik; halaman penuh dimuat ulang saat pekerjaan selesai.
+    job = session_job(kind)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.fraction, text=f"Pekerjaan {job.id} – {job.label}: {job.message}")
+    if st.button("Batalkan", key=f"job_cancel_{kind}", disabled=job.cancel_requested):
+        job.cancel()
+
+def take_finished_job(kind):
+    # Pekerjaan yang masih berjalan ditampilkan progresnya; yang sudah selesai diserahkan
+    # sekali ke pemanggil (berhasil atau gagal), pembatalan cukup diberitahukan.
+    job = session_job(kind)
+    if job is None:
+        st.session_state.jobs.pop(kind, None)
+        return None
+    if not job.done:
+        show_job_progress(kind)
+        return None
+    del st.session_state.jobs[kind]
+    if job.status == CANCELLED:
+        st.warning(f"Pekerjaan {job.id} ({job.label}) dibatalkan.")
+        return None
+    return job
+
+def use_clustering_result(result):
+    st.session_state.df_clustered = result["df_final"]
+    st.session_state.partition_summary = None
+    st.session_state.ekspor_hasil = None
+    st.session_state.scaler = result["scaler"]
+    st.session_state.kproto_model = result["model"]
+    st.session_state.categorical_features_indices = result["categorical_indices"]
+    st.session_state.n_clusters = result["n_clusters"]
+    st.session_state.cluster_profiles = result["profiles"]
+    st.session_state.cluster_characteristics_map = result["descriptions"]
+    st.session_state.model_version = result["version"]
+
+def show_partitioned_clustering_panel():
+    df_original = st.session_state.df_original
+    st.subheader("Klasterisasi per Kelompok")
+    st.write("Selain pengelompokan global, siswa dapat dikelompokkan di dalam setiap kelas (atau sekolah) dengan model "
+             "terpisah untuk tiap kelompok. ID klaster diberi awalan nama kelompok, misalnya XI-2.")
+    group_cols = [col for col in GROUP_COLUMNS if col in df_original.columns]
+    if not group_cols:
+        st.info("Data tidak memiliki kolom Kelas atau Sekolah untuk klasterisasi per kelompok.")
+        return
+    if not st.session_state.df_clustered.index.equals(df_original.index):
+        st.info("Jalankan klasterisasi global pada data yang sedang diunggah terlebih dahulu.")
+        return
+    group_col = st.selectbox("Kelompokkan berdasarkan", group_cols, key="partition_group_col")
+    mode_k = st.radio("Jumlah klaster setiap kelompok", ["Tentukan K", "Otomatis (silhouette terbaik, K 2–6)"],
+                      horizontal=True, key="partition_k_mode")
+    k_items = ()
+    if mode_k == "Tentukan K":
+        n_clusters = st.slider("K bawaan untuk setiap kelompok", 2, 6, value=st.session_state.n_clusters, key="partition_k")
+        jumlah = group_keys(df_original[group_col]).value_counts().sort_index()
+        st.caption("K dapat diubah per kelompok pada tabel berikut.")
+        tabel_k = st.data_editor(
+            pd.DataFrame({group_col: jumlah.index, "Jumlah Siswa": jumlah.to_numpy(), "K": n_clusters}),
+            disabled=[group_col, "Jumlah Siswa"], hide_index=True, use_container_width=True,
+            column_config={"K": st.column_config.NumberColumn(min_value=2, max_value=6, step=1)},
+            key=f"partition_k_editor_{group_col}_{n_clusters}"
+        )
+        k_items = tuple((group, int(k)) for group, k in zip(tabel_k[group_col], tabel_k["K"]) if int(k) != n_clusters)
+    else:
+        n_clusters = "auto"
+    if st.button("Jalankan Klasterisasi per Kelompok", disabled=session_job("per_kelompok") is not None):
+        fingerprint = current_data_fingerprint()
+        submit_job("per_kelompok", f"Klasterisasi per {group_col}", partition_job, df_original,
+                   st.session_state.df_preprocessed_for_clustering, group_col, n_clusters, dict(k_items),
+                   key=("per_kelompok", fingerprint, group_col, n_clusters, k_items), workers=os.cpu_count() or 1)
+    job = take_finished_job("per_kelompok")
+    if job is not None and job.status == FAILED:
+        st.error(f"Terjadi kesalahan saat klasterisasi per kelompok: {job.error}")
+    elif job is not None:
+        assignments, summary, _ = job.result
+        st.session_state.df_clustered = with_labels(st.session_state.df_clustered, assignments, assignments.name)
+        st.session_state.partition_summary = summary
+        st.session_state.ekspor_hasil = None
+    summary = st.session_state.partition_summary
+    if summary is not None:
+        kolom = f"Klaster per {summary.columns[0]}"
+        st.success(f"Klasterisasi per kelompok selesai untuk {len(summary)} kelompok. Label tersimpan pada kolom '{kolom}'.")
+        show_dataframe(summary, use_container_width=True, hide_index=True)
+        gagal = summary[summary["Status"] != "ok"]
+        if not gagal.empty:
+            st.warning(f"{len(gagal)} kelompok tidak dapat dibagi sesuai K yang diminta; lihat kolom Status.")
+        hasil = st.session_state.df_clustered
+        if kolom in hasil.columns:
+            st.download_button("Unduh Hasil per Kelompok (CSV)", hasil.to_csv(index=False).encode("utf-8"),
+                               file_name=f"klaster_per_{summary.columns[0].lower()}.csv", mime="text/csv")
+
+def show_results_export_panel():
+    st.subheader("Unduh Hasil Klasterisasi Lengkap")
+    st.write("Seluruh data siswa beserta Klaster dan deskripsinya, profil setiap klaster, dan peta deskripsi klaster. "
+             "Excel berisi satu lembar per bagian; CSV dan Parquet diunduh sebagai ZIP berisi satu berkas per bagian.")
+    format_label = st.radio("Format ekspor", ["Excel (.xlsx)", "CSV (ZIP)", "Parquet (ZIP)"], horizontal=True,
+                            key="results_export_format")
+    fmt = {"Excel (.xlsx)": "xlsx", "CSV (ZIP)": "csv", "Parquet (ZIP)": "parquet"}[format_label]
+    df_clustered = st.session_state.df_clustered
+    if st.button("Siapkan Berkas Ekspor", disabled=session_job("ekspor_hasil") is not None):
+        nama_berkas = export_filename(st.session_state.model_version, fmt)
+        submit_job("ekspor_hasil", f"Ekspor {len(df_clustered)} siswa ({nama_berkas})", results_export_job,
+                   df_clustered, st.session_state.cluster_profiles, st.session_state.cluster_characteristics_map,
+                   fmt, nama_berkas, cleanup=remove_export)
+    job = take_finished_job("ekspor_hasil")
+    if job is not None and job.status == FAILED:
+        st.error(f"Terjadi kesalahan saat mengekspor hasil: {job.error}")
+    elif job is not None:
+        st.session_state.ekspor_hasil = job.result
+    path = st.session_state.ekspor_hasil
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as output:
+            st.download_button("Unduh Hasil Klasterisasi", output, file_name=os.path.basename(path),
+                               mime=TABLE_EXPORT_MIME[path.rsplit(".", 1)[-1]])
+
+def show_model_registry_panel():
+    registry = ModelRegistry(DEFAULT_REGISTRY_DIR)
+    versions_table = registry.versions_table()
+    with st.expander("Riwayat Versi Model"):
+        if versions_table.empty:
+            st.write("Belum ada versi model yang tersimpan.")
+            return
+        show_dataframe(versions_table, use_container_width=True, hide_index=True)
+        version_ids = versions_table["Versi"].tolist()
+        col_pilih, col_rollback = st.columns(2)
+        with col_pilih:
+            selected_version = st.selectbox("Pilih versi untuk diaktifkan", version_ids[::-1], key="registry_activate_version")
+            if st.button("Aktifkan Versi Ini", key="registry_activate_button"):
+                registry.set_active(selected_version)
+                use_model_version(selected_version)
+                st.rerun()
+        with col_rollback:
+            if st.button("Kembalikan ke Versi Sebelumnya", key="registry_rollback_button"):
+                try:
+                    use_model_version(registry.rollback())
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+        if len(version_ids) >= 2:
+            st.markdown("**Bandingkan Dua Versi**")
+            col_a, col_b = st.columns(2)
+            with col_a:
+                version_a = st.selectbox("Versi A", version_ids, index=len(version_ids) - 2, key="registry_compare_a")
+            with col_b:
+                version_b = st.selectbox("Versi B", version_ids, index=len(version_ids) - 1, key="registry_compare_b")
+            st.table(registry.compare(version_a, version_b))
+
+
+def show_diagnostics_panel():
+    events = st.session_state.diagnostics_events
+    # Rerun yang sedang berjalan belum selesai; yang ditampilkan adalah rerun-rerun sebelumnya.
+    df_events = events_frame(events)
+    if df_events.empty:
+        st.write("Belum ada rerun yang tercatat pada sesi ini.")
+    else:
+        reruns = df_events[df_events["stage"] == RERUN_STAGE]
+        cache = get_upload_cache()
+        total_upload = cache.hits + cache.misses
+        col_rerun, col_terakhir, col_rata, col_cache = st.columns(4)
+        col_rerun.metric("Jumlah Rerun", len(reruns))
+        col_terakhir.metric("Rerun Terakhir", f"{reruns['seconds'].iloc[-1]:.3f} s" if len(reruns) else "-")
+        col_rata.metric("Rata-rata Rerun", f"{reruns['seconds'].mean():.3f} s" if len(reruns) else "-")
+        col_cache.metric("Hit Cache Unggahan", f"{cache.hits / total_upload:.0%}" if total_upload else "-",
+                         help=f"{cache.hits} hit, {cache.misses} miss, {len(cache)} entri, {cache.total_bytes / 2**20:.1f} MB")
+        st.subheader("Tahap pada Rerun Terakhir")
+        terakhir = df_events[df_events["rerun"] == df_events["rerun"].max()]
+        st.dataframe(terakhir[["stage", "seconds", "cache", "rows", "rss_delta_mb", "peak_growth_mb"]].rename(columns={
+            "stage": "Tahap", "seconds": "Waktu (s)", "cache": "Cache", "rows": "Baris",
+            "rss_delta_mb": "Perubahan RSS (MB)", "peak_growth_mb": "Pertumbuhan Puncak RSS (MB)"}),
+            use_container_width=True, hide_index=True)
+        st.subheader("Ringkasan per Tahap (Sesi Ini)")
+        st.dataframe(summarize_stages(events), use_container_width=True, hide_index=True)
+    jobs = get_job_manager().jobs()
+    if jobs:
+        st.subheader("Pekerjaan Latar Belakang (Semua Sesi)")
+        status = get_compute_governor().status()
+        for col, (label, value) in zip(st.columns(len(status)), status.items()):
+            col.metric(label, value)
+        st.dataframe(pd.DataFrame([job.snapshot() for job in jobs]), use_container_width=True, hide_index=True,
+                     column_config={"Progres": st.column_config.ProgressColumn("Progres", min_value=0.0, max_value=1.0)})
+    col_log, col_sesi, col_hapus = st.columns(3)
+    with col_log:
+        st.download_button("Unduh Log Diagnostik (JSONL)", get_diagnostics_log().read_bytes(),
+                           file_name="diagnostik.jsonl", mime="application/x-ndjson")
+    with col_sesi:
+        st.download_button("Unduh Catatan Sesi Ini (CSV)", df_events.to_csv(index=False).encode("utf-8"),
+                           file_name="diagnostik_sesi.csv", mime="text/csv", disabled=df_events.empty)
+    with col_hapus:
+        if st.button("Kosongkan Catatan Sesi", key="diagnostics_clear"):
+            events.clear()
+            st.rerun()
 
 
 # --- INISIALISASI SESSION STATE ---
@@ -533,6 +1069,16 @@ if 'role' not in st.session_state:
     st.session_state.role = None
 if 'df_original' not in st.session_state:
     st.session_state.df_original = None
+if 'upload_digest' not in st.session_state:
+    st.session_state.upload_digest = None
+if 'upload_digests' not in st.session_state:
+    st.session_state.upload_digests = {}
+if 'table_indexes' not in st.session_state:
+    st.session_state.table_indexes = {}
+if 'preprocessed_fingerprint' not in st.session_state:
+    st.session_state.preprocessed_fingerprint = None
+if 'preprocessed_scaler' not in st.session_state:
+    st.session_state.preprocessed_scaler = None
 if 'df_preprocessed_for_clustering' not in st.session_state:
     st.session_state.df_preprocessed_for_clustering = None
 if 'df_clustered' not in st.session_state:
@@ -547,14 +1093,41 @@ if 'n_clusters' not in st.session_state:
     st.session_state.n_clusters = 3
 if 'cluster_characteristics_map' not in st.session_state:
     st.session_state.cluster_characteristics_map = {}
+if 'k_sweep_summary' not in st.session_state:
+    st.session_state.k_sweep_summary = None
+if 'model_version' not in st.session_state:
+    st.session_state.model_version = None
+if 'cluster_profiles' not in st.session_state:
+    st.session_state.cluster_profiles = None
+if 'partition_summary' not in st.session_state:
+    st.session_state.partition_summary = None
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+if 'laporan_massal' not in st.session_state:
+    st.session_state.laporan_massal = None
+if 'ekspor_hasil' not in st.session_state:
+    st.session_state.ekspor_hasil = None
 if 'current_menu' not in st.session_state:
     st.session_state.current_menu = None
 if 'kepsek_current_menu' not in st.session_state:
     st.session_state.kepsek_current_menu = "Lihat Hasil Klasterisasi"
+if 'diagnostics_session' not in st.session_state:
+    st.session_state.diagnostics_session = uuid.uuid4().hex[:8]
+if 'diagnostics_rerun' not in st.session_state:
+    st.session_state.diagnostics_rerun = 0
+if 'diagnostics_events' not in st.session_state:
+    st.session_state.diagnostics_events = new_session_events()
+
+# --- DIAGNOSTIK KINERJA ---
+# Setiap rerun dicatat: waktu total sejak skrip mulai, serta tahap-tahap di dalamnya.
+st.session_state.diagnostics_rerun += 1
+begin_rerun(get_diagnostics_log(), st.session_state.diagnostics_session, st.session_state.diagnostics_rerun,
+            st.session_state.diagnostics_events, started=rerun_started)
 
 
 # --- FUNGSI HALAMAN UTAMA (UNTUK SETIAP PERAN) ---
 
+@traced_rerun(page="Operator TU")
 def show_operator_tu_page():
     st.sidebar.title("MENU NAVIGASI")
     st.sidebar.markdown("---")
@@ -565,10 +1138,13 @@ def show_operator_tu_page():
         "Klasterisasi Data K-Prototypes",
         "Prediksi Klaster Siswa Baru",
         "Visualisasi & Profil Klaster",
-        "Lihat Profil Siswa Individual"
+        "Lihat Profil Siswa Individual",
+        "Ekspor Laporan PDF Massal",
+        "Diagnostik Kinerja"
     ]
     if 'current_menu' not in st.session_state or st.session_state.current_menu not in menu_options:
         st.session_state.current_menu = menu_options[0]
+    set_rerun_context(menu=st.session_state.current_menu)
 
     for option in menu_options:
         icon_map = {
@@ -577,7 +1153,9 @@ def show_operator_tu_page():
             "Klasterisasi Data K-Prototypes": "📊",
             "Prediksi Klaster Siswa Baru": "🔮",
             "Visualisasi & Profil Klaster": "📈",
-            "Lihat Profil Siswa Individual": "👤"
+            "Lihat Profil Siswa Individual": "👤",
+            "Ekspor Laporan PDF Massal": "🗂",
+            "Diagnostik Kinerja": "🩺"
         }
         display_name = f"{icon_map.get(option, '')} {option}"
         button_key = f"nav_button_{option.replace(' ', '_').replace('&', 'and')}"
@@ -586,43 +1164,7 @@ def show_operator_tu_page():
             st.session_state.current_menu = option
             st.rerun()
 
-    # Logika untuk menandai tombol aktif
-    js_highlight_active_button = f"""
-    <script>
-        function cleanButtonText(text) {{
-            return (text || '').replace(/\\p{{Emoji}}/gu, '').trim();
-        }}
-        function highlightActiveSidebarButton() {{
-            var currentMenu = '{st.session_state.current_menu}';
-            var cleanCurrentMenuName = cleanButtonText(currentMenu);
-            var sidebarButtonContainers = window.parent.document.querySelectorAll('[data-testid="stSidebar"] [data-testid="stButton"]');
-            sidebarButtonContainers.forEach(function(container) {{
-                var button = container.querySelector('button');
-                if (button) {{
-                    var buttonText = cleanButtonText(button.innerText || button.textContent);
-                    container.classList.remove('st-sidebar-button-active');
-                    if (buttonText === cleanCurrentMenuName) {{
-                        container.classList.add('st-sidebar-button-active');
-                    }}
-                }}
-            }});
-        }}
-        const observer = new MutationObserver((mutationsList, observer) => {{
-            const sidebarChanged = mutationsList.some(mutation =>
-                mutation.target.closest('[data-testid="stSidebar"]')
-            );
-            if (sidebarChanged) {{
-                highlightActiveSidebarButton();
-            }}
-        }});
-        observer.observe(window.parent.document.body, {{ childList: true, subtree: true }});
-        highlightActiveSidebarButton();
-    </script>
-    """
-    if hasattr(st, 'html'):
-        st.html(js_highlight_active_button)
-    else:
-        st.markdown(js_highlight_active_button, unsafe_allow_html=True)
+    install_sidebar_highlighter(menu_options, st.session_state.current_menu)
     
     st.sidebar.markdown("---")
     if st.sidebar.button("🚪 Keluar", key="logout_tu_sidebar"):
@@ -633,7 +1175,7 @@ def show_operator_tu_page():
         st.header("Unggah Data Siswa")
         st.markdown("""
         <div style='background-color:#e3f2fd; padding:15px; border-radius:10px; border-left: 5px solid #2196F3;'>
-        Silakan unggah file Excel (.xlsx) yang berisi dataset siswa. Pastikan file Anda memiliki
+        Silakan unggah file Excel (.xlsx), CSV, atau Parquet yang berisi dataset siswa. Pastikan file Anda memiliki
         kolom-kolom berikut agar sistem dapat bekerja dengan baik:<br><br>
         <ul>
             <li><b>Kolom Identitas:</b> "No", "Nama", "JK", "Kelas"</li>
@@ -644,15 +1186,23 @@ def show_operator_tu_page():
         </div>
         """, unsafe_allow_html=True)
         st.markdown("---")
-        uploaded_file = st.file_uploader("Pilih File Excel Dataset", type=["xlsx"], help="Unggah file Excel Anda di sini. Hanya format .xlsx yang didukung.")
+        uploaded_file = st.file_uploader("Pilih File Excel Dataset", type=["xlsx", "csv", "parquet"], help="Unggah file data Anda di sini. Format yang didukung: .xlsx, .csv, dan .parquet.")
         if uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-                st.session_state.df_original = df
-                st.session_state.df_clustered = None
+                digest, df = read_uploaded_file(uploaded_file)
+                if digest != st.session_state.upload_digest:
+                    st.session_state.df_original = df
+                    st.session_state.upload_digest = digest
+                    st.session_state.df_clustered = None
+                    st.session_state.partition_summary = None
+                    st.session_state.k_sweep_summary = None
+                    # Pekerjaan untuk data sebelumnya tetap berjalan (bisa dipakai sesi lain), tetapi hasilnya tidak diambil.
+                    st.session_state.jobs = {}
+                    st.session_state.laporan_massal = None
+                    st.session_state.ekspor_hasil = None
                 st.success("Data berhasil diunggah! Anda dapat melanjutkan ke langkah praproses.")
                 st.subheader("Preview Data yang Diunggah:")
-                st.dataframe(df, use_container_width=True, height=300)
+                show_paged_table(df, "unggah", use_container_width=True, height=300)
                 st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
             except Exception as e:
                 st.error(f"Terjadi kesalahan saat membaca file: {e}. Pastikan format file Excel benar dan tidak rusak.")
@@ -674,14 +1224,20 @@ def show_operator_tu_page():
             """, unsafe_allow_html=True)
             st.markdown("---")
             if st.button("Jalankan Praproses & Normalisasi"):
-                df_preprocessed, scaler = preprocess_data(st.session_state.df_original)
+                df_preprocessed, scaler, fingerprint = preprocess_data(st.session_state.upload_digest, st.session_state.df_original)
                 if df_preprocessed is not None and scaler is not None:
                     st.session_state.df_preprocessed_for_clustering = df_preprocessed
                     st.session_state.scaler = scaler
+                    st.session_state.preprocessed_scaler = scaler
+                    st.session_state.preprocessed_fingerprint = fingerprint
+                    st.session_state.k_sweep_summary = None
                     st.success("Praproses dan Normalisasi berhasil dilakukan. Data siap untuk klasterisasi!")
-                    st.subheader("Data Setelah Praproses dan Normalisasi:")
-                    st.dataframe(st.session_state.df_preprocessed_for_clustering, use_container_width=True, height=300)
-                    st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
+            # Di luar blok tombol: tabel tetap tampil saat pengguna berpindah halaman atau mengubah filter.
+            if st.session_state.df_preprocessed_for_clustering is not None:
+                st.subheader("Data Setelah Praproses dan Normalisasi:")
+                show_paged_table(st.session_state.df_preprocessed_for_clustering, "praproses",
+                                 use_container_width=True, height=300)
+                st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
 
     elif st.session_state.current_menu == "Klasterisasi Data K-Prototypes":
         st.header("Klasterisasi K-Prototypes")
@@ -698,42 +1254,207 @@ def show_operator_tu_page():
             </div>
             """, unsafe_allow_html=True)
             st.markdown("---")
+            st.subheader("Mode Sweep: Bandingkan Semua Nilai K")
+            st.write("Jalankan klasterisasi untuk setiap K dari 2 hingga 6 sekaligus, lalu bandingkan kurva biaya (elbow) dan skor silhouette untuk memilih K.")
+            if st.button("Jalankan Sweep K (2–6)", disabled=session_job("sweep_k") is not None):
+                fingerprint = current_data_fingerprint()
+                submit_job("sweep_k", "Sweep K (2–6)", sweep_job, st.session_state.df_preprocessed_for_clustering,
+                           range(2, 7), fingerprint, key=("sweep_k", fingerprint, 2, 6), workers=5)
+            job = take_finished_job("sweep_k")
+            if job is not None and job.status == FAILED:
+                st.error(f"Terjadi kesalahan saat menjalankan sweep K: {job.error}. Pastikan data Anda cukup bervariasi untuk rentang klaster yang dipilih.")
+            elif job is not None:
+                st.session_state.k_sweep_summary = job.result
+            if st.session_state.k_sweep_summary is not None:
+                summary = st.session_state.k_sweep_summary
+                col_cost, col_sil = st.columns(2)
+                with col_cost:
+                    st.markdown("**Kurva Biaya (Elbow)**")
+                    st.line_chart(summary.set_index("K")["Biaya (Cost)"])
+                with col_sil:
+                    st.markdown("**Skor Silhouette (Data Campuran)**")
+                    st.line_chart(summary.set_index("K")["Silhouette"])
+                st.table(summary)
+                k_rekomendasi = recommend_k(summary)
+                if k_rekomendasi is not None:
+                    st.info(f"Skor silhouette tertinggi diperoleh pada K = {k_rekomendasi}. Memilih K dari hasil sweep tidak memerlukan klasterisasi ulang.")
+            st.markdown("---")
             k = st.slider("Pilih Jumlah Klaster (K)", 2, 6, value=st.session_state.n_clusters,
                             help="Pilih berapa banyak kelompok siswa yang ingin Anda bentuk.")
-            if st.button("Jalankan Klasterisasi"):
-                df_clustered, kproto_model, categorical_features_indices = run_kprototypes_clustering(
-                    st.session_state.df_preprocessed_for_clustering, k
+            active_version = ModelRegistry(DEFAULT_REGISTRY_DIR).active_version()
+            mode_inkremental = False
+            if active_version is not None:
+                mode_inkremental = st.checkbox(
+                    f"Mode inkremental: lanjutkan dari versi model aktif ({active_version})",
+                    help="Untuk data semester baru yang sebagian besar berisi siswa yang sama. Prototipe, normalisasi, "
+                         "dan nomor klaster versi aktif dipakai ulang sehingga 'Klaster 2' tetap bermakna sama; "
+                         "jumlah klaster mengikuti versi aktif."
                 )
-                if df_clustered is not None:
-                    df_final = st.session_state.df_original.copy()
-                    df_final['Klaster'] = df_clustered['Klaster']
-                    
-                    # --- PERBAIKAN: Simpan langsung ke session state ---
-                    st.session_state.df_clustered = df_final
-                    st.session_state.kproto_model = kproto_model
-                    st.session_state.categorical_features_indices = categorical_features_indices
-                    st.session_state.n_clusters = k
-                    st.session_state.cluster_characteristics_map = generate_cluster_descriptions(
-                        df_clustered, k, NUMERIC_COLS, CATEGORICAL_COLS, st.session_state.df_original
-                    )
+            if st.button("Jalankan Klasterisasi", disabled=session_job("klasterisasi") is not None):
+                fingerprint = current_data_fingerprint()
+                if mode_inkremental:
+                    submit_job("klasterisasi", f"Klasterisasi inkremental dari {active_version}", clustering_job,
+                               st.session_state.df_original, st.session_state.df_preprocessed_for_clustering, None,
+                               fingerprint, None, DEFAULT_REGISTRY_DIR, active_version,
+                               key=("klasterisasi", fingerprint, "inkremental", active_version))
+                else:
+                    scaler = st.session_state.preprocessed_scaler or st.session_state.scaler
+                    submit_job("klasterisasi", f"Klasterisasi K = {k}", clustering_job,
+                               st.session_state.df_original, st.session_state.df_preprocessed_for_clustering, k,
+                               fingerprint, scaler, DEFAULT_REGISTRY_DIR, key=("klasterisasi", fingerprint, k))
+            job = take_finished_job("klasterisasi")
+            if job is not None and job.status == FAILED:
+                if "inkremental" in job.label:
+                    st.error(f"Klasterisasi inkremental tidak dapat dijalankan: {job.error}. Jalankan klasterisasi penuh tanpa mode inkremental.")
+                else:
+                    st.error(f"Terjadi kesalahan saat menjalankan K-Prototypes: {job.error}. Pastikan data Anda cukup bervariasi untuk jumlah klaster yang dipilih.")
+            elif job is not None:
+                result = job.result
+                # Tabel dasar dipakai bersama; hasil hanya menyimpan kolom Klaster-nya sendiri.
+                df_final = result["df_final"]
+                if result["previous_version"] is not None:
+                    st.info(f"Melanjutkan dari versi {result['previous_version']}: {result['n_changed']} dari {len(df_final)} siswa baru atau berubah, "
+                            f"konvergen dalam {result['model'].n_iter_} iterasi.")
+                if result["publish_error"] is not None:
+                    st.warning(f"Hasil klasterisasi tidak dapat disimpan ke registri model: {result['publish_error']}")
+                use_clustering_result(result)
+
+                st.success(f"Klasterisasi selesai dengan {st.session_state.n_clusters} klaster! Hasil pengelompokan siswa telah tersedia.")
+                if st.session_state.model_version is not None:
+                    st.info(f"Hasil disimpan sebagai versi model {st.session_state.model_version} dan dapat dibuka oleh Kepala Sekolah.")
+                st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
+                st.subheader("Ringkasan Klaster: Jumlah Siswa per Kelompok")
+                jumlah_per_klaster = df_final["Klaster"].value_counts().sort_index().reset_index()
+                jumlah_per_klaster.columns = ["Klaster", "Jumlah Siswa"]
+                st.table(jumlah_per_klaster)
+                st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
+                st.subheader(f"Karakteristik Umum Klaster ({st.session_state.n_clusters} Klaster):")
+                st.write("Berikut adalah deskripsi singkat untuk setiap klaster yang terbentuk:")
+                for cluster_id, desc in st.session_state.cluster_characteristics_map.items():
+                    with st.expander(f"Klaster {cluster_id}"):
+                        st.markdown(desc)
+            if st.session_state.df_clustered is not None:
+                st.markdown("---")
+                st.subheader("Data Hasil Klasterisasi (Disertai Data Asli):")
+                show_paged_table(st.session_state.df_clustered, "hasil", use_container_width=True, height=300)
+                st.markdown("---")
+                show_results_export_panel()
+                st.markdown("---")
+                show_partitioned_clustering_panel()
+        st.markdown("---")
+        show_model_registry_panel()
 
-                    st.success(f"Klasterisasi selesai dengan {k} klaster! Hasil pengelompokan siswa telah tersedia.")
-                    st.markdown("---")
-                    st.subheader("Data Hasil Klasterisasi (Disertai Data Asli):")
-                    st.dataframe(df_final, use_container_width=True, height=300)
+    elif st.session_state.current_menu == "Prediksi Klaster Siswa Baru":
+        st.header("Prediksi Klaster Siswa Baru")
+        if st.session_state.kproto_model is None or st.session_state.scaler is None:
+            st.warning("Silakan jalankan klasterisasi terlebih dahulu di menu 'Klasterisasi Data K-Prototypes'.")
+        else:
+            st.markdown("""
+            <div style='background-color:#e3f2fd; padding:15px; border-radius:10px; border-left: 5px solid #2196F3;'>
+            Unggah file Excel (.xlsx), CSV, atau Parquet berisi data siswa baru dengan kolom yang sama seperti data latih.
+            Setiap siswa akan ditempatkan ke klaster terdekat menggunakan model K-Prototypes dan normalisasi
+            Z-score yang tersimpan, tanpa menjalankan klasterisasi ulang.
+            </div>
+            """, unsafe_allow_html=True)
+            st.markdown("---")
+            new_file = st.file_uploader("Pilih File Data Siswa Baru", type=["xlsx", "csv", "parquet"],
+                                        help="Kolom numerik dan kolom ekstrakurikuler harus sama dengan data yang diklasterisasi.")
+            if new_file:
+                try:
+                    _, df_baru = read_uploaded_file(new_file)
+                    df_prediksi = predict_new_students(
+                        df_baru, st.session_state.kproto_model, st.session_state.scaler,
+                        st.session_state.categorical_features_indices, st.session_state.cluster_characteristics_map
+                    )
+                except Exception as e:
+                    st.error(f"Terjadi kesalahan saat memprediksi klaster: {e}. Pastikan format file dan nama kolom sudah benar.")
+                else:
+                    st.success(f"Prediksi selesai untuk {len(df_prediksi)} siswa baru.")
+                    st.subheader("Hasil Prediksi Klaster:")
+                    show_dataframe(df_prediksi, use_container_width=True, height=300)
                     st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
-                    st.subheader("Ringkasan Klaster: Jumlah Siswa per Kelompok")
-                    jumlah_per_klaster = df_final["Klaster"].value_counts().sort_index().reset_index()
+                    st.subheader("Jumlah Siswa Baru per Klaster")
+                    jumlah_per_klaster = df_prediksi["Klaster"].value_counts().sort_index().reset_index()
                     jumlah_per_klaster.columns = ["Klaster", "Jumlah Siswa"]
                     st.table(jumlah_per_klaster)
-                    st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
-                    st.subheader(f"Karakteristik Umum Klaster ({st.session_state.n_clusters} Klaster):")
-                    st.write("Berikut adalah deskripsi singkat untuk setiap klaster yang terbentuk:")
-                    for cluster_id, desc in st.session_state.cluster_characteristics_map.items():
-                        with st.expander(f"Klaster {cluster_id}"):
-                            st.markdown(desc)
+                    st.download_button("Unduh Hasil Prediksi (CSV)", df_prediksi.to_csv(index=False).encode("utf-8"),
+                                       file_name="prediksi_klaster_siswa_baru.csv", mime="text/csv")
+
+    elif st.session_state.current_menu == "Visualisasi & Profil Klaster":
+        st.header("Visualisasi & Profil Klaster")
+        if st.session_state.cluster_profiles is None:
+            st.warning("Silakan jalankan klasterisasi terlebih dahulu di menu 'Klasterisasi Data K-Prototypes'.")
+        else:
+            show_cluster_charts(st.session_state.model_version)
+            show_cluster_profiles(st.session_state.cluster_profiles, st.session_state.cluster_characteristics_map)
+            show_stability_report(st.session_state.model_version, "tu", can_run=True)
+
+    elif st.session_state.current_menu == "Lihat Profil Siswa Individual":
+        st.header("Lihat Profil Siswa Individual")
+        if st.session_state.df_clustered is None:
+            st.warning("Silakan jalankan klasterisasi terlebih dahulu di menu 'Klasterisasi Data K-Prototypes'.")
+        else:
+            show_student_lookup(st.session_state.model_version, "tu")
+
+    elif st.session_state.current_menu == "Ekspor Laporan PDF Massal":
+        st.header("Ekspor Laporan PDF Massal")
+        if st.session_state.df_clustered is None:
+            st.warning("Silakan jalankan klasterisasi terlebih dahulu di menu 'Klasterisasi Data K-Prototypes'.")
+        else:
+            st.markdown(f"""
+            <div style='background-color:#e3f2fd; padding:15px; border-radius:10px; border-left: 5px solid #2196F3;'>
+            Buat laporan profil untuk seluruh siswa dalam satu kelas atau satu klaster sekaligus, misalnya untuk
+            keperluan wali kelas saat pembagian rapor. Laporan dapat diunduh sebagai satu PDF gabungan
+            atau sebagai ZIP berisi satu PDF per siswa. PDF gabungan disusun utuh di memori, sehingga untuk
+            lebih dari {MAX_COMBINED_PDF_ROWS} siswa format ZIP dipilih secara bawaan.
+            </div>
+            """, unsafe_allow_html=True)
+            st.markdown("---")
+            df_laporan = st.session_state.df_clustered
+            col_filter, col_nilai = st.columns(2)
+            with col_filter:
+                filter_col = st.radio("Kelompokkan berdasarkan", EXPORT_FILTERS, horizontal=True)
+            with col_nilai:
+                pilihan = sorted(df_laporan[filter_col].dropna().unique().tolist(), key=str)
+                nilai_terpilih = st.multiselect(f"Pilih {filter_col}", pilihan, default=pilihan[:1])
+            df_terpilih = filter_students(df_laporan, filter_col, nilai_terpilih)
+            st.write(f"Jumlah siswa yang akan dibuatkan laporan: **{len(df_terpilih)}**")
+            format_label = st.radio("Format unduhan", ["Satu PDF gabungan", "ZIP berisi PDF per siswa"],
+                                    index=int(len(df_terpilih) > MAX_COMBINED_PDF_ROWS), horizontal=True)
+            if st.button("Buat Laporan", disabled=df_terpilih.empty or session_job("laporan_massal") is not None):
+                fmt = "pdf" if format_label == "Satu PDF gabungan" else "zip"
+                nama_berkas = report_filename(filter_col, nilai_terpilih, fmt)
+                submit_job("laporan_massal", f"Laporan untuk {len(df_terpilih)} siswa ({nama_berkas})", export_job,
+                           df_terpilih, st.session_state.cluster_characteristics_map, fmt, nama_berkas,
+                           cleanup=remove_export, workers=os.cpu_count() or 1)
+            job = take_finished_job("laporan_massal")
+            if job is not None and job.status == FAILED:
+                st.error(f"Terjadi kesalahan saat membuat laporan: {job.error}")
+            elif job is not None:
+                st.session_state.laporan_massal = job.result
+                st.success(f"{job.label} siap diunduh.")
+            path = st.session_state.laporan_massal
+            # Berkas dihapus bersama pekerjaannya ketika daftar pekerjaan selesai sudah penuh.
+            if path is not None and os.path.exists(path):
+                with open(path, "rb") as output:
+                    st.download_button("Unduh Laporan", output, file_name=os.path.basename(path),
+                                       mime="application/pdf" if path.endswith(".pdf") else "application/zip")
+
+    elif st.session_state.current_menu == "Diagnostik Kinerja":
+        st.header("Diagnostik Kinerja")
+        st.markdown("""
+        <div style='background-color:#e3f2fd; padding:15px; border-radius:10px; border-left: 5px solid #2196F3;'>
+        Catatan waktu, memori, dan status cache setiap tahap (pembacaan file, praproses, klasterisasi,
+        deskripsi, penayangan tabel, dan lainnya) serta setiap rerun halaman pada sesi ini. Gunakan panel ini
+        ketika dasbor terasa lambat untuk melihat tahap mana yang memakan waktu. Log lengkap seluruh sesi
+        dapat diunduh untuk dianalisis di luar aplikasi.
+        </div>
+        """, unsafe_allow_html=True)
+        st.markdown("---")
+        show_diagnostics_panel()
     # ... (sisanya tidak berubah) ...
 
+@traced_rerun(page="Kepala Sekolah")
 def show_kepala_sekolah_page():
     st.sidebar.title("MENU NAVIGASI")
     st.sidebar.markdown("---")
@@ -745,6 +1466,7 @@ def show_kepala_sekolah_page():
     ]
     if 'kepsek_current_menu' not in st.session_state:
         st.session_state.kepsek_current_menu = kepsek_menu_options[0]
+    set_rerun_context(menu=st.session_state.kepsek_current_menu)
 
     for option in kepsek_menu_options:
         icon_map = {
@@ -759,42 +1481,7 @@ def show_kepala_sekolah_page():
             st.session_state.kepsek_current_menu = option
             st.rerun()
 
-    js_highlight_active_button = f"""
-    <script>
-        function cleanButtonText(text) {{
-            return (text || '').replace(/\\p{{Emoji}}/gu, '').trim();
-        }}
-        function highlightActiveSidebarButton() {{
-            var currentMenu = '{st.session_state.kepsek_current_menu}';
-            var cleanCurrentMenuName = cleanButtonText(currentMenu);
-            var sidebarButtonContainers = window.parent.document.querySelectorAll('[data-testid="stSidebar"] [data-testid="stButton"]');
-            sidebarButtonContainers.forEach(function(container) {{
-                var button = container.querySelector('button');
-                if (button) {{
-                    var buttonText = cleanButtonText(button.innerText || button.textContent);
-                    container.classList.remove('st-sidebar-button-active');
-                    if (buttonText === cleanCurrentMenuName) {{
-                        container.classList.add('st-sidebar-button-active');
-                    }}
-                }}
-            }});
-        }}
-        const observer = new MutationObserver((mutationsList, observer) => {{
-            const sidebarChanged = mutationsList.some(mutation =>
-                mutation.target.closest('[data-testid="stSidebar"]')
-            );
-            if (sidebarChanged) {{
-                highlightActiveSidebarButton();
-            }}
-        }});
-        observer.observe(window.parent.document.body, {{ childList: true, subtree: true }});
-        highlightActiveSidebarButton();
-    </script>
-    """
-    if hasattr(st, 'html'):
-        st.html(js_highlight_active_button)
-    else:
-        st.markdown(js_highlight_active_button, unsafe_allow_html=True)
+    install_sidebar_highlighter(kepsek_menu_options, st.session_state.kepsek_current_menu)
     
     st.sidebar.markdown("---")
     if st.sidebar.button("🚪 Keluar", key="logout_kepsek_sidebar"):
@@ -803,10 +1490,24 @@ def show_kepala_sekolah_page():
     
     st.title("👨‍💼 Dasbor Kepala Sekolah")
     
-    # --- PERBAIKAN: Membaca dari session_state, bukan dari file ---
-    if st.session_state.df_clustered is None:
+    # --- PERBAIKAN: Membaca versi aktif dari registri model, bukan dari sesi Operator ---
+    active_version = ModelRegistry(DEFAULT_REGISTRY_DIR).active_version()
+    if active_version is None:
         st.warning(f"Data hasil klasterisasi belum tersedia. Mohon minta Operator TU untuk memproses data terlebih dahulu.")
         return
+    if st.session_state.model_version != active_version:
+        use_model_version(active_version, load_results=False)
 
-    df_kepsek = st.session_state.df_clustered
+    if st.session_state.kepsek_current_menu == "Lihat Hasil Klasterisasi":
+        st.header("Lihat Hasil Klasterisasi")
+        st.caption(f"Versi model {active_version}.")
+        show_results_browser(active_version, "kepsek")
+    elif st.session_state.kepsek_current_menu == "Visualisasi & Profil Klaster":
+        st.header("Visualisasi & Profil Klaster")
+        show_cluster_charts(st.session_state.model_version)
+        show_cluster_profiles(st.session_state.cluster_profiles, st.session_state.cluster_characteristics_map)
+        show_stability_report(st.session_state.model_version, "kepsek", can_run=False)
+    elif st.session_state.kepsek_current_menu == "Lihat Profil Siswa Individual":
+        st.header("Lihat Profil Siswa Individual")
+        show_student_lookup(st.session_state.model_version, "kepsek")
     # ... (sisanya sama) ...
@@ -0,0 +1,331 @@
+# Benchmark skala aplikasi: generator data siswa sintetis (1 ribu s.d. 1 juta
+# baris) serta pengukuran waktu dan memori puncak setiap tahap, disimpan per
+# percobaan agar regresi antar versi kode terlihat.
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from pipeline import (ID_COLS, NUMERIC_COLS, CATEGORICAL_COLS, preprocess_frame, data_fingerprint,
+                      fit_kprototypes, describe_clusters, profile_clusters)
+from upload_cache import read_upload_bytes, file_digest
+from reports import export_student_reports
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+DEFAULT_DATA_DIR = "benchmark_data"
+DEFAULT_RESULTS_PATH = os.path.join("benchmark_results", "hasil_benchmark.jsonl")
+DEFAULT_N_CLUSTERS = 3
+# Render PDF ~5 ms per halaman; tahap PDF memakai paling banyak sekian siswa.
+DEFAULT_PDF_ROWS = 1000
+# Perlambatan di atas batas ini dibanding percobaan sebelumnya ditandai sebagai regresi.
+REGRESSION_THRESHOLD = 0.2
+STAGES = ("baca_data", "baca_snapshot", "praproses", "klasterisasi", "deskripsi", "pdf")
+
+# Tiga profil siswa dikalibrasi dari "Data MA-ALHIKMAH.xlsx" (hasil K=3):
+# proporsi, rata-rata/simpangan nilai dan kehadiran, peluang ikut tiap
+# ekstrakurikuler, serta sebaran kelas.
+SYNTHETIC_PROFILES = (
+    {"weight": 0.53, "nilai": (84.4, 1.9), "kehadiran": (0.966, 0.018),
+     "ekskul": (0.29, 0.29, 0.16, 0.65), "kelas": (0.48, 0.16, 0.36)},
+    {"weight": 0.19, "nilai": (85.2, 2.5), "kehadiran": (0.904, 0.025),
+     "ekskul": (0.09, 0.18, 0.18, 0.36), "kelas": (0.18, 0.18, 0.64)},
+    {"weight": 0.28, "nilai": (76.1, 0.7), "kehadiran": (0.966, 0.020),
+     "ekskul": (0.02, 0.02, 0.02, 0.98), "kelas": (0.47, 0.53, 0.00)},
+)
+KELAS_VALUES = ("X", "XI", "XII")
+NAMA_DEPAN = ("ACEP", "AULIA", "DEDIN", "DESI", "FAUZI", "GALUH", "HASNA", "INDRA", "INTAN", "IRFAN",
+              "JEJEN", "LUTFI", "MUHAMMAD", "NANDA", "NUR", "RANI", "RIMA", "SITI", "WILDAN", "ZAHRA")
+NAMA_BELAKANG = ("HERMAWAN", "KURNIAWAN", "NURDIN", "PURNAMASARI", "RAMADHAN", "RAMDANI", "RISMAYANTI",
+                 "SETIAWAN", "SUSILAWATI", "NURHIDAYAH", "GUNAWAN", "MUBAROK", "NURAENI", "UTAMI")
+# Sebagian kecil kehadiran dikosongkan agar jalur pengisian nilai kosong ikut terukur.
+MISSING_KEHADIRAN_RATE = 0.005
+
+
+# --- GENERATOR DATA SINTETIS ---
+
+def generate_students(n_rows, random_state=0):
+    rng = np.random.default_rng(random_state)
+    weights = np.array([p["weight"] for p in SYNTHETIC_PROFILES])
+    profile = rng.choice(len(SYNTHETIC_PROFILES), size=n_rows, p=weights / weights.sum())
+    nilai = np.empty(n_rows)
+    kehadiran = np.empty(n_rows)
+    kelas = np.empty(n_rows, dtype=object)
+    ekskul = np.empty((n_rows, len(CATEGORICAL_COLS)), dtype=np.int64)
+    for i, p in enumerate(SYNTHETIC_PROFILES):
+        mask = profile == i
+        n = int(mask.sum())
+        nilai[mask] = rng.normal(*p["nilai"], size=n)
+        kehadiran[mask] = rng.normal(*p["kehadiran"], size=n)
+        kelas[mask] = rng.choice(KELAS_VALUES, size=n, p=np.array(p["kelas"]) / sum(p["kelas"]))
+        ekskul[mask] = rng.random((n, len(CATEGORICAL_COLS))) < np.array(p["ekskul"])
+    kehadiran = np.clip(kehadiran, 0, 1)
+    kehadiran[rng.random(n_rows) < MISSING_KEHADIRAN_RATE] = np.nan
+    nama = (pd.Series(rng.choice(NAMA_DEPAN, size=n_rows)) + " "
+            + pd.Series(rng.choice(NAMA_BELAKANG, size=n_rows)))
+    df = pd.DataFrame({
+        "No": np.arange(1, n_rows + 1),
+        "Nama": nama,
+        "JK": rng.choice(["L", "P"], size=n_rows),
+        "Kelas": kelas,
+        "Rata Rata Nilai Akademik": np.clip(nilai, 0, 100).round(6),
+        "Kehadiran": kehadiran.round(6),
+    })
+    for j, col in enumerate(CATEGORICAL_COLS):
+        df[col] = ekskul[:, j]
+    return df[ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS]
+
+
+def write_workbook(df, path):
+    # Mode write-only openpyxl menulis baris demi baris; 1 juta baris tetap muat di memori kecil.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(list(df.columns))
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def dataset_path(n_rows, data_dir=DEFAULT_DATA_DIR, random_state=0):
+    return os.path.join(data_dir, f"siswa_{n_rows}_seed{random_state}.xlsx")
+
+
+def ensure_dataset(n_rows, data_dir=DEFAULT_DATA_DIR, random_state=0):
+    path = dataset_path(n_rows, data_dir, random_state)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = path + ".tmp.xlsx"
+        write_workbook(generate_students(n_rows, random_state), tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+# --- PENGUKURAN ---
+
+def measure(func, *args, trace_memory=True, **kwargs):
+    # Waktu diukur tanpa tracemalloc (yang memperlambat kode Python murni
+    # berkali-kali lipat); memori puncak diukur pada putaran kedua: alokasi
+    # Python/NumPy selama tahap berjalan, di luar data yang sudah ada.
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    if not trace_memory:
+        return result, seconds, None
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / (1024 * 1024)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _read_cold(data, filename):
+    return read_upload_bytes(data, filename)
+
+
+def _read_snapshot(data, filename, snapshot_dir):
+    return read_upload_bytes(data, filename, file_digest(data), snapshot_dir)
+
+
+def _preprocess(df_original):
+    df_preprocessed, scaler, _ = preprocess_frame(df_original)
+    return df_preprocessed, scaler, data_fingerprint(df_preprocessed)
+
+
+def _describe(df_original, df_clustered, n_clusters):
+    df_final = df_original.copy()
+    df_final["Klaster"] = df_clustered["Klaster"].to_numpy()
+    profiles = profile_clusters(df_final)
+    return df_final, describe_clusters(df_clustered, n_clusters, NUMERIC_COLS, CATEGORICAL_COLS, profiles)
+
+
+def _render_pdf(df_final, cluster_desc_map):
+    buffer = io.BytesIO()
+    export_student_reports(df_final, cluster_desc_map, "pdf", buffer)
+    return buffer.tell()
+
+
+def run_size(n_rows, n_clusters=DEFAULT_N_CLUSTERS, data_dir=DEFAULT_DATA_DIR, pdf_rows=DEFAULT_PDF_ROWS,
+             n_init=10, random_state=0, stages=STAGES, trace_memory=True, log=print):
+    # Urutan tahap sama dengan alur operator TU: unggah -> praproses ->
+    # klasterisasi -> deskripsi/profil -> laporan PDF.
+    path = ensure_dataset(n_rows, data_dir, random_state)
+    filename = os.path.basename(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    snapshot_dir = os.path.join(data_dir, "snapshot")
+    rows = []
+
+    def record(stage, n, seconds, peak_mb):
+        rows.append({"n_rows": n_rows, "stage": stage, "rows_processed": int(n),
+                     "seconds": round(seconds, 4), "peak_mb": None if peak_mb is None else round(peak_mb, 2),
+                     "rows_per_sec": round(n / seconds, 1) if seconds > 0 else None})
+        memori = "-" if peak_mb is None else f"{peak_mb:.1f}"
+        log(f"  {n_rows:>9} baris | {stage:<14} {seconds:9.3f} s  {memori:>9} MB")
+
+    df_original, seconds, peak = measure(_read_cold, data, filename, trace_memory=trace_memory)
+    if "baca_data" in stages:
+        record("baca_data", len(df_original), seconds, peak)
+    if "baca_snapshot" in stages:
+        # Percobaan pertama menulis snapshot; yang diukur adalah pembacaan berikutnya (memory-map).
+        _read_snapshot(data, filename, snapshot_dir)
+        df_snapshot, seconds, peak = measure(_read_snapshot, data, filename, snapshot_dir, trace_memory=trace_memory)
+        record("baca_snapshot", len(df_snapshot), seconds, peak)
+        del df_snapshot
+    (df_preprocessed, _, _), seconds, peak = measure(_preprocess, df_original, trace_memory=trace_memory)
+    if "praproses" in stages:
+        record("praproses", len(df_preprocessed), seconds, peak)
+    if not {"klasterisasi", "deskripsi", "pdf"} & set(stages):
+        return rows
+    (df_clustered, _, _), seconds, peak = measure(fit_kprototypes, df_preprocessed, n_clusters, n_init=n_init,
+                                                  random_state=42, trace_memory=trace_memory)
+    if "klasterisasi" in stages:
+        record("klasterisasi", len(df_clustered), seconds, peak)
+    (df_final, cluster_desc_map), seconds, peak = measure(_describe, df_original, df_clustered, n_clusters,
+                                                          trace_memory=trace_memory)
+    if "deskripsi" in stages:
+        record("deskripsi", len(df_final), seconds, peak)
+    if "pdf" in stages and pdf_rows:
+        df_pdf = df_final.head(pdf_rows)
+        _, seconds, peak = measure(_render_pdf, df_pdf, cluster_desc_map, trace_memory=trace_memory)
+        record("pdf", len(df_pdf), seconds, peak)
+    return rows
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, n_clusters=DEFAULT_N_CLUSTERS, data_dir=DEFAULT_DATA_DIR,
+                  pdf_rows=DEFAULT_PDF_ROWS, n_init=10, stages=STAGES, trace_memory=True, label="", log=print):
+    run = {
+        "run_id": datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "n_clusters": n_clusters,
+        "n_init": n_init,
+    }
+    records = []
+    for n_rows in sizes:
+        for row in run_size(n_rows, n_clusters, data_dir, pdf_rows, n_init, stages=stages,
+                            trace_memory=trace_memory, log=log):
+            records.append({**run, **row})
+    return records
+
+
+# --- PENYIMPANAN DAN PERBANDINGAN HASIL ---
+
+def save_results(records, path=DEFAULT_RESULTS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+def load_results(path=DEFAULT_RESULTS_PATH):
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare_runs(results, run_id, baseline_run_id=None, threshold=REGRESSION_THRESHOLD):
+    # Tanpa pembanding eksplisit: percobaan terakhir sebelum run_id yang
+    # mengukur ukuran data dan tahap yang sama.
+    current = results[results["run_id"] == run_id]
+    if baseline_run_id is None:
+        earlier = results[(results["run_id"] < run_id)
+                          & results.set_index(["n_rows", "stage"]).index.isin(current.set_index(["n_rows", "stage"]).index)]
+        if earlier.empty:
+            return None
+        baseline_run_id = earlier["run_id"].max()
+    baseline = results[results["run_id"] == baseline_run_id]
+    merged = current.merge(baseline, on=["n_rows", "stage"], suffixes=("", "_lama"))
+    if merged.empty:
+        return None
+    merged["perubahan_waktu"] = merged["seconds"] / merged["seconds_lama"] - 1
+    merged["perubahan_memori"] = (merged["peak_mb"].astype(float)
+                                  / merged["peak_mb_lama"].astype(float).where(merged["peak_mb_lama"] > 0) - 1)
+    merged["regresi"] = (merged["perubahan_waktu"] > threshold) | (merged["perubahan_memori"].fillna(0) > threshold)
+    merged.attrs["baseline_run_id"] = baseline_run_id
+    return merged[["n_rows", "stage", "seconds_lama", "seconds", "perubahan_waktu",
+                   "peak_mb_lama", "peak_mb", "perubahan_memori", "regresi"]]
+
+
+def _format_comparison(comparison):
+    table = comparison.copy()
+    for col in ("perubahan_waktu", "perubahan_memori"):
+        table[col] = table[col].map(lambda v: "-" if pd.isna(v) else f"{v:+.0%}")
+    table["regresi"] = table["regresi"].map({True: "REGRESI", False: ""})
+    return table.to_string(index=False)
+
+
+# --- COMMAND LINE ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tahap-tahap aplikasi klasterisasi pada data siswa sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Jumlah baris data sintetis (default: 1000 10000 100000 1000000).")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES),
+                        help="Tahap yang diukur (default: semua).")
+    parser.add_argument("-k", "--n-clusters", type=int, default=DEFAULT_N_CLUSTERS, help="Jumlah klaster (default: 3).")
+    parser.add_argument("--n-init", type=int, default=10, help="Jumlah inisialisasi K-Prototypes (default: 10, sama dengan aplikasi).")
+    parser.add_argument("--pdf-rows", type=int, default=DEFAULT_PDF_ROWS,
+                        help=f"Jumlah siswa maksimum pada tahap PDF (default: {DEFAULT_PDF_ROWS}).")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help=f"Folder workbook sintetis; dibuat sekali lalu dipakai ulang (default: {DEFAULT_DATA_DIR}).")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH,
+                        help=f"Berkas JSON Lines tempat hasil ditambahkan (default: {DEFAULT_RESULTS_PATH}).")
+    parser.add_argument("--label", default="", help="Catatan percobaan, misalnya nama cabang atau perubahan yang diuji.")
+    parser.add_argument("--baseline", help="run_id pembanding (default: percobaan sebelumnya dengan ukuran yang sama).")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Lewati pengukuran memori puncak (setiap tahap dijalankan sekali saja).")
+    parser.add_argument("--generate-only", action="store_true", help="Hanya buat workbook sintetis tanpa mengukur.")
+    args = parser.parse_args(argv)
+
+    if args.generate_only:
+        for n_rows in args.sizes:
+            print(f"Workbook {n_rows} baris: {ensure_dataset(n_rows, args.data_dir)}")
+        return 0
+
+    print("Benchmark dimulai (waktu, memori puncak per tahap):")
+    records = run_benchmark(args.sizes, args.n_clusters, args.data_dir, args.pdf_rows, args.n_init,
+                            args.stages, not args.no_memory, args.label)
+    save_results(records, args.results)
+    run_id = records[0]["run_id"] if records else None
+    print(f"Hasil percobaan {run_id} ditambahkan ke '{args.results}'.")
+    if run_id is None:
+        return 0
+    comparison = compare_runs(load_results(args.results), run_id, args.baseline)
+    if comparison is None:
+        print("Belum ada percobaan sebelumnya untuk dibandingkan.")
+        return 0
+    print(f"Perbandingan dengan percobaan {comparison.attrs['baseline_run_id']}:")
+    print(_format_comparison(comparison))
+    if comparison["regresi"].any():
+        print(f"Peringatan: {int(comparison['regresi'].sum())} tahap melambat atau boros memori lebih dari {REGRESSION_THRESHOLD:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+# Grafik klaster untuk menu "Visualisasi & Profil Klaster": dirender sekali per
+# versi model menjadi byte PNG/SVG, lalu dipakai ulang oleh semua penampil.
+# matplotlib/seaborn baru dimuat saat grafik benar-benar digambar.
+import io
+
+import numpy as np
+import pandas as pd
+
+from pipeline import CATEGORICAL_COLS, PROFILE_LABELS, profile_clusters
+
+CHART_FORMATS = ("png", "svg")
+CHART_TITLES = {
+    "sebaran_nilai_kehadiran": "Sebaran Nilai Akademik dan Kehadiran",
+    "partisipasi_ekskul": "Partisipasi Ekstrakurikuler per Klaster",
+    "ukuran_klaster": "Jumlah Siswa per Klaster",
+}
+# Di atas batas ini titik sebar diambil sampel per klaster dan kepadatan
+# seluruh siswa ditampilkan sebagai hexbin di belakangnya.
+SCATTER_MAX_POINTS = 5000
+MIN_POINTS_PER_CLUSTER = 50
+HEXBIN_GRIDSIZE = 40
+FIGURE_SIZE = (7, 4.5)
+FIGURE_DPI = 110
+
+
+def _palette(n_clusters):
+    import seaborn as sns
+    return sns.color_palette("tab10", max(n_clusters, 1))
+
+
+def _sample_points(df, max_points=SCATTER_MAX_POINTS, random_state=0):
+    # Sampel berstrata: proporsi tiap klaster dipertahankan, klaster kecil tetap terlihat.
+    if len(df) <= max_points:
+        return df
+    frac = max_points / len(df)
+    parts = []
+    for _, group in df.groupby("Klaster"):
+        n = min(len(group), max(int(round(len(group) * frac)), MIN_POINTS_PER_CLUSTER))
+        parts.append(group.sample(n=n, random_state=random_state))
+    return pd.concat(parts)
+
+
+def scatter_grade_attendance(df_final):
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import PercentFormatter
+    frame = pd.DataFrame({
+        "nilai": pd.to_numeric(df_final["Rata Rata Nilai Akademik"], errors="coerce"),
+        "kehadiran": pd.to_numeric(df_final["Kehadiran"], errors="coerce"),
+        "Klaster": df_final["Klaster"].to_numpy(),
+    }).dropna()
+    clusters = sorted(frame["Klaster"].unique())
+    colors = _palette(len(clusters))
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+    ax = fig.subplots()
+    points = _sample_points(frame)
+    aggregated = len(points) < len(frame)
+    if aggregated:
+        ax.hexbin(frame["nilai"], frame["kehadiran"], gridsize=HEXBIN_GRIDSIZE, cmap="Greys", mincnt=1, alpha=0.6)
+    for color, cluster_id in zip(colors, clusters):
+        subset = points[points["Klaster"] == cluster_id]
+        # Titik dirasterisasi agar SVG tetap kecil walau berisi ribuan titik.
+        ax.scatter(subset["nilai"], subset["kehadiran"], s=12 if aggregated else 24, alpha=0.6 if aggregated else 0.8,
+                   color=color, label=f"Klaster {cluster_id}", rasterized=len(points) > 1000, edgecolors="none")
+    ax.yaxis.set_major_formatter(PercentFormatter(1.0))
+    ax.set_xlabel("Rata-rata Nilai Akademik")
+    ax.set_ylabel("Kehadiran")
+    title = CHART_TITLES["sebaran_nilai_kehadiran"]
+    if aggregated:
+        title += f"\n(sampel {len(points):,} dari {len(frame):,} siswa; latar: kepadatan seluruh siswa)".replace(",", ".")
+    ax.set_title(title)
+    ax.legend(loc="best", fontsize="small")
+    fig.tight_layout()
+    return fig
+
+
+def participation_bars(profiles):
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import PercentFormatter
+    labels = [PROFILE_LABELS[col] for col in CATEGORICAL_COLS]
+    names = [label.replace("Partisipasi ", "") for label in labels]
+    clusters = list(profiles.index)
+    colors = _palette(len(clusters))
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+    ax = fig.subplots()
+    width = 0.8 / max(len(clusters), 1)
+    positions = np.arange(len(names))
+    for i, (color, cluster_id) in enumerate(zip(colors, clusters)):
+        ax.bar(positions + (i - (len(clusters) - 1) / 2) * width, profiles.loc[cluster_id, labels].to_numpy(dtype=float),
+               width=width, color=color, label=f"Klaster {cluster_id}")
+    ax.set_xticks(positions, names)
+    ax.set_ylim(0, 1)
+    ax.yaxis.set_major_formatter(PercentFormatter(1.0))
+    ax.set_ylabel("Persentase Siswa yang Ikut")
+    ax.set_title(CHART_TITLES["partisipasi_ekskul"])
+    ax.legend(loc="best", fontsize="small")
+    fig.tight_layout()
+    return fig
+
+
+def cluster_size_bars(profiles):
+    from matplotlib.figure import Figure
+    clusters = list(profiles.index)
+    counts = profiles["Jumlah Siswa"].to_numpy()
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+    ax = fig.subplots()
+    bars = ax.bar([f"Klaster {c}" for c in clusters], counts, color=_palette(len(clusters)))
+    ax.bar_label(bars, labels=[f"{n} ({p:.0%})" for n, p in zip(counts, profiles["Persentase Siswa"])])
+    ax.set_ylabel("Jumlah Siswa")
+    ax.set_title(CHART_TITLES["ukuran_klaster"])
+    ax.margins(y=0.15)
+    fig.tight_layout()
+    return fig
+
+
+def figure_bytes(fig, fmt="png"):
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Format grafik '{fmt}' tidak dikenal. Pilihan: {', '.join(CHART_FORMATS)}.")
+    buffer = io.BytesIO()
+    # Tanggal dan id acak SVG dibuat tetap agar grafik yang sama menghasilkan byte yang sama.
+    from matplotlib import rc_context
+    with rc_context({"svg.hashsalt": "grafik-klaster"}):
+        fig.savefig(buffer, format=fmt, metadata={"Date": None} if fmt == "svg" else None)
+    return buffer.getvalue()
+
+
+def render_cluster_charts(df_final, profiles=None, formats=CHART_FORMATS):
+    profiles = profile_clusters(df_final) if profiles is None else profiles
+    figures = {
+        "sebaran_nilai_kehadiran": scatter_grade_attendance(df_final),
+        "partisipasi_ekskul": participation_bars(profiles),
+        "ukuran_klaster": cluster_size_bars(profiles),
+    }
+    return {name: {fmt: figure_bytes(fig, fmt) for fmt in formats} for name, fig in figures.items()}
+
+
+def version_charts(artifact, formats=CHART_FORMATS):
+    # Grafik disimpan di folder versi model: dirender sekali, lalu dibaca dari
+    # disk oleh setiap sesi dan setelah aplikasi dimulai ulang.
+    charts = {name: {fmt: artifact.read_chart(name, fmt) for fmt in formats} for name in CHART_TITLES}
+    if all(data is not None for by_fmt in charts.values() for data in by_fmt.values()):
+        return charts
+    charts = render_cluster_charts(artifact.results, artifact.profiles, formats)
+    for name, by_fmt in charts.items():
+        for fmt, data in by_fmt.items():
+            artifact.write_chart(name, fmt, data)
+    return charts
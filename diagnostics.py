@@ -0,0 +1,238 @@
+# Instrumentasi kinerja dasbor: waktu, memori, dan status cache setiap tahap
+# serta setiap rerun Streamlit. Catatan disimpan per sesi untuk panel
+# diagnostik dan ditulis ke berkas JSON Lines untuk dianalisis di luar aplikasi.
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_LOG_DIR = "diagnostics_log"
+LOG_FILENAME = "diagnostik.jsonl"
+# Berkas log diputar (diganti nama menjadi .1) setelah melewati ukuran ini.
+MAX_LOG_BYTES = 20 * 1024 * 1024
+MAX_SESSION_EVENTS = 2000
+RERUN_STAGE = "rerun"
+
+_local = threading.local()
+
+
+def _rss_mb():
+    # Memori resident proses saat ini; /proc hanya ada di Linux.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss dalam KB di Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class DiagnosticsLog:
+    # Satu penulis untuk seluruh sesi; setiap rerun ditulis sekaligus di akhir.
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, max_bytes=MAX_LOG_BYTES):
+        self.path = os.path.join(log_dir, LOG_FILENAME)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def write(self, events):
+        if not events:
+            return
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def read_bytes(self):
+        with self._lock:
+            if not os.path.exists(self.path):
+                return b""
+            with open(self.path, "rb") as f:
+                return f.read()
+
+    def clear(self):
+        with self._lock:
+            for path in (self.path, self.path + ".1"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class StageRecord:
+    def __init__(self, name, cached=False, rows=None):
+        self.name = name
+        # Tahap ber-cache dianggap "hit" kecuali badan fungsinya ikut berjalan.
+        self.cache = "hit" if cached else None
+        self.rows = rows
+
+
+class RerunTrace:
+    def __init__(self, log, session_id, rerun_no, session_events, started=None):
+        self.log = log
+        self.session_id = session_id
+        self.rerun_no = rerun_no
+        self.session_events = session_events
+        self.events = []
+        self.started = time.perf_counter() if started is None else started
+        self.rss_start = _rss_mb()
+        self.context = {}
+
+    def _event(self, stage, seconds, rss_before, peak_before, cache=None, rows=None):
+        rss_after, peak_after = _rss_mb(), _peak_rss_mb()
+        return {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "session": self.session_id,
+            "rerun": self.rerun_no,
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "cache": cache,
+            "rows": rows,
+            "rss_mb": None if rss_after is None else round(rss_after, 1),
+            "rss_delta_mb": None if rss_after is None or rss_before is None else round(rss_after - rss_before, 1),
+            "peak_rss_mb": None if peak_after is None else round(peak_after, 1),
+            "peak_growth_mb": None if peak_after is None or peak_before is None else round(peak_after - peak_before, 1),
+        }
+
+    @contextmanager
+    def stage(self, name, cached=False, rows=None):
+        record = StageRecord(name, cached, rows)
+        rss_before, peak_before = _rss_mb(), _peak_rss_mb()
+        stack = _stage_stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            self.events.append(self._event(name, seconds, rss_before, peak_before, record.cache, record.rows))
+
+    def finish(self):
+        seconds = time.perf_counter() - self.started
+        event = self._event(RERUN_STAGE, seconds, self.rss_start, None)
+        event["stages"] = len(self.events)
+        self.events.append(event)
+        for e in self.events:
+            e.update(self.context)
+        self.session_events.extend(self.events)
+        self.log.write(self.events)
+        return event
+
+
+def _stage_stack():
+    if not hasattr(_local, "stages"):
+        _local.stages = []
+    return _local.stages
+
+
+def new_session_events():
+    return deque(maxlen=MAX_SESSION_EVENTS)
+
+
+def begin_rerun(log, session_id, rerun_no, session_events, started=None):
+    # started: time.perf_counter() di awal skrip, agar waktu sebelum sesi siap ikut terhitung.
+    _local.trace = RerunTrace(log, session_id, rerun_no, session_events, started)
+    _local.stages = []
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def set_rerun_context(**context):
+    # Misalnya halaman dan menu yang sedang dibuka; ditambahkan ke semua catatan rerun ini.
+    trace = current_trace()
+    if trace is not None:
+        trace.context.update(context)
+
+
+def finish_rerun(**context):
+    trace = current_trace()
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.context.update(context)
+    return trace.finish()
+
+
+@contextmanager
+def stage(name, cached=False, rows=None):
+    # Di luar rerun yang dilacak (misalnya CLI) tahap tetap berjalan tanpa dicatat.
+    trace = current_trace()
+    if trace is None:
+        yield StageRecord(name, cached, rows)
+        return
+    with trace.stage(name, cached, rows) as record:
+        yield record
+
+
+def mark_cache_miss():
+    # Dipanggil di awal badan fungsi ber-cache: badan hanya berjalan saat cache miss.
+    stack = _stage_stack()
+    if stack:
+        stack[-1].cache = "miss"
+
+
+def instrumented(name, cached=False):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, cached=cached):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_rerun(**context):
+    # Membungkus fungsi halaman: rerun dicatat walau halaman berhenti lewat st.rerun().
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_rerun(**context)
+        return wrapper
+    return decorator
+
+
+# --- RINGKASAN UNTUK PANEL ---
+
+def events_frame(events):
+    return pd.DataFrame(list(events))
+
+
+def summarize_stages(events):
+    df = events_frame(events)
+    if df.empty:
+        return df
+    grouped = df.groupby("stage", sort=False)
+    summary = grouped.agg(
+        **{"Jumlah": ("seconds", "size"),
+           "Total (s)": ("seconds", "sum"),
+           "Rata-rata (s)": ("seconds", "mean"),
+           "Maksimum (s)": ("seconds", "max"),
+           "Pertumbuhan Puncak RSS (MB)": ("peak_growth_mb", "max")}
+    )
+    cache = df["cache"].fillna("")
+    summary["Cache Hit"] = (cache == "hit").groupby(df["stage"]).sum()
+    summary["Cache Miss"] = (cache == "miss").groupby(df["stage"]).sum()
+    return summary.sort_values("Total (s)", ascending=False).reset_index().rename(columns={"stage": "Tahap"})
@@ -0,0 +1,159 @@
+# Ekspor hasil klasterisasi lengkap (data siswa + Klaster + deskripsi), profil
+# klaster, dan peta deskripsi ke Excel, CSV, atau Parquet. Tabel ditulis per
+# potongan baris sehingga ekspor 100 ribu siswa lebih tidak pernah menyusun
+# seluruh berkas (atau salinan tabel berisi deskripsi) di memori.
+import io
+import re
+import zipfile
+
+import pandas as pd
+
+from pipeline import profile_clusters
+
+TABLE_EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+# Per ekstensi berkas hasil ekspor.
+TABLE_EXPORT_MIME = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "zip": "application/zip",
+}
+EXPORT_CHUNK_ROWS = 10000
+DESCRIPTION_COLUMN = "Deskripsi Klaster"
+RESULTS_SHEET = "Hasil Klasterisasi"
+PROFILES_SHEET = "Profil Klaster"
+DESCRIPTIONS_SHEET = "Deskripsi Klaster"
+# Nama berkas di dalam ZIP untuk ekspor CSV/Parquet.
+RESULTS_NAME = "hasil_klasterisasi"
+PROFILES_NAME = "profil_klaster"
+DESCRIPTIONS_NAME = "deskripsi_klaster"
+
+
+def export_filename(version, fmt):
+    name = f"hasil_klasterisasi_{version or 'sesi'}"
+    return f"{name}.xlsx" if fmt == "xlsx" else f"{name}_{fmt}.zip"
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _with_description(chunk, descriptions):
+    # Deskripsi ditambahkan per potongan; tabel dasar yang dipakai bersama tidak disalin.
+    return chunk.assign(**{DESCRIPTION_COLUMN: chunk["Klaster"].map(descriptions)})
+
+
+def _profiles_frame(df_final, profiles):
+    profiles = profile_clusters(df_final) if profiles is None else profiles
+    return profiles.reset_index()
+
+
+def _descriptions_frame(descriptions):
+    return pd.DataFrame(sorted(descriptions.items(), key=lambda item: str(item[0])),
+                        columns=["Klaster", DESCRIPTION_COLUMN])
+
+
+def _cell_values(chunk):
+    # Sel kosong (NaN/NA) menjadi None agar openpyxl menulis sel kosong.
+    values = chunk.astype(object)
+    return values.where(values.notna(), None).itertuples(index=False, name=None)
+
+
+def _sheet_title(text):
+    return re.sub(r"[\[\]:*?/\\]", "-", str(text))[:31]
+
+
+def _append_frame(sheet, frame):
+    sheet.append(list(map(str, frame.columns)))
+    for row in _cell_values(frame):
+        sheet.append(row)
+
+
+def write_excel(df_final, profiles, descriptions, fileobj, chunk_rows=EXPORT_CHUNK_ROWS, progress=None):
+    # Buku kerja write-only: baris langsung dialirkan ke berkas sementara openpyxl,
+    # tidak ada objek sel yang tertahan untuk seluruh tabel.
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(RESULTS_SHEET)
+    sheet.append(list(map(str, df_final.columns)) + [DESCRIPTION_COLUMN])
+    done = 0
+    for chunk in _chunks(df_final, chunk_rows):
+        for row in _cell_values(_with_description(chunk, descriptions)):
+            sheet.append(row)
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(df_final))
+    profiles = profile_clusters(df_final) if profiles is None else profiles
+    _append_frame(workbook.create_sheet(PROFILES_SHEET), profiles.reset_index())
+    for cluster_id, profile in profiles.iterrows():
+        # Satu lembar per klaster: statistik klaster ke bawah, diikuti deskripsinya.
+        cluster_sheet = workbook.create_sheet(_sheet_title(f"Klaster {cluster_id}"))
+        _append_frame(cluster_sheet, pd.DataFrame({"Statistik": profile.index, "Nilai": profile.to_numpy()}))
+        cluster_sheet.append([])
+        cluster_sheet.append([DESCRIPTION_COLUMN, descriptions.get(cluster_id, "Deskripsi klaster tidak tersedia.")])
+    _append_frame(workbook.create_sheet(DESCRIPTIONS_SHEET), _descriptions_frame(descriptions))
+    workbook.save(fileobj)
+    return len(df_final)
+
+
+def _write_csv_entry(archive, name, frame):
+    with archive.open(f"{name}.csv", "w", force_zip64=True) as entry:
+        entry.write(frame.to_csv(index=False).encode("utf-8"))
+
+
+def write_csv_bundle(df_final, profiles, descriptions, fileobj, chunk_rows=EXPORT_CHUNK_ROWS, progress=None):
+    # ZIP berisi hasil, profil, dan deskripsi; hasil ditulis per potongan langsung ke entri ZIP.
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f"{RESULTS_NAME}.csv", "w", force_zip64=True) as entry:
+            text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+            done = 0
+            for chunk in _chunks(df_final, chunk_rows):
+                _with_description(chunk, descriptions).to_csv(text, index=False, header=done == 0)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, len(df_final))
+            text.flush()
+            text.detach()
+        _write_csv_entry(archive, PROFILES_NAME, _profiles_frame(df_final, profiles))
+        _write_csv_entry(archive, DESCRIPTIONS_NAME, _descriptions_frame(descriptions))
+    return len(df_final)
+
+
+def _write_parquet_entry(archive, name, frame):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    with archive.open(f"{name}.parquet", "w", force_zip64=True) as entry:
+        pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), entry)
+
+
+def write_parquet_bundle(df_final, profiles, descriptions, fileobj, chunk_rows=EXPORT_CHUNK_ROWS, progress=None):
+    # Setiap potongan menjadi satu row group; skema diambil dari potongan pertama.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as archive:
+        with archive.open(f"{RESULTS_NAME}.parquet", "w", force_zip64=True) as entry:
+            writer = None
+            done = 0
+            try:
+                for chunk in _chunks(df_final, chunk_rows):
+                    table = pa.Table.from_pandas(_with_description(chunk, descriptions), preserve_index=False,
+                                                 schema=None if writer is None else writer.schema)
+                    if writer is None:
+                        writer = pq.ParquetWriter(entry, table.schema)
+                    writer.write_table(table)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(done, len(df_final))
+            finally:
+                if writer is not None:
+                    writer.close()
+        _write_parquet_entry(archive, PROFILES_NAME, _profiles_frame(df_final, profiles))
+        _write_parquet_entry(archive, DESCRIPTIONS_NAME, _descriptions_frame(descriptions))
+    return len(df_final)
+
+
+def export_results(df_final, profiles, descriptions, fmt, fileobj, chunk_rows=EXPORT_CHUNK_ROWS, progress=None):
+    # progress(baris_selesai, total) dipanggil per potongan baris.
+    writers = {"xlsx": write_excel, "csv": write_csv_bundle, "parquet": write_parquet_bundle}
+    if fmt not in writers:
+        raise ValueError(f"Format ekspor '{fmt}' tidak dikenal. Pilihan: {', '.join(TABLE_EXPORT_FORMATS)}.")
+    return writers[fmt](df_final, profiles, descriptions or {}, fileobj, chunk_rows=chunk_rows, progress=progress)
@@ -0,0 +1,128 @@
+# Pengatur kapasitas komputasi untuk seluruh server: jumlah worker klasterisasi
+# dari semua sesi dibatasi, permintaan berlebih mengantre secara adil antar
+# sesi, dan pembacaan interaktif (penampil dasbor) didahulukan serta selalu
+# mendapat jatah yang tidak dipakai pekerjaan latar belakang.
+import itertools
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Jatah worker yang tidak pernah dipakai pekerjaan latar belakang.
+RESERVED_INTERACTIVE = 1
+WAIT_POLL_SECONDS = 0.5
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_local = threading.local()
+
+
+class _Ticket:
+    def __init__(self, workers, owner, priority, turn, seq):
+        self.workers = workers
+        self.owner = owner
+        self.priority = priority
+        self.turn = turn
+        self.seq = seq
+        self.granted = 0
+
+    def sort_key(self):
+        # Interaktif dulu; antar sesi bergiliran (sesi yang paling jarang dilayani lebih dulu); lalu urutan datang.
+        return self.priority, self.turn, self.seq
+
+
+class ComputeGovernor:
+    def __init__(self, max_workers=None, reserved_interactive=RESERVED_INTERACTIVE):
+        self.max_workers = max(int(max_workers or os.cpu_count() or 1), 1)
+        self.background_limit = max(self.max_workers - reserved_interactive, 1)
+        # Pada server satu inti pun pembacaan interaktif tetap punya jatah di samping pekerjaan latar belakang.
+        self.capacity = max(self.max_workers, self.background_limit + reserved_interactive)
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._in_use = 0
+        self._background_in_use = 0
+        self._served = defaultdict(int)
+        self._seq = itertools.count()
+
+    def _available(self, ticket):
+        free = self.capacity - self._in_use
+        if ticket.priority == BACKGROUND:
+            free = min(free, self.background_limit - self._background_in_use)
+        return min(free, ticket.workers)
+
+    def _next(self):
+        return min(self._waiting, key=_Ticket.sort_key) if self._waiting else None
+
+    def _grant_ready(self):
+        # Hanya kepala antrean yang boleh jalan, agar permintaan besar tidak terus disalip yang kecil.
+        # Pengecualian: permintaan interaktif tidak menunggu di belakang pekerjaan latar belakang.
+        granted = False
+        while self._waiting:
+            ticket = self._next()
+            workers = self._available(ticket)
+            if workers < 1:
+                break
+            self._waiting.remove(ticket)
+            ticket.granted = workers
+            self._in_use += workers
+            if ticket.priority == BACKGROUND:
+                self._background_in_use += workers
+            self._served[ticket.owner] += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slots(self, workers=1, owner=None, interactive=False, check=None, on_wait=None):
+        # Menunggu sampai ada worker bebas; yang dihasilkan adalah jumlah worker yang boleh
+        # dipakai (bisa kurang dari yang diminta). check() dipanggil selama menunggu dan
+        # boleh melempar pengecualian (misalnya pembatalan) untuk keluar dari antrean.
+        held = getattr(_local, "granted", 0)
+        if held:
+            # Permintaan bersarang pada thread yang sudah memegang jatah (misalnya pembacaan
+            # yang memanggil pembacaan lain) memakai jatah itu; menunggu lagi bisa buntu.
+            yield held
+            return
+        priority = INTERACTIVE if interactive else BACKGROUND
+        with self._cond:
+            ticket = _Ticket(max(int(workers), 1), owner, priority, self._served[owner], next(self._seq))
+            self._waiting.append(ticket)
+            self._grant_ready()
+            try:
+                while not ticket.granted:
+                    if on_wait is not None:
+                        on_wait(sorted(self._waiting, key=_Ticket.sort_key).index(ticket) + 1)
+                    if check is not None:
+                        check()
+                    self._cond.wait(WAIT_POLL_SECONDS)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                else:
+                    self._release(ticket)
+                self._grant_ready()
+                raise
+        _local.granted = ticket.granted
+        try:
+            yield ticket.granted
+        finally:
+            _local.granted = 0
+            with self._cond:
+                self._release(ticket)
+                self._grant_ready()
+
+    def _release(self, ticket):
+        self._in_use -= ticket.granted
+        if ticket.priority == BACKGROUND:
+            self._background_in_use -= ticket.granted
+        ticket.granted = 0
+
+    def status(self):
+        with self._cond:
+            return {
+                "Worker Maksimum": self.max_workers,
+                "Batas Latar Belakang": self.background_limit,
+                "Worker Terpakai": self._in_use,
+                "Worker Latar Belakang": self._background_in_use,
+                "Antrean": len(self._waiting),
+            }
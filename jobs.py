@@ -0,0 +1,318 @@
+# Pekerjaan latar belakang untuk dasbor: klasterisasi, sweep K, stabilitas, serta
+# ekspor laporan massal dan hasil klasterisasi dijalankan di thread terpisah
+# sehingga skrip Streamlit tidak tertahan. Setiap pekerjaan memiliki ID,
+# progres, dan dapat dibatalkan; hasilnya diterbitkan ke penyimpanan bersama
+# (registri model, cache analisis, atau berkas di disk) sehingga sesi lain ikut
+# dapat memakainya.
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pipeline import (NUMERIC_COLS, CATEGORICAL_COLS, preprocess_frame, describe_clusters, profile_clusters,
+                      carry_over_labels, warm_start_kprototypes, with_labels)
+from registry import ModelRegistry
+from analysis import cached_fit, sweep_k, cluster_by_group, bootstrap_stability
+from kproto_native import BinaryKPrototypes
+from reports import export_student_reports
+from exports import export_results
+from governor import ComputeGovernor
+
+# Thread pekerjaan hanya menunggu dan mengoordinasi; jumlah worker komputasi dibatasi ComputeGovernor.
+MAX_JOB_THREADS = 16
+# Pekerjaan yang sudah selesai disimpan untuk ditampilkan; yang terlama dibuang lebih dulu.
+MAX_FINISHED_JOBS = 50
+
+WAITING = "menunggu"
+RUNNING = "berjalan"
+DONE = "selesai"
+FAILED = "gagal"
+CANCELLED = "dibatalkan"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, label, key=None, owner=None, workers=1):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.label = label
+        self.key = key
+        self.owner = owner
+        # Diminta saat dikirim; diganti jumlah yang diberikan governor saat mulai berjalan.
+        self.workers = workers
+        self.status = WAITING
+        self.fraction = 0.0
+        self.message = "Menunggu giliran..."
+        self.details = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started = None
+        self.finished = None
+        self.cleanup = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, fraction=None, message=None, **details):
+        # Dipanggil dari dalam pekerjaan; sekaligus titik pembatalan.
+        self.check_cancelled()
+        with self._lock:
+            if fraction is not None:
+                self.fraction = min(max(float(fraction), 0.0), 1.0)
+            if message is not None:
+                self.message = message
+            self.details.update(details)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "ID": self.id,
+                "Jenis": self.kind,
+                "Keterangan": self.label,
+                "Status": self.status,
+                "Sesi": self.owner,
+                "Worker": self.workers,
+                "Progres": self.fraction,
+                "Pesan": self.error if self.status == FAILED else self.message,
+                "Durasi (s)": round(self.elapsed(), 1),
+                "Dibuat": self.created_at.strftime("%H:%M:%S"),
+            }
+
+
+class JobManager:
+    # Satu pengelola untuk seluruh sesi (st.cache_resource). key: pekerjaan dengan
+    # kunci sama yang belum selesai tidak dijalankan dua kali; pengirim kedua
+    # mendapat pekerjaan yang sudah ada. owner (ID sesi) dipakai governor untuk
+    # menggilir antrean antar sesi.
+    def __init__(self, governor=None, max_threads=MAX_JOB_THREADS, max_finished=MAX_FINISHED_JOBS):
+        self.governor = governor or ComputeGovernor()
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="pekerjaan")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, label, func, *args, key=None, cleanup=None, owner=None, workers=1, **kwargs):
+        # func(job, *args, **kwargs) menjalankan pekerjaan dan melapor lewat job.report;
+        # job.workers berisi jumlah worker yang boleh dipakainya.
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.done:
+                        return job
+            job = Job(kind, label, key, owner, workers)
+            job.cleanup = cleanup
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        def on_wait(position):
+            job.report(message=f"Menunggu worker komputasi (antrean ke-{position})...")
+
+        try:
+            with self.governor.slots(job.workers, job.owner, check=job.check_cancelled, on_wait=on_wait) as granted:
+                job.workers = granted
+                job.started = time.perf_counter()
+                job.status = RUNNING
+                job.message = "Berjalan..."
+                job.result = func(job, *args, **kwargs)
+        except JobCancelled:
+            job.status = CANCELLED
+            job.message = "Dibatalkan oleh pengguna."
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        else:
+            job.fraction = 1.0
+            job.message = "Selesai."
+            job.status = DONE
+        finally:
+            job.finished = time.perf_counter()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            job = self._jobs.pop(job_id)
+            if job.cleanup is not None:
+                job.cleanup(job.result)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def jobs(self, kind=None):
+        with self._lock:
+            return [job for job in reversed(self._jobs.values()) if kind is None or job.kind == kind]
+
+
+# --- PEKERJAAN DASBOR ---
+
+def _fit_reporter(job, start=0.0, end=0.9):
+    # Restart ke-i dari n_init mengisi bagian progres yang sama besar.
+    def progress(init_no, n_init, itr, cost):
+        span = (end - start) / max(n_init, 1)
+        message = f"Restart {init_no + 1} dari {n_init}"
+        if itr:
+            message += f", iterasi {itr}, biaya {cost:,.2f}"
+        job.report(start + span * init_no, message, restart=init_no + 1, n_init=n_init, iterasi=itr, biaya=cost)
+    return progress
+
+
+def clustering_job(job, df_original, df_preprocessed, n_clusters, fingerprint, scaler,
+                   registry_dir, previous_version=None):
+    # Klasterisasi penuh, atau inkremental bila previous_version diberikan; hasil
+    # diterbitkan sebagai versi model baru di registri.
+    n_changed = None
+    note = ""
+    if previous_version is None:
+        df_clustered, model, categorical_indices = cached_fit(df_preprocessed, n_clusters, fingerprint,
+                                                              progress=_fit_reporter(job), n_jobs=job.workers)
+    else:
+        artifact = ModelRegistry(registry_dir).load(previous_version)
+        job.report(0.02, f"Menyiapkan data dengan normalisasi versi {previous_version}...")
+        df_preprocessed, _, _ = preprocess_frame(df_original, scaler=artifact.scaler)
+        initial_labels = carry_over_labels(df_original, artifact.results)
+        df_clustered, model, categorical_indices = warm_start_kprototypes(
+            df_preprocessed, artifact.model, initial_labels, progress=_fit_reporter(job, 0.05)
+        )
+        scaler = artifact.scaler
+        n_clusters = model._enc_cluster_centroids[0].shape[0]
+        n_changed = int((initial_labels < 0).sum())
+        # Kunci cache deskripsi dan profil dibedakan dari hasil klasterisasi penuh pada data yang sama.
+        fingerprint = f"{fingerprint}:inkremental:{previous_version}"
+        note = f"Inkremental dari {previous_version}"
+    job.report(0.9, "Menyusun profil dan deskripsi klaster...")
+    df_final = with_labels(df_original, df_clustered["Klaster"])
+    profiles = profile_clusters(df_final)
+    descriptions = describe_clusters(df_clustered, n_clusters, NUMERIC_COLS, CATEGORICAL_COLS, profiles)
+    job.report(0.95, "Menyimpan versi model...")
+    version = None
+    publish_error = None
+    try:
+        version = ModelRegistry(registry_dir).publish(df_final, model, scaler, categorical_indices, descriptions,
+                                                      fingerprint, note=note, profiles=profiles)
+    except Exception as e:
+        publish_error = str(e)
+    return {
+        "df_final": df_final, "df_clustered": df_clustered, "model": model, "scaler": scaler,
+        "categorical_indices": categorical_indices, "n_clusters": n_clusters, "fingerprint": fingerprint,
+        "profiles": profiles, "descriptions": descriptions, "version": version, "publish_error": publish_error,
+        "previous_version": previous_version, "n_changed": n_changed,
+    }
+
+
+def sweep_job(job, df_preprocessed, k_values, fingerprint):
+    k_values = list(k_values)
+    job.report(0.0, f"Menjalankan K = {k_values[0]} hingga {k_values[-1]}...")
+
+    def progress(done, total, k):
+        job.report(done / total, f"K = {k} selesai ({done} dari {total})", k_selesai=done)
+
+    # Model setiap K masuk ke cache analisis bersama, sehingga memilih K sesudahnya tanpa fit ulang.
+    return sweep_k(df_preprocessed, k_values, max_workers=job.workers, fingerprint=fingerprint, progress=progress)
+
+
+def partition_job(job, df_original, df_preprocessed, group_col, n_clusters, k_per_group):
+    job.report(0.0, f"Mengklasterisasi setiap {group_col}...")
+
+    def progress(done, total, group):
+        job.report(done / total, f"{group_col} {group} selesai ({done} dari {total})", kelompok_selesai=done)
+
+    # Pool per kelompok memakai worker sebanyak yang diberikan governor, bukan semua inti.
+    return cluster_by_group(df_original, df_preprocessed, group_col, n_clusters, k_per_group,
+                            max_workers=job.workers, progress=progress)
+
+
+def stability_job(job, registry_dir, version, n_resamples):
+    # Hasil disimpan di folder versi model; pekerjaan berikutnya untuk versi dan jumlah
+    # replikasi yang sama langsung membaca berkas itu.
+    artifact = ModelRegistry(registry_dir).load(version)
+    report = artifact.read_stability(n_resamples)
+    if report is not None:
+        return report
+    job.report(0.0, "Menyiapkan data versi model...")
+    df_preprocessed, _, _ = preprocess_frame(artifact.results, scaler=artifact.scaler)
+    model = artifact.model
+
+    def progress(done, total):
+        job.report(done / total, f"Replikasi {done} dari {total} selesai")
+
+    report = bootstrap_stability(
+        df_preprocessed, artifact.results["Klaster"].to_numpy(), artifact.n_clusters, n_resamples,
+        n_init=getattr(model, "n_init", 10), engine="native" if isinstance(model, BinaryKPrototypes) else "kmodes",
+        max_workers=job.workers, progress=progress
+    )
+    artifact.write_stability(n_resamples, report)
+    return report
+
+
+def _write_export(filename, write):
+    # Berkas ditulis ke folder sementara milik pekerjaan; folder dihapus saat pekerjaan dibuang.
+    if filename in ("", ".", "..") or os.path.basename(filename) != filename:
+        raise ValueError(f"Nama berkas laporan '{filename}' tidak valid.")
+    out_dir = tempfile.mkdtemp(prefix="laporan_")
+    path = os.path.join(out_dir, filename)
+    try:
+        with open(path, "wb") as output:
+            write(output)
+    except BaseException:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        raise
+    return path
+
+
+def export_job(job, df_students, cluster_desc_map, fmt, filename):
+    def progress(done, total):
+        job.report(done / total, f"{done} dari {total} laporan siswa dibuat")
+
+    return _write_export(filename, lambda output: export_student_reports(
+        df_students, cluster_desc_map, fmt, output, max_workers=job.workers, progress=progress))
+
+
+def results_export_job(job, df_final, profiles, descriptions, fmt, filename):
+    def progress(done, total):
+        job.report(done / total, f"{done:,} dari {total:,} baris ditulis".replace(",", "."))
+
+    return _write_export(filename, lambda output: export_results(df_final, profiles, descriptions, fmt, output,
+                                                                 progress=progress))
+
+
+def remove_export(path):
+    if path:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
@@ -0,0 +1,138 @@
+# Uji beban layanan prediksi (scoring_service.py) di localhost: sejumlah klien
+# bersamaan mengirim permintaan tunggal atau batch, lalu latensi (p50/p95/p99),
+# throughput, dan rata-rata penggabungan batch di server dilaporkan.
+#
+#   python scoring_service.py &
+#   python loadtest_scoring.py --concurrency 16 --requests 2000
+#   python loadtest_scoring.py --batch-size 100 --requests 200
+import argparse
+import http.client
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+from benchmark import generate_students
+
+DEFAULT_URL = "http://127.0.0.1:8502"
+DEFAULT_RESULTS_PATH = os.path.join("benchmark_results", "hasil_uji_beban.jsonl")
+SAMPLE_STUDENTS = 5000
+
+
+class ScoringClient:
+    # Satu koneksi keep-alive per klien.
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+
+    def request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        headers = {} if data is None else {"Content-Type": "application/json"}
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        payload = json.loads(response.read() or b"null")
+        return response.status, payload
+
+    def close(self):
+        self.connection.close()
+
+
+def sample_records(n_rows=SAMPLE_STUDENTS, random_state=0):
+    # Siswa sintetis dengan sebaran yang sama seperti benchmark.py, dalam bentuk JSON polos.
+    return json.loads(generate_students(n_rows, random_state).to_json(orient="records"))
+
+
+def _client_worker(url, n_requests, records, batch_size, offset):
+    client = ScoringClient(url)
+    latencies = []
+    errors = 0
+    path = "/prediksi" if batch_size == 0 else "/prediksi/batch"
+    try:
+        for i in range(n_requests):
+            start = (offset + i * max(batch_size, 1)) % len(records)
+            body = records[start] if batch_size == 0 else {"siswa": records[start:start + batch_size] or records[:batch_size]}
+            t0 = time.perf_counter()
+            status, _ = client.request("POST", path, body)
+            latencies.append(time.perf_counter() - t0)
+            errors += status != 200
+    finally:
+        client.close()
+    return latencies, errors
+
+
+def run_load_test(url=DEFAULT_URL, n_requests=1000, concurrency=8, batch_size=0, warmup=20):
+    records = sample_records()
+    client = ScoringClient(url)
+    try:
+        # Pemanasan: koneksi, jalur kode, dan cache sudah siap sebelum pengukuran.
+        for i in range(warmup):
+            client.request("POST", "/prediksi", records[i % len(records)])
+        _, before = client.request("GET", "/status")
+    finally:
+        client.close()
+
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_client_worker, url, n, records, batch_size, i * 997)
+                   for i, n in enumerate(per_client) if n]
+        outcomes = [future.result() for future in futures]
+    elapsed = time.perf_counter() - t0
+
+    client = ScoringClient(url)
+    try:
+        _, after = client.request("GET", "/status")
+    finally:
+        client.close()
+    latencies = np.array([latency for latencies, _ in outcomes for latency in latencies]) * 1000
+    n_done = len(latencies)
+    n_batches = after["batch"] - before["batch"]
+    return {
+        "waktu": datetime.now().isoformat(timespec="seconds"),
+        "versi_model": after["versi_model"],
+        "mode": "tunggal" if batch_size == 0 else f"batch {batch_size}",
+        "klien": concurrency,
+        "permintaan": n_done,
+        "galat": int(sum(errors for _, errors in outcomes)),
+        "durasi_s": round(elapsed, 3),
+        "permintaan_per_s": round(n_done / elapsed, 1),
+        "siswa_per_s": round(n_done * max(batch_size, 1) / elapsed, 1),
+        "latensi_rata_ms": round(float(latencies.mean()), 2),
+        "latensi_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "latensi_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "latensi_p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "permintaan_per_batch_server": round((after["permintaan"] - before["permintaan"]) / n_batches, 2) if n_batches else 0.0,
+    }
+
+
+def save_result(result, path=DEFAULT_RESULTS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban layanan prediksi klaster di localhost.")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Alamat layanan (default: {DEFAULT_URL}).")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="Jumlah permintaan total (default: 1000).")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Jumlah klien bersamaan (default: 8).")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Siswa per permintaan ke /prediksi/batch; 0 = permintaan tunggal ke /prediksi (default: 0).")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH,
+                        help=f"Berkas JSON Lines tempat hasil ditambahkan (default: {DEFAULT_RESULTS_PATH}).")
+    args = parser.parse_args(argv)
+
+    result = run_load_test(args.url, args.requests, args.concurrency, args.batch_size)
+    for key, value in result.items():
+        print(f"{key:>30}: {value}")
+    save_result(result, args.results)
+    print(f"Hasil ditambahkan ke '{args.results}'.")
+    return 1 if result["galat"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,882 @@
+# Mesin klasterisasi tanpa UI: dapat dipakai oleh app.py maupun dijalankan
+# langsung dari command line (misalnya lewat cron) tanpa Streamlit.
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from kproto_native import BinaryKPrototypes, MiniBatchKPrototypes, is_binary_schema
+from registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+
+# --- KONSTANTA GLOBAL ---
+ID_COLS = ["No", "Nama", "JK", "Kelas"]
+# Kolom identitas dengan sedikit nilai berbeda disimpan sebagai kategori.
+CATEGORY_COLS = ["JK", "Kelas"]
+NUMERIC_COLS = ["Rata Rata Nilai Akademik", "Kehadiran"]
+CATEGORICAL_COLS = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian",
+                    "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
+ALL_FEATURES_FOR_CLUSTERING = NUMERIC_COLS + CATEGORICAL_COLS
+
+DEFAULT_OUTPUT_DIR = "hasil_klasterisasi"
+MODEL_FILENAME = "pipeline.joblib"
+RESULT_FILENAME = "hasil_klasterisasi.xlsx"
+# "auto": mesin native bila semua fitur kategorikal biner, selain itu kmodes.
+ENGINES = ("auto", "native", "kmodes")
+RESULT_CSV_FILENAME = "hasil_klasterisasi.csv"
+DEFAULT_CHUNKSIZE = 50000
+DEFAULT_SNAPSHOT_DIR = "snapshot_data"
+PROFILE_LABELS = {
+    "Rata Rata Nilai Akademik": "Nilai",
+    "Kehadiran": "Kehadiran",
+    **{col: f"Partisipasi {col.replace('Ekstrakurikuler ', '')}" for col in CATEGORICAL_COLS},
+}
+# Klasterisasi inkremental berawal dari prototipe lama sehingga cukup beberapa iterasi.
+WARM_START_MAX_ITER = 10
+# Dinaikkan bila cara pembacaan berubah agar snapshot lama tidak dipakai lagi.
+SNAPSHOT_FORMAT = 2
+# Teks "0".."255" untuk flag uint8: matriks fitur berisi rujukan ke objek yang sama, bukan string baru per sel.
+_FLAG_TEXT = np.array([str(i) for i in range(256)], dtype=object)
+
+
+# --- PRAPROSES ---
+
+def _compact_flags(values):
+    # Flag 0/1 disimpan sebagai uint8 (1 byte per siswa); nilai selain bilangan bulat 0-255 tetap teks.
+    filled = values.fillna(0)
+    numeric = pd.to_numeric(filled, errors="coerce")
+    if numeric.notna().all() and numeric.between(0, 255).all() and (numeric == numeric.round()).all():
+        return numeric.astype(np.uint8)
+    return filled.astype(str)
+
+
+def missing_value_warning(col, fill_value):
+    return f"Nilai kosong pada kolom '{col}' diisi dengan rata-rata: {fill_value:.2f}."
+
+
+def preprocess_frame(df, scaler=None):
+    # Tabel asli tidak disalin maupun diubah (dapat dipakai bersama banyak sesi);
+    # hanya kolom non-identitas yang diambil untuk diproses.
+    columns = [str(col).strip() for col in df.columns]
+    missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in columns]
+    if missing_cols:
+        raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data Anda: {', '.join(missing_cols)}. Harap periksa file Excel Anda dan pastikan nama kolom sudah benar.")
+    warnings = []
+    df_clean_for_clustering = df.drop(columns=[col for col, name in zip(df.columns, columns) if name in ID_COLS])
+    df_clean_for_clustering.columns = [name for name in columns if name not in ID_COLS]
+    for col in CATEGORICAL_COLS:
+        df_clean_for_clustering[col] = _compact_flags(df_clean_for_clustering[col])
+    for i, col in enumerate(NUMERIC_COLS):
+        if df_clean_for_clustering[col].isnull().any():
+            # Saat transform data baru, nilai kosong diisi rata-rata data latih.
+            mean_val = df_clean_for_clustering[col].mean() if scaler is None else scaler.mean_[i]
+            df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(mean_val)
+            warnings.append(missing_value_warning(col, mean_val))
+    if scaler is None:
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler()
+        df_clean_for_clustering[NUMERIC_COLS] = scaler.fit_transform(df_clean_for_clustering[NUMERIC_COLS])
+    else:
+        df_clean_for_clustering[NUMERIC_COLS] = scaler.transform(df_clean_for_clustering[NUMERIC_COLS])
+    return df_clean_for_clustering, scaler, warnings
+
+
+def feature_matrix(df_preprocessed):
+    # Matriks objek untuk k-prototypes dibentuk saat dibutuhkan: numerik float64 dan
+    # kategori sebagai teks "0"/"1", sama seperti yang dikenal model tersimpan.
+    X = np.empty((len(df_preprocessed), len(ALL_FEATURES_FOR_CLUSTERING)), dtype=object)
+    for j, col in enumerate(ALL_FEATURES_FOR_CLUSTERING):
+        values = df_preprocessed[col]
+        if col in NUMERIC_COLS:
+            X[:, j] = values.to_numpy(dtype=np.float64)
+        elif values.dtype == np.uint8:
+            X[:, j] = _FLAG_TEXT[values.to_numpy()]
+        else:
+            X[:, j] = values.astype(str).to_numpy()
+    categorical_feature_indices = [ALL_FEATURES_FOR_CLUSTERING.index(c) for c in CATEGORICAL_COLS]
+    return X, categorical_feature_indices
+
+
+def with_labels(df, labels, column="Klaster"):
+    # Tabel baru yang memakai ulang kolom df tanpa menyalinnya, ditambah satu kolom label;
+    # dipakai agar setiap sesi hanya menyimpan labelnya sendiri di atas tabel dasar bersama.
+    data = {col: df[col] for col in df.columns if col != column}
+    data[column] = pd.Series(np.asarray(labels), index=df.index)
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+# --- PEMBACAAN DATA ---
+
+def _parse_number(value):
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    text = str(value).strip().replace(",", ".")
+    if not text:
+        return np.nan
+    try:
+        # Kehadiran kadang ditulis sebagai teks persen ("94.55%"); disimpan sebagai pecahan 0-1.
+        if text.endswith("%"):
+            return float(text[:-1]) / 100.0
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _float_column(values):
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter((_parse_number(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def _integer_column(values):
+    # Kolom bilangan bulat: int64 bila lengkap, Int64 bila ada sel kosong.
+    floats = _float_column(values)
+    present = ~np.isnan(floats)
+    if not np.array_equal(floats[present], np.round(floats[present])):
+        return floats
+    if present.all():
+        return floats.astype(np.int64)
+    return pd.Series(floats).astype("Int64").array
+
+
+def _text_column(values):
+    return np.array([None if pd.isna(v) else str(v).strip() for v in values], dtype=object)
+
+
+def _flag_column(values):
+    # Flag 0/1: uint8 bila lengkap, UInt8 bila ada sel kosong; selain itu seperti bilangan bulat biasa.
+    column = _integer_column(values)
+    if isinstance(column, np.ndarray) and column.dtype == np.int64:
+        if column.size == 0 or (column.min() >= 0 and column.max() <= 255):
+            return column.astype(np.uint8)
+    elif isinstance(column, pd.api.extensions.ExtensionArray):
+        present = column[~column.isna()]
+        if len(present) == 0 or (present.min() >= 0 and present.max() <= 255):
+            return column.astype("UInt8")
+    return column
+
+
+def _typed_column(name, values):
+    # Tipe ringkas: flag uint8, JK/Kelas kategori. Nilai dan kehadiran tetap float64:
+    # pembulatan float32 mengubah masukan StandardScaler sehingga label klaster ikut bergeser.
+    if name in NUMERIC_COLS:
+        return _float_column(values)
+    if name in CATEGORICAL_COLS:
+        return _flag_column(values)
+    if name == "No":
+        try:
+            return _integer_column(np.asarray(values, dtype=np.float64))
+        except (TypeError, ValueError):
+            return _text_column(values)
+    if name in CATEGORY_COLS:
+        return pd.Categorical(_text_column(values))
+    if name in ID_COLS:
+        return _text_column(values)
+    return pd.Series(list(values)).infer_objects().to_numpy()
+
+
+def coerce_student_types(df):
+    # Menyamakan tipe kolom data dari CSV/Parquet dengan hasil read_workbook_columns.
+    df = df.copy()
+    df.columns = [str(col).strip() for col in df.columns]
+    for col in ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = _typed_column(col, df[col].tolist())
+    return df
+
+
+def _header_names(header):
+    return [str(col).strip() if col is not None else f"Unnamed: {j}" for j, col in enumerate(header)]
+
+
+def _rows_to_frame(columns, rows):
+    # Baris ditransposisi sekali (zip) lalu setiap kolom langsung diberi tipe akhirnya.
+    width = len(columns)
+    rows = [row[:width] + (None,) * (width - len(row)) for row in rows]
+    values = list(zip(*rows)) if rows else [()] * width
+    return pd.DataFrame({col: _typed_column(col, list(vals)) for col, vals in zip(columns, values)},
+                        columns=columns)
+
+
+def _iter_workbook_rows(source):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield header
+        for row in rows:
+            if row is None or all(value is None for value in row):
+                continue
+            yield row
+    finally:
+        workbook.close()
+
+
+def read_workbook_columns(source):
+    # Lembar pertama dibaca dalam mode read-only (streaming) tanpa inferensi tipe per sel oleh pandas.
+    rows = _iter_workbook_rows(source)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    return _rows_to_frame(_header_names(header), list(rows))
+
+
+def iter_student_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    # Membaca berkas data siswa per potongan agar memori tetap terbatas.
+    suffix = str(path).lower()
+    if suffix.endswith(".csv"):
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield coerce_student_types(chunk)
+        return
+    if suffix.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize):
+            yield coerce_student_types(batch.to_pandas())
+        return
+    rows = _iter_workbook_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header_names(header)
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= chunksize:
+            yield _rows_to_frame(columns, buffer)
+            buffer = []
+    if buffer:
+        yield _rows_to_frame(columns, buffer)
+
+
+def snapshot_path(snapshot_dir, digest):
+    return os.path.join(snapshot_dir, f"{digest}-v{SNAPSHOT_FORMAT}.arrow")
+
+
+def write_snapshot(df, path):
+    # Snapshot Arrow IPC tanpa kompresi agar dapat dibaca ulang lewat memory-map.
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _arrow_safe(df):
+    # Kolom objek bertipe campuran (mis. angka dan teks) disimpan sebagai teks.
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            kinds = {type(v) for v in df[col] if not pd.isna(v)}
+            if len(kinds) > 1:
+                df[col] = _text_column(df[col].tolist())
+    return df
+
+
+def read_workbook_snapshot(source, digest, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    # Workbook yang sama (hash byte sama) cukup diurai sekali; berikutnya snapshot di-memory-map.
+    cached_path = snapshot_path(snapshot_dir, digest)
+    if os.path.exists(cached_path):
+        return read_snapshot(cached_path)
+    df = read_workbook_columns(source)
+    try:
+        write_snapshot(df, cached_path)
+    except (OSError, ImportError, ValueError, TypeError):
+        # Snapshot hanya percepatan; kegagalan menulisnya tidak menggagalkan pembacaan.
+        pass
+    return df
+
+
+def read_student_file(path, snapshot_dir=None):
+    suffix = str(path).lower()
+    if suffix.endswith(".csv"):
+        return coerce_student_types(pd.read_csv(path))
+    if suffix.endswith(".parquet"):
+        return coerce_student_types(pd.read_parquet(path, memory_map=True))
+    if not snapshot_dir:
+        return read_workbook_columns(path)
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return read_workbook_snapshot(path, digest, snapshot_dir)
+
+
+def _fingerprint_digest(columns):
+    digest = hashlib.sha1()
+    digest.update("|".join(map(str, columns)).encode("utf-8"))
+    return digest
+
+
+def _update_fingerprint(digest, df):
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+
+def data_fingerprint(df):
+    # Sidik jari isi data (nilai, kolom, dan indeks) untuk kunci cache model.
+    digest = _fingerprint_digest(df.columns)
+    _update_fingerprint(digest, df)
+    return digest.hexdigest()
+
+
+# --- KLASTERISASI ---
+
+def make_kprototypes(X, categorical_feature_indices, n_clusters, n_init=10, random_state=42, n_jobs=-1, engine="auto"):
+    if engine not in ENGINES:
+        raise ValueError(f"Mesin klasterisasi '{engine}' tidak dikenal. Pilihan: {', '.join(ENGINES)}.")
+    if engine == "auto":
+        engine = "native" if is_binary_schema(X, categorical_feature_indices) else "kmodes"
+    if engine == "native":
+        model_class = BinaryKPrototypes
+    else:
+        # kmodes (dan sklearn di baliknya) baru dimuat saat mesin ini benar-benar dipakai.
+        from kmodes.kprototypes import KPrototypes as model_class
+    return model_class(n_clusters=n_clusters, init='Huang', n_init=n_init, verbose=0,
+                       random_state=random_state, n_jobs=n_jobs)
+
+
+def _fit_progress(kproto, progress):
+    # Hanya mesin native yang melaporkan restart dan iterasi; kmodes berjalan tanpa kait progres.
+    if progress is not None and isinstance(kproto, BinaryKPrototypes):
+        return {"progress": progress}
+    if progress is not None:
+        progress(0, 1, 0, None)
+    return {}
+
+
+def fit_kprototypes(df_preprocessed, n_clusters, n_init=10, random_state=42, n_jobs=-1, engine="auto", progress=None):
+    X, categorical_feature_indices = feature_matrix(df_preprocessed)
+    kproto = make_kprototypes(X, categorical_feature_indices, n_clusters, n_init=n_init,
+                              random_state=random_state, n_jobs=n_jobs, engine=engine)
+    clusters = kproto.fit_predict(X, categorical=categorical_feature_indices, **_fit_progress(kproto, progress))
+    return with_labels(df_preprocessed, clusters), kproto, categorical_feature_indices
+
+
+# --- KLASTERISASI INKREMENTAL ---
+
+def row_hashes(df):
+    # Hash isi fitur per baris; tipe disamakan dulu agar uint8, int64, Int64, dan float tidak dianggap berubah.
+    frame = df[NUMERIC_COLS + CATEGORICAL_COLS].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _student_keys(values):
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().sum() == values.notna().sum():
+        return numeric.astype(np.float64).to_numpy()
+    return values.astype(str).to_numpy()
+
+
+def carry_over_labels(df_original, previous_results):
+    # Label periode sebelumnya untuk siswa dengan No dan isi baris yang sama;
+    # -1 untuk siswa baru, siswa yang datanya berubah, atau No ganda.
+    labels = np.full(len(df_original), -1, dtype=np.int64)
+    if "No" not in df_original.columns or "No" not in previous_results.columns:
+        return labels
+    previous = pd.DataFrame({"No": _student_keys(previous_results["No"]), "hash": row_hashes(previous_results),
+                             "Klaster": previous_results["Klaster"].to_numpy()})
+    previous = previous.drop_duplicates("No", keep=False)
+    current = pd.DataFrame({"No": _student_keys(df_original["No"]), "hash": row_hashes(df_original)})
+    matched = current.merge(previous, on=["No", "hash"], how="left")
+    unchanged = (matched["Klaster"].notna() & ~current["No"].duplicated(keep=False)).to_numpy()
+    labels[unchanged] = matched.loc[unchanged, "Klaster"].to_numpy(dtype=np.int64)
+    return labels
+
+
+def _encode_for_kmodes(X, categorical_feature_indices, decoded_centroids):
+    # kmodes mengodekan kategori menurut urutan nilai unik pada data yang sedang di-fit.
+    encoded = np.empty(decoded_centroids.shape, dtype=np.int64)
+    for j, col in enumerate(categorical_feature_indices):
+        mapping = {value: code for code, value in enumerate(np.unique(X[:, col]))}
+        for ik, value in enumerate(decoded_centroids[:, j]):
+            if value not in mapping:
+                raise ValueError("Data baru tidak memuat semua nilai kategori pada prototipe lama; lakukan klasterisasi penuh.")
+            encoded[ik, j] = mapping[value]
+    return encoded
+
+
+def warm_start_kprototypes(df_preprocessed, previous_model, initial_labels=None,
+                           max_iter=WARM_START_MAX_ITER, random_state=42, progress=None):
+    # Prototipe dan gamma model sebelumnya menjadi titik awal satu run (tanpa 10 inisialisasi Huang),
+    # sehingga klaster ke-i tetap bermakna sama dari periode ke periode.
+    X, categorical_feature_indices = feature_matrix(df_preprocessed)
+    c_num, c_cat = previous_model._enc_cluster_centroids
+    n_clusters = c_num.shape[0]
+    if isinstance(previous_model, BinaryKPrototypes) and is_binary_schema(X, categorical_feature_indices):
+        kproto = BinaryKPrototypes(n_clusters=n_clusters, max_iter=max_iter, n_init=1,
+                                   gamma=previous_model.gamma, random_state=random_state)
+        kproto.warm_start(X, categorical_feature_indices, [c_num, c_cat],
+                          init_labels=initial_labels, enc_map=previous_model._enc_map, progress=progress)
+    else:
+        from kmodes.kprototypes import KPrototypes
+        decoded = previous_model.cluster_centroids_[:, c_num.shape[1]:]
+        init = [np.asarray(c_num, dtype=np.float64), _encode_for_kmodes(X, categorical_feature_indices, decoded)]
+        kproto = KPrototypes(n_clusters=n_clusters, init=init, n_init=1, max_iter=max_iter,
+                             gamma=previous_model.gamma, verbose=0, random_state=random_state)
+        kproto.fit(X, categorical=categorical_feature_indices, **_fit_progress(kproto, progress))
+    return with_labels(df_preprocessed, kproto.predict(X, categorical=categorical_feature_indices)), kproto, categorical_feature_indices
+
+
+def format_kehadiran(value):
+    # Kehadiran disimpan sebagai pecahan 0-1; data lama dalam skala 0-100 ditampilkan apa adanya.
+    return f"{value:.2%}" if value <= 1.0 else f"{value:.2f}%"
+
+
+def _describe_cluster(avg_scaled_values, ekskul_aktif_modes, avg_original_values=None):
+    desc = ""
+    if avg_scaled_values["Rata Rata Nilai Akademik"] > 0.75:
+        desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat tinggi. "
+    elif avg_scaled_values["Rata Rata Nilai Akademik"] > 0.25:
+        desc += "Siswa di klaster ini memiliki nilai akademik cenderung di atas rata-rata. "
+    elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.75:
+        desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat rendah. "
+    elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.25:
+        desc += "Siswa di klaster ini memiliki nilai akademik cenderung di bawah rata-rata. "
+    else:
+        desc += "Siswa di klaster ini memiliki nilai akademik cenderung rata-rata. "
+    if avg_scaled_values["Kehadiran"] > 0.75:
+        desc += "Tingkat kehadiran cenderung sangat tinggi. "
+    elif avg_scaled_values["Kehadiran"] > 0.25:
+        desc += "Tingkat kehadiran cenderung di atas rata-rata. "
+    elif avg_scaled_values["Kehadiran"] < -0.75:
+        desc += "Tingkat kehadiran cenderung sangat rendah. "
+    elif avg_scaled_values["Kehadiran"] < -0.25:
+        desc += "Tingkat kehadiran cenderung di bawah rata-rata. "
+    else:
+        desc += "Tingkat kehadiran cenderung rata-rata. "
+    if ekskul_aktif_modes:
+        desc += f"Siswa di klaster ini aktif dalam ekstrakurikuler: {', '.join([c.replace('Ekstrakurikuler ', '') for c in ekskul_aktif_modes])}."
+    else:
+        desc += "Siswa di klaster ini kurang aktif dalam kegiatan ekstrakurikuler."
+    if avg_original_values is not None:
+        desc += (f" Rata-rata nilai akademik {avg_original_values['Rata Rata Nilai Akademik']:.2f} "
+                 f"dengan kehadiran rata-rata {format_kehadiran(avg_original_values['Kehadiran'])}.")
+    return desc
+
+
+def prototype_costs(model, X, categorical_feature_indices):
+    # Matriks jarak K-Prototypes (n_siswa, n_klaster) dalam satu operasi
+    # tervektorisasi, berlaku untuk model kmodes maupun mesin native.
+    c_num, c_cat = model._enc_cluster_centroids
+    numeric = [i for i in range(X.shape[1]) if i not in categorical_feature_indices]
+    Xnum = np.asarray(X[:, numeric], dtype=np.float64)
+    if hasattr(model, "_encode"):
+        codes = model._encode(X[:, categorical_feature_indices])
+    else:
+        # Nilai kategori yang tidak dikenal mendapat kode -1 (selalu tidak cocok), sama seperti kmodes.
+        codes = np.column_stack([
+            pd.Series(X[:, col]).map(model._enc_map[j]).fillna(-1).to_numpy(dtype=np.int64)
+            for j, col in enumerate(categorical_feature_indices)
+        ])
+    num_costs = ((c_num[None, :, :] - Xnum[:, None, :]) ** 2).sum(axis=2)
+    cat_costs = (codes[:, None, :] != np.asarray(c_cat, dtype=np.int64)[None, :, :]).sum(axis=2)
+    return num_costs + model.gamma * cat_costs
+
+
+def assign_clusters(model, X, categorical_feature_indices):
+    costs = prototype_costs(model, X, categorical_feature_indices)
+    labels = costs.argmin(axis=1)
+    return labels, costs[np.arange(len(labels)), labels]
+
+
+def predict_clusters(df, model, scaler, categorical_feature_indices):
+    # Klaster dan jarak ke prototipe untuk siswa baru dengan normalisasi data latih.
+    df_preprocessed, _, warnings = preprocess_frame(df, scaler=scaler)
+    X, _ = feature_matrix(df_preprocessed)
+    labels, distances = assign_clusters(model, X, categorical_feature_indices)
+    return labels, distances, warnings
+
+
+def describe_clusters(df_clustered, n_clusters, numeric_cols, categorical_cols, profiles=None):
+    # Rata-rata dan modus semua klaster dari satu groupby, bukan filter per klaster.
+    grouped = df_clustered.groupby("Klaster")
+    avg_scaled = grouped[numeric_cols].mean()
+    modes = {}
+    for col in categorical_cols:
+        # Kolom kategori diurutkan sehingga idxmax memilih nilai terkecil saat seri, sama seperti mode().
+        counts = df_clustered.groupby(["Klaster", col]).size().unstack(fill_value=0).sort_index(axis=1)
+        modes[col] = counts.idxmax(axis=1)
+    cluster_characteristics_map = {}
+    for i in range(n_clusters):
+        if i not in avg_scaled.index:
+            continue
+        ekskul_aktif_modes = [col_name for col_name in categorical_cols if str(modes[col_name][i]) == '1']
+        avg_original_values = None
+        if profiles is not None and i in profiles.index:
+            avg_original_values = {col: profiles.loc[i, f"{PROFILE_LABELS[col]} Rata-rata"] for col in NUMERIC_COLS}
+        cluster_characteristics_map[i] = _describe_cluster(avg_scaled.loc[i], ekskul_aktif_modes, avg_original_values)
+    return cluster_characteristics_map
+
+
+def describe_cluster_stats(numeric_sums, flag_counts, counts, scaler=None):
+    # Versi describe_clusters dari statistik agregat (jumlah nilai ter-skala dan
+    # jumlah flag = 1 per klaster) untuk mode streaming. Modus '1' hanya bila
+    # peserta lebih banyak dari yang tidak, sama seperti mode() pada data utuh.
+    cluster_characteristics_map = {}
+    for i in range(len(counts)):
+        if not counts[i]:
+            continue
+        avg_scaled_array = numeric_sums[i] / counts[i]
+        avg_scaled_values = dict(zip(NUMERIC_COLS, avg_scaled_array))
+        avg_original_values = None
+        if scaler is not None:
+            avg_original_values = dict(zip(NUMERIC_COLS, avg_scaled_array * scaler.scale_ + scaler.mean_))
+        ekskul_aktif_modes = [col for j, col in enumerate(CATEGORICAL_COLS) if flag_counts[i, j] > counts[i] - flag_counts[i, j]]
+        cluster_characteristics_map[i] = _describe_cluster(avg_scaled_values, ekskul_aktif_modes, avg_original_values)
+    return cluster_characteristics_map
+
+
+# --- PROFIL KLASTER ---
+
+def _p25(values):
+    return values.quantile(0.25)
+
+
+def _p75(values):
+    return values.quantile(0.75)
+
+
+PROFILE_STATS = (("Rata-rata", "mean"), ("Median", "median"), ("P25", _p25), ("P75", _p75),
+                 ("Min", "min"), ("Maks", "max"), ("Simpangan Baku", "std"))
+
+
+def _profile_frame(df_final):
+    frame = df_final[NUMERIC_COLS].apply(pd.to_numeric, errors="coerce")
+    for col in CATEGORICAL_COLS:
+        frame[col] = (pd.to_numeric(df_final[col], errors="coerce") == 1).astype(np.float64)
+    frame["Klaster"] = df_final["Klaster"].to_numpy()
+    return frame
+
+
+def profile_clusters(df_final):
+    # Statistik setiap klaster dalam satuan asli (nilai, kehadiran, dan tingkat
+    # partisipasi ekstrakurikuler) dihitung dalam satu groupby atas hasil akhir.
+    return _aggregate_profiles(_profile_frame(df_final))
+
+
+def _aggregate_profiles(frame):
+    aggregations = {"Jumlah Siswa": (NUMERIC_COLS[0], "size")}
+    for col in NUMERIC_COLS:
+        label = PROFILE_LABELS[col]
+        for stat_name, func in PROFILE_STATS:
+            aggregations[f"{label} {stat_name}"] = (col, func)
+    for col in CATEGORICAL_COLS:
+        aggregations[f"{PROFILE_LABELS[col]}"] = (col, "mean")
+    profiles = frame.groupby("Klaster").agg(**aggregations)
+    profiles.insert(1, "Persentase Siswa", profiles["Jumlah Siswa"] / profiles["Jumlah Siswa"].sum())
+    return profiles
+
+
+class ProfileAccumulator:
+    # profile_clusters untuk mode streaming. Dari setiap potongan hanya kolom profil yang
+    # disimpan (dua angka dan empat flag per siswa, sekitar 20 byte), sehingga median dan
+    # persentil tetap eksak tanpa menahan seluruh tabel di memori.
+    def __init__(self):
+        self._frames = []
+
+    def update(self, df_final):
+        frame = _profile_frame(df_final.rename(columns=lambda col: str(col).strip()))
+        self._frames.append(frame.astype({col: bool for col in CATEGORICAL_COLS}))
+
+    def profiles(self):
+        profiles = _aggregate_profiles(pd.concat(self._frames, ignore_index=True))
+        profiles.index = profiles.index.astype(np.int64)
+        return profiles
+
+
+class ClusteringPipeline:
+    def __init__(self, n_clusters=3, n_init=10, random_state=42, n_jobs=-1, engine="auto"):
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.engine = engine
+        self.scaler_ = None
+        self.model_ = None
+        self.categorical_indices_ = None
+        self.labels_ = None
+        self.descriptions_ = {}
+        self.profiles_ = None
+        self.warnings_ = []
+        self.fingerprint_ = None
+
+    def fit(self, df):
+        df_preprocessed, self.scaler_, self.warnings_ = preprocess_frame(df)
+        df_clustered, self.model_, self.categorical_indices_ = fit_kprototypes(
+            df_preprocessed, self.n_clusters, n_init=self.n_init,
+            random_state=self.random_state, n_jobs=self.n_jobs, engine=self.engine
+        )
+        return self._finish_fit(df, df_clustered)
+
+    def fit_incremental(self, df, previous_model, previous_scaler, previous_results):
+        # Skala z-score periode sebelumnya dipakai ulang agar prototipe lama tetap sebanding.
+        df_preprocessed, _, self.warnings_ = preprocess_frame(df, scaler=previous_scaler)
+        self.scaler_ = previous_scaler
+        initial_labels = carry_over_labels(df, previous_results)
+        df_clustered, self.model_, self.categorical_indices_ = warm_start_kprototypes(
+            df_preprocessed, previous_model, initial_labels, random_state=self.random_state
+        )
+        self.n_clusters = self.model_._enc_cluster_centroids[0].shape[0]
+        self.n_changed_ = int((initial_labels < 0).sum())
+        return self._finish_fit(df, df_clustered)
+
+    def _finish_fit(self, df, df_clustered):
+        self.labels_ = df_clustered["Klaster"].to_numpy()
+        df_final = self.result_frame(df)
+        df_final.columns = [str(col).strip() for col in df_final.columns]
+        self.profiles_ = profile_clusters(df_final)
+        self.descriptions_ = describe_clusters(df_clustered, self.n_clusters, NUMERIC_COLS, CATEGORICAL_COLS, self.profiles_)
+        return self
+
+    def fit_stream(self, path, chunksize=DEFAULT_CHUNKSIZE, n_epochs=1, output_path=None):
+        # Mode mini-batch: berkas dibaca per potongan sebanyak (2 + n_epochs) kali
+        # sehingga memori hanya sebesar satu potongan ditambah label per siswa.
+        from sklearn.preprocessing import StandardScaler
+        self.scaler_ = StandardScaler()
+        n_rows = 0
+        for chunk in iter_student_chunks(path, chunksize):
+            chunk.columns = [str(col).strip() for col in chunk.columns]
+            missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in chunk.columns]
+            if missing_cols:
+                raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data Anda: {', '.join(missing_cols)}. Harap periksa file Excel Anda dan pastikan nama kolom sudah benar.")
+            self.scaler_.partial_fit(chunk[NUMERIC_COLS])
+            n_rows += len(chunk)
+        if n_rows == 0:
+            raise ValueError("Berkas data tidak berisi baris siswa.")
+
+        self.model_ = MiniBatchKPrototypes(n_clusters=self.n_clusters, n_init=min(self.n_init, 3),
+                                           random_state=self.random_state, batch_size=chunksize)
+        warnings = set()
+        for _ in range(n_epochs):
+            for chunk in iter_student_chunks(path, chunksize):
+                df_preprocessed, _, chunk_warnings = preprocess_frame(chunk, scaler=self.scaler_)
+                warnings.update(chunk_warnings)
+                X, self.categorical_indices_ = feature_matrix(df_preprocessed)
+                self.model_.partial_fit(X, categorical=self.categorical_indices_)
+        self.warnings_ = sorted(warnings)
+
+        n_clusters = self.model_._enc_cluster_centroids[0].shape[0]
+        labels = np.empty(n_rows, dtype=np.uint16)
+        counts = np.zeros(n_clusters)
+        numeric_sums = np.zeros((n_clusters, len(NUMERIC_COLS)))
+        flag_counts = np.zeros((n_clusters, len(CATEGORICAL_COLS)))
+        cost = 0.0
+        position = 0
+        digest = None
+        profiles = ProfileAccumulator()
+        for chunk_no, chunk in enumerate(iter_student_chunks(path, chunksize)):
+            df_preprocessed, _, _ = preprocess_frame(chunk, scaler=self.scaler_)
+            # Indeks berlanjut antar potongan sehingga sidik jarinya sama dengan data_fingerprint atas seluruh tabel.
+            df_preprocessed.index = pd.RangeIndex(position, position + len(df_preprocessed))
+            if digest is None:
+                digest = _fingerprint_digest(df_preprocessed.columns)
+            _update_fingerprint(digest, df_preprocessed)
+            X, _ = feature_matrix(df_preprocessed)
+            chunk_labels, point_costs = self.model_.predict_with_cost(X, categorical=self.categorical_indices_)
+            labels[position:position + len(chunk_labels)] = chunk_labels
+            position += len(chunk_labels)
+            cost += float(point_costs.sum())
+            counts += np.bincount(chunk_labels, minlength=n_clusters)
+            for j, col in enumerate(NUMERIC_COLS):
+                numeric_sums[:, j] += np.bincount(chunk_labels, weights=df_preprocessed[col].to_numpy(), minlength=n_clusters)
+            for j, col in enumerate(CATEGORICAL_COLS):
+                flags = df_preprocessed[col].astype(float).to_numpy() > 0
+                flag_counts[:, j] += np.bincount(chunk_labels, weights=flags, minlength=n_clusters)
+            chunk = chunk.copy()
+            chunk["Klaster"] = chunk_labels
+            profiles.update(chunk)
+            if output_path is not None:
+                chunk.to_csv(output_path, mode="w" if chunk_no == 0 else "a", header=chunk_no == 0, index=False)
+        self.model_.cost_ = cost
+        self.labels_ = labels
+        self.fingerprint_ = digest.hexdigest()
+        self.profiles_ = profiles.profiles()
+        self.descriptions_ = describe_cluster_stats(numeric_sums, flag_counts, counts, self.scaler_)
+        return self
+
+    def _check_fitted(self):
+        if self.model_ is None:
+            raise ValueError("Pipeline belum dilatih. Jalankan fit() terlebih dahulu.")
+
+    def transform(self, df):
+        self._check_fitted()
+        df_preprocessed, _, _ = preprocess_frame(df, scaler=self.scaler_)
+        return df_preprocessed
+
+    def predict(self, df):
+        return self.predict_with_distance(df)[0]
+
+    def predict_with_distance(self, df):
+        X, categorical_feature_indices = feature_matrix(self.transform(df))
+        return assign_clusters(self.model_, X, categorical_feature_indices)
+
+    def fit_predict(self, df):
+        return self.fit(df).labels_
+
+    def describe(self):
+        self._check_fitted()
+        return dict(self.descriptions_)
+
+    def result_frame(self, df_original, labels=None):
+        self._check_fitted()
+        return with_labels(df_original, self.labels_ if labels is None else labels)
+
+    def save(self, path):
+        # Disimpan sebagai dict biasa, bukan objek pipeline: saat dijalankan sebagai
+        # `python pipeline.py` kelas ini bernama __main__.ClusteringPipeline dan
+        # pickle-nya tidak dapat dibuka dari modul lain.
+        import joblib
+        self._check_fitted()
+        joblib.dump({
+            "params": {"n_clusters": self.n_clusters, "n_init": self.n_init, "random_state": self.random_state,
+                       "n_jobs": self.n_jobs, "engine": self.engine},
+            "model": self.model_,
+            "scaler": self.scaler_,
+            "categorical_indices": self.categorical_indices_,
+            "labels": self.labels_,
+            "descriptions": self.descriptions_,
+            "profiles": self.profiles_,
+            "warnings": self.warnings_,
+        }, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        bundle = joblib.load(path)
+        pipeline = cls(**bundle["params"])
+        pipeline.model_ = bundle["model"]
+        pipeline.scaler_ = bundle["scaler"]
+        pipeline.categorical_indices_ = bundle["categorical_indices"]
+        pipeline.labels_ = bundle["labels"]
+        pipeline.descriptions_ = bundle["descriptions"]
+        pipeline.profiles_ = bundle["profiles"]
+        pipeline.warnings_ = bundle["warnings"]
+        return pipeline
+
+
+# --- PENYIMPANAN HASIL UNTUK DASBOR ---
+
+def save_results(pipeline, df_original, output_dir=DEFAULT_OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    df_final = pipeline.result_frame(df_original)
+    df_final["Deskripsi Klaster"] = df_final["Klaster"].map(pipeline.descriptions_)
+    df_final.to_excel(os.path.join(output_dir, RESULT_FILENAME), index=False)
+    pipeline.save(os.path.join(output_dir, MODEL_FILENAME))
+    return df_final
+
+
+# --- COMMAND LINE ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasterisasi K-Prototypes data siswa tanpa antarmuka Streamlit.")
+    parser.add_argument("input", help="Berkas data siswa (.xlsx, .csv, atau .parquet).")
+    parser.add_argument("-k", "--n-clusters", type=int, default=3, help="Jumlah klaster (default: 3).")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Folder keluaran hasil dan model (default: {DEFAULT_OUTPUT_DIR}).")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Jumlah proses untuk K-Prototypes (default: -1).")
+    parser.add_argument("--engine", choices=ENGINES, default="auto",
+                        help="Mesin klasterisasi: auto (native bila fitur kategorikal biner), native, atau kmodes.")
+    parser.add_argument("--minibatch", action="store_true",
+                        help="Mode mini-batch: baca data per potongan dengan memori terbatas (untuk data gabungan beberapa madrasah).")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Jumlah baris per potongan pada mode mini-batch (default: {DEFAULT_CHUNKSIZE}).")
+    parser.add_argument("--epochs", type=int, default=1, help="Jumlah putaran data pada mode mini-batch (default: 1).")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_DIR,
+                        help=f"Folder registri model yang dibaca dasbor (default: {DEFAULT_REGISTRY_DIR}).")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR,
+                        help=f"Folder snapshot Arrow untuk workbook yang sudah pernah dibaca (default: {DEFAULT_SNAPSHOT_DIR}; kosongkan untuk menonaktifkan).")
+    parser.add_argument("--compare", action="store_true",
+                        help="Mode mini-batch: bandingkan biaya dan label dengan klasterisasi penuh pada data yang sama.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Lanjutkan dari versi model aktif di registri (prototipe, skala, dan nomor klaster lama); -k diabaikan.")
+    args = parser.parse_args(argv)
+
+    if args.minibatch:
+        return _main_minibatch(parser, args)
+
+    df_original = read_student_file(args.input, args.snapshot_dir)
+    pipeline = ClusteringPipeline(n_clusters=args.n_clusters, n_jobs=args.n_jobs, engine=args.engine)
+    registry = ModelRegistry(args.registry)
+    note = "CLI"
+    try:
+        previous = registry.load() if args.incremental else None
+        if args.incremental and previous is None:
+            print("Peringatan: registri belum memiliki versi model; klasterisasi penuh dijalankan.")
+        if previous is not None:
+            pipeline.fit_incremental(df_original, previous.model, previous.scaler, previous.results)
+            note = f"CLI inkremental dari {previous.version}"
+            print(f"Melanjutkan dari versi {previous.version}: {pipeline.n_changed_} dari {len(df_original)} siswa baru atau berubah, "
+                  f"konvergen dalam {pipeline.model_.n_iter_} iterasi.")
+        else:
+            pipeline.fit(df_original)
+    except Exception as e:
+        parser.exit(1, f"Gagal: {e}\n")
+    for message in pipeline.warnings_:
+        print(f"Peringatan: {message}")
+    df_final = save_results(pipeline, df_original, args.output_dir)
+    version = registry.publish(
+        df_final.drop(columns=["Deskripsi Klaster"]), pipeline.model_, pipeline.scaler_,
+        pipeline.categorical_indices_, pipeline.descriptions_, data_fingerprint(pipeline.transform(df_original)),
+        profiles=pipeline.profiles_, note=note
+    )
+    print(f"Klasterisasi selesai dengan {pipeline.n_clusters} klaster untuk {len(df_final)} siswa.")
+    print(f"Model dipublikasikan ke registri '{args.registry}' sebagai versi {version} (aktif).")
+    for cluster_id, jumlah in df_final["Klaster"].value_counts().sort_index().items():
+        print(f"  Klaster {cluster_id}: {jumlah} siswa")
+    print(f"Hasil disimpan di folder '{args.output_dir}'.")
+    return 0
+
+
+def _main_minibatch(parser, args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    pipeline = ClusteringPipeline(n_clusters=args.n_clusters, n_jobs=args.n_jobs, engine="native")
+    try:
+        pipeline.fit_stream(args.input, chunksize=args.chunksize, n_epochs=args.epochs,
+                            output_path=os.path.join(args.output_dir, RESULT_CSV_FILENAME))
+    except Exception as e:
+        parser.exit(1, f"Gagal: {e}\n")
+    for message in pipeline.warnings_:
+        print(f"Peringatan: {message}")
+    pipeline.save(os.path.join(args.output_dir, MODEL_FILENAME))
+    # Tabel hasil tidak dimuat kembali: registri menyalin CSV yang sudah ditulis per potongan.
+    version = ModelRegistry(args.registry).publish(
+        None, pipeline.model_, pipeline.scaler_, pipeline.categorical_indices_, pipeline.descriptions_,
+        pipeline.fingerprint_, engine="MiniBatchKPrototypes", note="CLI mini-batch", profiles=pipeline.profiles_,
+        results_path=os.path.join(args.output_dir, RESULT_CSV_FILENAME)
+    )
+    labels = pd.Series(pipeline.labels_)
+    print(f"Klasterisasi mini-batch selesai dengan {args.n_clusters} klaster untuk {len(labels)} siswa (biaya {pipeline.model_.cost_:.4f}).")
+    print(f"Model dipublikasikan ke registri '{args.registry}' sebagai versi {version} (aktif).")
+    for cluster_id, jumlah in labels.value_counts().sort_index().items():
+        print(f"  Klaster {cluster_id}: {jumlah} siswa")
+    if args.compare:
+        from analysis import compare_minibatch_with_full
+
+        report = compare_minibatch_with_full(read_student_file(args.input, args.snapshot_dir), pipeline)
+        print("Perbandingan dengan klasterisasi penuh pada data yang sama:")
+        print(f"  Biaya penuh        : {report['full_cost']:.4f}")
+        print(f"  Biaya mini-batch   : {report['minibatch_cost']:.4f} ({report['cost_gap']:+.2%})")
+        print(f"  Adjusted Rand Index: {report['ari']:.4f}")
+    print(f"Hasil disimpan di folder '{args.output_dir}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
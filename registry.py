@@ -0,0 +1,322 @@
+# Registri model di disk: setiap hasil klasterisasi disimpan sebagai versi
+# tersendiri (model, parameter scaler, prototipe, deskripsi, sidik jari data,
+# dan tabel hasil) sehingga dasbor dapat membacanya lintas sesi dan restart
+# tanpa klasterisasi ulang. Tabel hasil juga disalin ke ResultStore (SQLite)
+# untuk kueri dasbor.
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from result_store import ResultStore
+
+DEFAULT_REGISTRY_DIR = "model_registry"
+ACTIVE_FILENAME = "ACTIVE"
+METADATA_FILENAME = "metadata.json"
+MODEL_FILENAME = "model.joblib"
+RESULTS_FILENAME = "hasil.pkl"
+RESULTS_CSV_FILENAME = "hasil.csv"
+RESULTS_CHUNK_ROWS = 50000
+PROFILES_FILENAME = "profil.pkl"
+CHARTS_DIRNAME = "grafik"
+STABILITY_DIRNAME = "stabilitas"
+
+
+def _to_builtin(value):
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    if isinstance(content, bytes):
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+    else:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _csv_cluster_sizes(path, chunksize=RESULTS_CHUNK_ROWS):
+    # Hanya kolom Klaster yang dibaca, per potongan, sehingga tabel besar tidak pernah dimuat utuh.
+    n_rows = 0
+    sizes = pd.Series(dtype=np.int64)
+    for chunk in pd.read_csv(path, usecols=["Klaster"], chunksize=chunksize):
+        sizes = sizes.add(chunk["Klaster"].value_counts(), fill_value=0)
+        n_rows += len(chunk)
+    return n_rows, sizes.astype(np.int64)
+
+
+def _csv_chunks(path, chunksize=RESULTS_CHUNK_ROWS):
+    from pipeline import coerce_student_types
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield coerce_student_types(chunk)
+
+
+class ModelArtifact:
+    # Metadata dibaca langsung; model dan tabel hasil baru dimuat saat diakses.
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = metadata
+        self._bundle = None
+        self._results = None
+        self._profiles = None
+
+    @property
+    def version(self):
+        return self.metadata["version"]
+
+    @property
+    def n_clusters(self):
+        return self.metadata["n_clusters"]
+
+    @property
+    def descriptions(self):
+        return {int(k): v for k, v in self.metadata["descriptions"].items()}
+
+    @property
+    def categorical_indices(self):
+        return self.metadata["categorical_indices"]
+
+    def _load_bundle(self):
+        if self._bundle is None:
+            import joblib
+            self._bundle = joblib.load(os.path.join(self.path, MODEL_FILENAME))
+        return self._bundle
+
+    @property
+    def model(self):
+        return self._load_bundle()["model"]
+
+    @property
+    def scaler(self):
+        return self._load_bundle()["scaler"]
+
+    @property
+    def results(self):
+        if self._results is None:
+            results_file = self.metadata.get("results_file", RESULTS_FILENAME)
+            if results_file == RESULTS_CSV_FILENAME:
+                from pipeline import read_student_file
+
+                self._results = read_student_file(os.path.join(self.path, results_file))
+            else:
+                self._results = pd.read_pickle(os.path.join(self.path, results_file))
+        return self._results
+
+    def iter_results(self, chunk_rows=RESULTS_CHUNK_ROWS):
+        # Tabel hasil per potongan baris; hasil CSV (mini-batch) tidak pernah dimuat utuh.
+        if self._results is None and self.metadata.get("results_file") == RESULTS_CSV_FILENAME:
+            yield from _csv_chunks(os.path.join(self.path, RESULTS_CSV_FILENAME), chunk_rows)
+            return
+        for start in range(0, len(self.results), chunk_rows):
+            yield self.results.iloc[start:start + chunk_rows]
+
+    @property
+    def profiles(self):
+        # Versi lama belum menyimpan profil klaster; pemanggil menghitungnya sendiri.
+        profiles_path = os.path.join(self.path, PROFILES_FILENAME)
+        if self._profiles is None and os.path.exists(profiles_path):
+            self._profiles = pd.read_pickle(profiles_path)
+        return self._profiles
+
+    def _chart_path(self, name, fmt):
+        return os.path.join(self.path, CHARTS_DIRNAME, f"{name}.{fmt}")
+
+    def read_chart(self, name, fmt):
+        chart_path = self._chart_path(name, fmt)
+        if not os.path.exists(chart_path):
+            return None
+        with open(chart_path, "rb") as f:
+            return f.read()
+
+    def write_chart(self, name, fmt, data):
+        # Grafik ditambahkan setelah versi dipublikasikan; ditulis atomik agar
+        # dua sesi yang merender bersamaan tidak menghasilkan berkas setengah jadi.
+        os.makedirs(os.path.join(self.path, CHARTS_DIRNAME), exist_ok=True)
+        _write_atomic(self._chart_path(name, fmt), data)
+
+    def _stability_path(self, n_resamples):
+        return os.path.join(self.path, STABILITY_DIRNAME, f"bootstrap_{n_resamples}.pkl")
+
+    def has_stability(self, n_resamples):
+        return os.path.exists(self._stability_path(n_resamples))
+
+    def read_stability(self, n_resamples):
+        stability_path = self._stability_path(n_resamples)
+        if not os.path.exists(stability_path):
+            return None
+        with open(stability_path, "rb") as f:
+            return pickle.load(f)
+
+    def write_stability(self, n_resamples, report):
+        # Laporan stabilitas mahal dihitung; disimpan per versi dan jumlah replikasi.
+        os.makedirs(os.path.join(self.path, STABILITY_DIRNAME), exist_ok=True)
+        _write_atomic(self._stability_path(n_resamples), pickle.dumps(report))
+
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+
+    def store(self):
+        return ResultStore.for_registry(self.root)
+
+    def _version_path(self, version):
+        return os.path.join(self.root, version)
+
+    def list_versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.root)):
+            metadata_path = os.path.join(self.root, name, METADATA_FILENAME)
+            if name.startswith("v") and os.path.exists(metadata_path):
+                with open(metadata_path, encoding="utf-8") as f:
+                    versions.append(json.load(f))
+        return versions
+
+    def versions_table(self):
+        active = self.active_version()
+        rows = [{
+            "Versi": m["version"],
+            "Aktif": "✔" if m["version"] == active else "",
+            "Dibuat": m["created_at"],
+            "Jumlah Klaster": m["n_clusters"],
+            "Jumlah Siswa": m["n_rows"],
+            "Biaya (Cost)": m["cost"],
+            "Mesin": m["engine"],
+            "Catatan": m.get("note", ""),
+        } for m in self.list_versions()]
+        return pd.DataFrame(rows)
+
+    def active_version(self):
+        active_path = os.path.join(self.root, ACTIVE_FILENAME)
+        if os.path.exists(active_path):
+            with open(active_path, encoding="utf-8") as f:
+                version = f.read().strip()
+            if os.path.exists(os.path.join(self._version_path(version), METADATA_FILENAME)):
+                return version
+        versions = self.list_versions()
+        return versions[-1]["version"] if versions else None
+
+    def set_active(self, version):
+        if not os.path.exists(os.path.join(self._version_path(version), METADATA_FILENAME)):
+            raise ValueError(f"Versi model '{version}' tidak ditemukan di registri.")
+        _write_atomic(os.path.join(self.root, ACTIVE_FILENAME), version)
+        return version
+
+    def rollback(self):
+        versions = [m["version"] for m in self.list_versions()]
+        active = self.active_version()
+        if active not in versions or versions.index(active) == 0:
+            raise ValueError("Tidak ada versi sebelumnya untuk dikembalikan.")
+        return self.set_active(versions[versions.index(active) - 1])
+
+    def load(self, version=None):
+        version = version or self.active_version()
+        if version is None:
+            return None
+        path = self._version_path(version)
+        with open(os.path.join(path, METADATA_FILENAME), encoding="utf-8") as f:
+            return ModelArtifact(path, json.load(f))
+
+    def _claim_version_dir(self):
+        os.makedirs(self.root, exist_ok=True)
+        existing = [int(name[1:]) for name in os.listdir(self.root) if name.startswith("v") and name[1:].isdigit()]
+        number = max(existing, default=0) + 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                # mkdir bersifat atomik: dua operator yang menyimpan bersamaan tidak berebut versi.
+                os.mkdir(self._version_path(version))
+                return version
+            except FileExistsError:
+                number += 1
+
+    def publish(self, df_final, model, scaler, categorical_indices, descriptions, fingerprint,
+                engine=None, note="", activate=True, results_path=None, profiles=None):
+        # results_path: CSV hasil yang sudah ditulis per potongan (mode mini-batch); df_final boleh None.
+        version = self._claim_version_dir()
+        path = self._version_path(version)
+        try:
+            c_num, c_cat = model._enc_cluster_centroids
+            if results_path is None:
+                n_rows, cluster_sizes = len(df_final), df_final["Klaster"].value_counts()
+            else:
+                n_rows, cluster_sizes = _csv_cluster_sizes(results_path)
+            cluster_sizes = cluster_sizes.sort_index()
+            metadata = {
+                "version": version,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "n_clusters": int(c_num.shape[0]),
+                "n_rows": int(n_rows),
+                "cost": float(model.cost_),
+                "gamma": float(model.gamma),
+                "engine": engine or type(model).__name__,
+                "fingerprint": fingerprint,
+                "categorical_indices": list(categorical_indices),
+                "scaler": {"mean": scaler.mean_, "scale": scaler.scale_},
+                "prototypes": {"numeric": c_num, "categorical": model.cluster_centroids_[:, c_num.shape[1]:]},
+                "cluster_sizes": dict(zip(cluster_sizes.index.astype(int), cluster_sizes.astype(int))),
+                "descriptions": descriptions,
+                "note": note,
+                "results_file": RESULTS_FILENAME if results_path is None else RESULTS_CSV_FILENAME,
+            }
+            import joblib
+            joblib.dump({"model": model, "scaler": scaler}, os.path.join(path, MODEL_FILENAME))
+            if results_path is None:
+                df_final.to_pickle(os.path.join(path, RESULTS_FILENAME))
+            else:
+                # Disalin, bukan dirujuk: CSV di folder keluaran ditimpa oleh run berikutnya.
+                shutil.copyfile(results_path, os.path.join(path, RESULTS_CSV_FILENAME))
+            if profiles is not None:
+                profiles.to_pickle(os.path.join(path, PROFILES_FILENAME))
+            # metadata.json ditulis terakhir: versi baru terlihat hanya bila lengkap.
+            _write_atomic(os.path.join(path, METADATA_FILENAME), json.dumps(_to_builtin(metadata), indent=2, ensure_ascii=False))
+            # Salinan yang dapat dikueri dasbor (filter, halaman, agregat) tanpa memuat tabel hasil.
+            self.store().write_version(metadata, df_final if results_path is None else _csv_chunks(results_path),
+                                       descriptions)
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        if activate:
+            self.set_active(version)
+        return version
+
+    def compare(self, version_a, version_b):
+        a, b = self.load(version_a), self.load(version_b)
+        rows = [
+            ("Jumlah Klaster", a.n_clusters, b.n_clusters),
+            ("Jumlah Siswa", a.metadata["n_rows"], b.metadata["n_rows"]),
+            ("Biaya (Cost)", a.metadata["cost"], b.metadata["cost"]),
+            ("Mesin", a.metadata["engine"], b.metadata["engine"]),
+            ("Data sama", "", "Ya" if a.metadata["fingerprint"] == b.metadata["fingerprint"] else "Tidak"),
+        ]
+        for cluster_id in sorted(set(a.metadata["cluster_sizes"]) | set(b.metadata["cluster_sizes"]), key=int):
+            rows.append((f"Ukuran Klaster {cluster_id}",
+                         a.metadata["cluster_sizes"].get(cluster_id, 0),
+                         b.metadata["cluster_sizes"].get(cluster_id, 0)))
+        # Kesepakatan label dihitung pada siswa yang sama (berdasarkan kolom No).
+        if "No" in a.results.columns and "No" in b.results.columns:
+            merged = a.results[["No", "Klaster"]].merge(b.results[["No", "Klaster"]], on="No", suffixes=("_a", "_b"))
+            if len(merged):
+                from sklearn.metrics import adjusted_rand_score
+                rows.append(("Siswa yang sama", "", len(merged)))
+                rows.append(("Adjusted Rand Index", "", round(adjusted_rand_score(merged["Klaster_a"], merged["Klaster_b"]), 4)))
+        return pd.DataFrame(rows, columns=["Aspek", version_a, version_b]).astype({version_a: str, version_b: str})
@@ -0,0 +1,208 @@
+# Laporan PDF profil siswa: satu siswa, atau massal per Kelas/Klaster sebagai
+# satu PDF gabungan maupun ZIP berisi PDF per siswa.
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline import CATEGORICAL_COLS
+
+REPORT_TITLE = "PROFIL SISWA - HASIL KLASTERISASI"
+KETERANGAN_UMUM = (
+    "Laporan ini menyajikan profil detail siswa berdasarkan hasil pengelompokan "
+    "menggunakan Algoritma K-Prototype. Klasterisasi dilakukan berdasarkan "
+    "nilai akademik, kehadiran, dan partisipasi ekstrakurikuler siswa. "
+    "Informasi klaster ini dapat digunakan untuk memahami kebutuhan siswa dan "
+    "merancang strategi pembinaan yang sesuai."
+)
+EXPORT_FILTERS = ("Kelas", "Klaster")
+EXPORT_FORMATS = ("pdf", "zip")
+# Di bawah batas ini pool proses tidak sebanding dengan biaya memulainya.
+MIN_ROWS_FOR_POOL = 200
+DEFAULT_CHUNK_SIZE = 64
+# PDF gabungan dirakit utuh di memori; di atas batas ini ZIP menjadi pilihan bawaan.
+MAX_COMBINED_PDF_ROWS = 500
+MAX_FILENAME_VALUES = 3
+MAX_FILENAME_LENGTH = 120
+
+
+def _latin1(text):
+    # Font inti PDF hanya mendukung Latin-1; karakter lain diganti "?" agar satu nama tidak menggagalkan ekspor.
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def _format_number(value, fmt):
+    try:
+        return format(float(value), fmt)
+    except (TypeError, ValueError):
+        return "-"
+
+
+def student_fields(data_siswa_dict):
+    ekskul_diikuti = []
+    for col in CATEGORICAL_COLS:
+        val = data_siswa_dict.get(col)
+        if val is not None and (val == 1 or str(val).strip() == '1'):
+            ekskul_diikuti.append(col.replace("Ekstrakurikuler ", ""))
+    return {
+        "Nomor Induk": data_siswa_dict.get("No", "-"),
+        "Jenis Kelamin": data_siswa_dict.get("JK", "-"),
+        "Kelas": data_siswa_dict.get("Kelas", "-"),
+        "Rata-rata Nilai Akademik": _format_number(data_siswa_dict.get("Rata Rata Nilai Akademik"), ".2f"),
+        "Persentase Kehadiran": _format_number(data_siswa_dict.get("Kehadiran"), ".2%"),
+        "Ekstrakurikuler yang Diikuti": ", ".join(ekskul_diikuti) if ekskul_diikuti else "Tidak mengikuti ekstrakurikuler",
+    }
+
+
+def _safe_name(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")
+
+
+def student_filename(data_siswa_dict):
+    name = _safe_name(data_siswa_dict.get("Nama", "siswa")) or "siswa"
+    return f"{data_siswa_dict.get('No', '-')}_{name}.pdf"
+
+
+def report_filename(filter_col, values, fmt):
+    # Nilai filter berasal dari data unggahan: dibersihkan seperti nama berkas siswa, dan daftar
+    # yang panjang diringkas agar nama berkas tidak melebihi batas sistem berkas.
+    names = [_safe_name(value) or "kosong" for value in values]
+    label = "_".join(names[:MAX_FILENAME_VALUES])
+    if len(names) > MAX_FILENAME_VALUES:
+        label += f"_dan_{len(names) - MAX_FILENAME_VALUES}_lainnya"
+    name = f"laporan_{_safe_name(filter_col).lower()}_{label}"[:MAX_FILENAME_LENGTH].rstrip("_")
+    return f"{name}.{fmt}"
+
+
+class StudentReportWriter:
+    # Teks statis dan deskripsi tiap klaster disiapkan sekali, lalu dipakai
+    # untuk semua halaman; font inti Helvetica tidak perlu dimuat dari berkas.
+    def __init__(self, cluster_desc_map):
+        self.cluster_desc_map = cluster_desc_map
+        self._keterangan_umum = _latin1(KETERANGAN_UMUM)
+        self._cluster_blocks = {}
+
+    def _cluster_block(self, klaster):
+        if klaster not in self._cluster_blocks:
+            klaster_desc = self.cluster_desc_map.get(klaster, "Deskripsi klaster tidak tersedia.")
+            self._cluster_blocks[klaster] = _latin1(f"Karakteristik Klaster {klaster}: {klaster_desc}")
+        return self._cluster_blocks[klaster]
+
+    def new_document(self):
+        from fpdf import FPDF
+        pdf = FPDF()
+        pdf.set_title(REPORT_TITLE)
+        return pdf
+
+    def add_student(self, pdf, data_siswa_dict):
+        klaster = data_siswa_dict.get("Klaster")
+        try:
+            klaster = int(klaster)
+        except (TypeError, ValueError):
+            pass
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 16)
+        pdf.set_text_color(44, 47, 127)
+        pdf.cell(0, 10, REPORT_TITLE, new_x="LMARGIN", new_y="NEXT", align='C')
+        pdf.ln(10)
+        pdf.set_font("Helvetica", "", 10)
+        pdf.set_text_color(0, 0, 0)
+        pdf.multi_cell(0, 5, self._keterangan_umum, align='J')
+        pdf.ln(5)
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(0, 8, _latin1(f"Nama Siswa: {data_siswa_dict.get('Nama', '-')}"), new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(0, 8, f"Klaster Hasil: {klaster}", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(3)
+        pdf.set_font("Helvetica", "I", 10)
+        pdf.set_text_color(80, 80, 80)
+        pdf.multi_cell(0, 5, self._cluster_block(klaster), align='J')
+        pdf.ln(5)
+        pdf.set_font("Helvetica", "", 10)
+        pdf.set_text_color(0, 0, 0)
+        for key, val in student_fields(data_siswa_dict).items():
+            pdf.cell(0, 7, _latin1(f"{key}: {val}"), new_x="LMARGIN", new_y="NEXT")
+
+    def render(self, data_siswa_dict):
+        pdf = self.new_document()
+        self.add_student(pdf, data_siswa_dict)
+        return bytes(pdf.output())
+
+
+def render_student_pdf(data_siswa_dict, cluster_desc_map):
+    return StudentReportWriter(cluster_desc_map).render(data_siswa_dict)
+
+
+def filter_students(df, column, values):
+    if column not in EXPORT_FILTERS:
+        raise ValueError(f"Filter laporan '{column}' tidak dikenal. Pilihan: {', '.join(EXPORT_FILTERS)}.")
+    return df[df[column].isin(values)]
+
+
+def _render_zip_chunk(records, cluster_desc_map):
+    writer = StudentReportWriter(cluster_desc_map)
+    return [(student_filename(record), writer.render(record)) for record in records]
+
+
+def _chunks(records, chunk_size):
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+
+def write_combined_pdf(records, cluster_desc_map, fileobj, progress=None):
+    # Semua halaman dalam satu dokumen FPDF: font dan sumber daya halaman dipakai bersama.
+    # FPDF merakit seluruh dokumen di memori sebelum ditulis, jadi untuk banyak siswa gunakan write_zip.
+    writer = StudentReportWriter(cluster_desc_map)
+    pdf = writer.new_document()
+    for i, record in enumerate(records, start=1):
+        writer.add_student(pdf, record)
+        if progress is not None and (i % DEFAULT_CHUNK_SIZE == 0 or i == len(records)):
+            progress(i, len(records))
+    fileobj.write(pdf.output())
+    return len(records)
+
+
+def write_zip(records, cluster_desc_map, fileobj, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    # Potongan siswa dirender paralel; setiap hasil langsung ditulis ke ZIP sehingga
+    # yang tertahan di memori hanya potongan yang sedang diproses.
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        used_names = set()
+
+        def add(results):
+            for filename, data in results:
+                base, n = filename, 1
+                while filename in used_names:
+                    n += 1
+                    filename = base.replace(".pdf", f"_{n}.pdf")
+                used_names.add(filename)
+                archive.writestr(filename, data)
+            if progress is not None:
+                progress(len(used_names), len(records))
+
+        workers = max_workers or min(os.cpu_count() or 1, max(1, len(records) // chunk_size))
+        if workers <= 1 or len(records) < MIN_ROWS_FOR_POOL:
+            for chunk in _chunks(records, chunk_size):
+                add(_render_zip_chunk(chunk, cluster_desc_map))
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            try:
+                pending = deque()
+                for chunk in _chunks(records, chunk_size):
+                    pending.append(executor.submit(_render_zip_chunk, chunk, cluster_desc_map))
+                    if len(pending) >= 2 * workers:
+                        add(pending.popleft().result())
+                while pending:
+                    add(pending.popleft().result())
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+    return len(records)
+
+
+def export_student_reports(df, cluster_desc_map, fmt, fileobj, max_workers=None, progress=None):
+    # progress(selesai, total) dipanggil per potongan siswa.
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format laporan '{fmt}' tidak dikenal. Pilihan: {', '.join(EXPORT_FORMATS)}.")
+    records = df.to_dict("records")
+    if fmt == "pdf":
+        return write_combined_pdf(records, cluster_desc_map, fileobj, progress=progress)
+    return write_zip(records, cluster_desc_map, fileobj, max_workers=max_workers, progress=progress)
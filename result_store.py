@@ -0,0 +1,236 @@
+# Penyimpanan hasil klasterisasi dalam SQLite (satu berkas di folder registri):
+# setiap versi model beserta data siswa, Klaster, dan deskripsinya. Dasbor
+# menjalankan kueri tersaring, per halaman, dan teragregasi di sini sehingga
+# memori dan waktu tampil tidak ikut membesar bersama jumlah siswa. Mode WAL:
+# pembaca tidak pernah menahan penulisan operator, dan sebaliknya.
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+STORE_FILENAME = "hasil.sqlite"
+# Kolom hasil yang disimpan beserta tipe SQLite-nya; "No" tanpa tipe agar nomor
+# induk berupa angka maupun teks tersimpan apa adanya.
+STUDENT_COLUMNS = (
+    ("No", ""), ("Nama", "TEXT"), ("JK", "TEXT"), ("Kelas", "TEXT"),
+    ("Rata Rata Nilai Akademik", "REAL"), ("Kehadiran", "REAL"),
+    ("Ekstrakurikuler Komputer", "INTEGER"), ("Ekstrakurikuler Pertanian", "INTEGER"),
+    ("Ekstrakurikuler Menjahit", "INTEGER"), ("Ekstrakurikuler Pramuka", "INTEGER"),
+    ("Klaster", "INTEGER"),
+)
+FILTER_COLUMNS = ("Kelas", "Klaster", "JK")
+INDEXED_COLUMNS = ("Kelas", "Klaster", "JK", "No")
+SORT_COLUMNS = ("No", "Nama", "Kelas", "Klaster", "Rata Rata Nilai Akademik", "Kehadiran")
+WRITE_CHUNK_ROWS = 5000
+DEFAULT_PAGE_SIZE = 50
+BUSY_TIMEOUT_MS = 10000
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_values(values, sql_type):
+    # Nilai Python murni (sqlite3 tidak menerima int64/float32 numpy); NaN/NA menjadi NULL.
+    if sql_type == "REAL":
+        numeric = pd.to_numeric(values, errors="coerce").astype("float64")
+        return [None if v != v else v for v in numeric.tolist()]
+    if sql_type == "INTEGER":
+        numeric = pd.to_numeric(values, errors="coerce")
+        return [None if pd.isna(v) else int(v) for v in numeric.tolist()]
+    objects = values.astype(object)
+    return [None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in objects.tolist()]
+
+
+def _chunks(results):
+    if not isinstance(results, pd.DataFrame):
+        yield from results
+        return
+    for start in range(0, len(results), WRITE_CHUNK_ROWS):
+        yield results.iloc[start:start + WRITE_CHUNK_ROWS]
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self._ready = False
+
+    @classmethod
+    def for_registry(cls, registry_dir):
+        return cls(os.path.join(registry_dir, STORE_FILENAME))
+
+    @contextmanager
+    def _connect(self, write=False):
+        self._ensure_schema()
+        with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)) as conn:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            if not write:
+                conn.execute("PRAGMA query_only = ON")
+                yield conn
+                return
+            # IMMEDIATE: penulis mengambil kunci tulis di awal; pembaca WAL tetap jalan dengan snapshot lama.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _ensure_schema(self):
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        columns = ", ".join(f"{_quote(name)} {sql_type}".strip() for name, sql_type in STUDENT_COLUMNS)
+        with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)) as conn:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS versi_model (
+                    versi TEXT PRIMARY KEY, dibuat TEXT, jumlah_klaster INTEGER, jumlah_siswa INTEGER,
+                    biaya REAL, mesin TEXT, catatan TEXT
+                );
+                CREATE TABLE IF NOT EXISTS deskripsi_klaster (
+                    versi TEXT NOT NULL, klaster INTEGER NOT NULL, deskripsi TEXT,
+                    PRIMARY KEY (versi, klaster)
+                );
+                CREATE TABLE IF NOT EXISTS siswa (
+                    versi TEXT NOT NULL, baris INTEGER NOT NULL, {columns},
+                    PRIMARY KEY (versi, baris)
+                );
+                {"".join(f'CREATE INDEX IF NOT EXISTS siswa_{name.lower()} ON siswa (versi, {_quote(name)});'
+                         for name in INDEXED_COLUMNS)}
+            """)
+        self._ready = True
+
+    # --- PENULISAN ---
+
+    def write_version(self, metadata, results, descriptions):
+        # results: DataFrame, atau potongan-potongan DataFrame (hasil mini-batch yang tidak
+        # pernah dimuat utuh). Menulis ulang versi yang sama aman (misalnya pengisian ulang
+        # versi lama); satu transaksi per versi.
+        version = metadata["version"]
+        n_rows = 0
+        with self._connect(write=True) as conn:
+            self._delete(conn, version)
+            conn.executemany("INSERT INTO deskripsi_klaster VALUES (?, ?, ?)",
+                             [(version, int(k), text) for k, text in descriptions.items()])
+            for chunk in _chunks(results):
+                present = [(name, sql_type) for name, sql_type in STUDENT_COLUMNS if name in chunk.columns]
+                names = ["versi", "baris"] + [name for name, _ in present]
+                insert = (f"INSERT INTO siswa ({', '.join(map(_quote, names))}) "
+                          f"VALUES ({', '.join('?' * len(names))})")
+                columns = [_column_values(chunk[name], sql_type) for name, sql_type in present]
+                rows = range(n_rows, n_rows + len(chunk))
+                conn.executemany(insert, ((version, row, *values) for row, *values in zip(rows, *columns)))
+                n_rows += len(chunk)
+            conn.execute(
+                "INSERT INTO versi_model VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (version, metadata.get("created_at"), int(metadata["n_clusters"]), n_rows,
+                 metadata.get("cost"), metadata.get("engine"), metadata.get("note", ""))
+            )
+        return version
+
+    def _delete(self, conn, version):
+        for table in ("siswa", "deskripsi_klaster", "versi_model"):
+            conn.execute(f"DELETE FROM {table} WHERE versi = ?", (version,))
+
+    def delete_version(self, version):
+        with self._connect(write=True) as conn:
+            self._delete(conn, version)
+
+    def has_version(self, version):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM versi_model WHERE versi = ?", (version,)).fetchone() is not None
+
+    def ensure_version(self, artifact):
+        # Versi yang diterbitkan sebelum penyimpanan ini ada diisi dari berkas registrinya.
+        if not self.has_version(artifact.version):
+            self.write_version(artifact.metadata, artifact.iter_results(), artifact.descriptions)
+        return artifact.version
+
+    # --- KUERI ---
+
+    def versions(self):
+        with self._connect() as conn:
+            return pd.read_sql_query("SELECT * FROM versi_model ORDER BY versi", conn)
+
+    def descriptions(self, version):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT klaster, deskripsi FROM deskripsi_klaster WHERE versi = ? ORDER BY klaster",
+                                (version,)).fetchall()
+        return dict(rows)
+
+    def distinct_values(self, version, column):
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Kolom '{column}' tidak dapat dipakai sebagai filter. Pilihan: {', '.join(FILTER_COLUMNS)}.")
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT DISTINCT {_quote(column)} FROM siswa WHERE versi = ? "
+                                f"AND {_quote(column)} IS NOT NULL ORDER BY 1", (version,)).fetchall()
+        return [value for value, in rows]
+
+    def _where(self, version, filters=None, search=None):
+        # filters: {kolom: [nilai, ...]}; daftar kosong berarti tanpa filter kolom itu.
+        # search: nomor induk persis, atau awalan nama (tanpa membedakan huruf besar/kecil).
+        clauses, params = ["versi = ?"], [version]
+        for column, values in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Kolom '{column}' tidak dapat dipakai sebagai filter. Pilihan: {', '.join(FILTER_COLUMNS)}.")
+            if values:
+                clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        search = (search or "").strip()
+        if search:
+            numbers = [search]
+            try:
+                number = float(search)
+                numbers += [int(number)] if number.is_integer() else [number]
+            except ValueError:
+                pass
+            clauses.append(f"({_quote('No')} IN ({', '.join('?' * len(numbers))}) OR Nama LIKE ?)")
+            params.extend(numbers + [f"{search}%"])
+        return " AND ".join(clauses), params
+
+    def count_students(self, version, filters=None, search=None):
+        where, params = self._where(version, filters, search)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM siswa WHERE {where}", params).fetchone()[0]
+
+    def query_students(self, version, filters=None, search=None, order_by="No", descending=False,
+                       page=0, page_size=DEFAULT_PAGE_SIZE):
+        # Hanya satu halaman yang dibaca dari disk; urutan tetap stabil dengan nomor baris sebagai pemecah seri.
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Kolom urutan '{order_by}' tidak dikenal. Pilihan: {', '.join(SORT_COLUMNS)}.")
+        where, params = self._where(version, filters, search)
+        direction = "DESC" if descending else "ASC"
+        columns = ", ".join(_quote(name) for name, _ in STUDENT_COLUMNS)
+        sql = (f"SELECT {columns} FROM siswa WHERE {where} "
+               f"ORDER BY {_quote(order_by)} {direction}, baris LIMIT ? OFFSET ?")
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params + [int(page_size), int(page) * int(page_size)])
+
+    def cluster_summary(self, version, filters=None, search=None):
+        # Agregat per klaster dihitung SQLite; yang dikirim ke dasbor hanya satu baris per klaster.
+        where, params = self._where(version, filters, search)
+        participation = ", ".join(
+            f"AVG(COALESCE({_quote(name)}, 0) = 1) AS {_quote('Partisipasi ' + name.replace('Ekstrakurikuler ', ''))}"
+            for name, _ in STUDENT_COLUMNS if name.startswith("Ekstrakurikuler ")
+        )
+        sql = (f"SELECT Klaster, COUNT(*) AS {_quote('Jumlah Siswa')}, "
+               f"AVG({_quote('Rata Rata Nilai Akademik')}) AS {_quote('Nilai Rata-rata')}, "
+               f"AVG(Kehadiran) AS {_quote('Kehadiran Rata-rata')}, {participation} "
+               f"FROM siswa WHERE {where} GROUP BY Klaster ORDER BY Klaster")
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def crosstab(self, version, column, filters=None, search=None):
+        # Jumlah siswa per nilai kolom (Kelas/JK) dan Klaster.
+        if column not in FILTER_COLUMNS or column == "Klaster":
+            raise ValueError(f"Kolom '{column}' tidak dapat dipakai untuk tabulasi silang.")
+        where, params = self._where(version, filters, search)
+        sql = (f"SELECT {_quote(column)}, Klaster, COUNT(*) AS jumlah FROM siswa WHERE {where} "
+               f"GROUP BY {_quote(column)}, Klaster")
+        with self._connect() as conn:
+            counts = pd.read_sql_query(sql, conn, params=params)
+        return counts.pivot(index=column, columns="Klaster", values="jumlah").fillna(0).astype(int)
@@ -0,0 +1,274 @@
+# Layanan HTTP lokal untuk sistem sekolah lain (aplikasi presensi, formulir
+# penerimaan): model dan scaler versi aktif dimuat sekali dan tetap di memori,
+# lalu permintaan prediksi tunggal maupun batch yang datang bersamaan digabung
+# menjadi satu perhitungan tervektorisasi.
+#
+#   python scoring_service.py --port 8502
+#   curl -X POST localhost:8502/prediksi -d '{"JK": "P", "Kelas": "X", ...}'
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from pipeline import (NUMERIC_COLS, CATEGORICAL_COLS, coerce_student_types, predict_clusters,
+                      missing_value_warning)
+from registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+# Permintaan yang datang dalam jeda ini digabung; batch ditutup lebih awal bila sudah penuh.
+BATCH_WAIT_SECONDS = 0.002
+MAX_BATCH_STUDENTS = 512
+MAX_REQUEST_STUDENTS = 10000
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class ScoringModel:
+    # Satu versi model dari registri, siap dipakai tanpa membaca disk lagi.
+    def __init__(self, artifact):
+        self.version = artifact.version
+        self.model = artifact.model
+        self.scaler = artifact.scaler
+        self.categorical_indices = artifact.categorical_indices
+        self.descriptions = artifact.descriptions
+        self.loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def load(cls, registry_dir=DEFAULT_REGISTRY_DIR, version=None):
+        artifact = ModelRegistry(registry_dir).load(version)
+        if artifact is None:
+            raise ValueError(f"Registri model '{registry_dir}' belum berisi versi model. Jalankan klasterisasi di aplikasi terlebih dahulu.")
+        return cls(artifact)
+
+    def predict(self, requests):
+        # Semua siswa dari beberapa permintaan dihitung sekaligus, lalu hasil dan peringatan
+        # pengisian nilai kosong dipisah lagi per permintaan.
+        df = coerce_student_types(pd.DataFrame.from_records([record for records in requests for record in records]))
+        labels, distances, _ = predict_clusters(df, self.model, self.scaler, self.categorical_indices)
+        results = self._results(df, labels, distances)
+        answers = []
+        start = 0
+        for records in requests:
+            part = df.iloc[start:start + len(records)]
+            warnings = [missing_value_warning(col, self.scaler.mean_[i])
+                        for i, col in enumerate(NUMERIC_COLS) if part[col].isnull().any()]
+            answers.append((results[start:start + len(records)], warnings))
+            start += len(records)
+        return answers
+
+    def _results(self, df, labels, distances):
+        numbers = df["No"].tolist() if "No" in df.columns else [None] * len(df)
+        results = []
+        for number, label, distance in zip(numbers, labels, distances):
+            klaster = int(label)
+            result = {"Klaster": klaster, "Jarak ke Prototipe": float(distance),
+                      "Deskripsi Klaster": self.descriptions.get(klaster, "Deskripsi klaster tidak tersedia.")}
+            if number is not None and not pd.isna(number):
+                result = {"No": number if isinstance(number, str) else int(number), **result}
+            results.append(result)
+        return results
+
+
+class RequestBatcher:
+    # Satu thread penilai: permintaan diantrekan dan diambil bersama-sama, sehingga
+    # biaya praproses dan perhitungan jarak dibayar sekali per batch, bukan per siswa.
+    def __init__(self, service, wait_seconds=BATCH_WAIT_SECONDS, max_students=MAX_BATCH_STUDENTS):
+        self.service = service
+        self.wait_seconds = wait_seconds
+        self.max_students = max_students
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="penilai-batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        n_students = len(batch[0][0])
+        deadline = time.perf_counter() + self.wait_seconds
+        while n_students < self.max_students:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_students += len(item[0])
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            model = self.service.model
+            try:
+                answers = model.predict([records for records, _ in batch])
+            except Exception:
+                # Satu permintaan rusak tidak boleh menggagalkan permintaan lain dalam batch yang sama.
+                for records, future in batch:
+                    try:
+                        future.set_result((model.version, *model.predict([records])[0]))
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                for (_, future), (results, warnings) in zip(batch, answers):
+                    future.set_result((model.version, results, warnings))
+            self.service.record_batch(len(batch), sum(len(records) for records, _ in batch))
+
+
+class ScoringService:
+    def __init__(self, registry_dir=DEFAULT_REGISTRY_DIR, version=None):
+        self.registry_dir = registry_dir
+        self.model = ScoringModel.load(registry_dir, version)
+        self.batcher = RequestBatcher(self)
+        self._lock = threading.Lock()
+        self._stats = {"permintaan": 0, "siswa": 0, "batch": 0}
+        self.started = time.perf_counter()
+
+    def reload(self, version=None):
+        # Model baru dimuat penuh dulu, baru menggantikan yang lama; batch yang sedang berjalan tetap memakai model lama.
+        self.model = ScoringModel.load(self.registry_dir, version)
+        return self.model.version
+
+    def predict(self, records):
+        return self.batcher.submit(records).result()
+
+    def record_batch(self, n_requests, n_students):
+        with self._lock:
+            self._stats["permintaan"] += n_requests
+            self._stats["siswa"] += n_students
+            self._stats["batch"] += 1
+
+    def status(self):
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "versi_model": self.model.version,
+            "dimuat": self.model.loaded_at,
+            "uptime_detik": round(time.perf_counter() - self.started, 1),
+            **stats,
+            "rata_rata_permintaan_per_batch": round(stats["permintaan"] / stats["batch"], 2) if stats["batch"] else 0.0,
+        }
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _student_records(payload, batch):
+    # Tunggal: satu objek siswa. Batch: daftar objek, atau {"siswa": [...]}.
+    if isinstance(payload, dict) and "siswa" in payload:
+        payload = payload["siswa"]
+    records = payload if batch else [payload]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise RequestError(400, "Data siswa harus berupa objek JSON (prediksi tunggal) atau daftar objek (prediksi batch).")
+    if not records:
+        raise RequestError(400, "Daftar siswa kosong.")
+    if len(records) > MAX_REQUEST_STUDENTS:
+        raise RequestError(413, f"Paling banyak {MAX_REQUEST_STUDENTS} siswa per permintaan.")
+    # Nama kolom dirapikan seperti di preprocess_frame; kolom fitur wajib ada (boleh bernilai null).
+    records = [{str(key).strip(): value for key, value in record.items()} for record in records]
+    for n, record in enumerate(records, start=1):
+        missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in record]
+        if missing_cols:
+            raise RequestError(400, f"Siswa ke-{n} tidak memiliki kolom: {', '.join(missing_cols)}.")
+    return records
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # Keep-alive agar klien (dan uji beban) tidak membuka koneksi baru per permintaan. Header dan
+    # isi jawaban dikirim terpisah; tanpa TCP_NODELAY keduanya tertahan ~40 ms oleh delayed ACK.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    service = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Ukuran permintaan melebihi {MAX_BODY_BYTES // (1024 * 1024)} MB.")
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            raise RequestError(400, "Isi permintaan bukan JSON yang valid.")
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send_json(200, self.service.status())
+        else:
+            self._send_json(404, {"galat": f"Alamat '{self.path}' tidak dikenal."})
+
+    def do_POST(self):
+        try:
+            if self.path == "/muat-ulang":
+                payload = self._read_json() or {}
+                version = self.service.reload(payload.get("versi") if isinstance(payload, dict) else None)
+                self._send_json(200, {"versi_model": version})
+            elif self.path in ("/prediksi", "/prediksi/batch"):
+                batch = self.path == "/prediksi/batch"
+                version, results, warnings = self.service.predict(_student_records(self._read_json(), batch))
+                body = {"versi_model": version, "hasil": results} if batch else {"versi_model": version, **results[0]}
+                self._send_json(200, {**body, "peringatan": warnings})
+            else:
+                raise RequestError(404, f"Alamat '{self.path}' tidak dikenal.")
+        except RequestError as e:
+            self._send_json(e.status, {"galat": str(e)})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"galat": str(e)})
+        except Exception as e:
+            self._send_json(500, {"galat": f"Terjadi kesalahan saat memproses permintaan: {e}"})
+
+    def log_message(self, format, *args):
+        # Log per permintaan dimatikan; pada uji beban log justru menjadi hambatan.
+        pass
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, registry_dir=DEFAULT_REGISTRY_DIR, version=None):
+    handler = type("BoundScoringHandler", (ScoringHandler,), {"service": ScoringService(registry_dir, version)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan HTTP lokal untuk prediksi klaster siswa.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Alamat yang didengarkan (default: {DEFAULT_HOST}, hanya lokal).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}).")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_DIR,
+                        help=f"Folder registri model (default: {DEFAULT_REGISTRY_DIR}).")
+    parser.add_argument("--version", help="Versi model yang dimuat (default: versi aktif).")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.registry, args.version)
+    service = server.RequestHandlerClass.service
+    print(f"Layanan prediksi versi model {service.model.version} berjalan di http://{args.host}:{args.port}")
+    print("Alamat: POST /prediksi, POST /prediksi/batch, POST /muat-ulang, GET /status")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
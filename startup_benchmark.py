@@ -0,0 +1,110 @@
+# Pengukuran waktu mulai dan beban per rerun app.py: setiap halaman dijalankan
+# dalam proses Python baru (seperti server yang baru dinyalakan) lewat AppTest,
+# lalu dicatat waktu run pertama (sampai tampilan pertama siap), waktu rerun,
+# ukuran elemen yang dikirim ke browser, dan modul berat yang ikut termuat.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+PAGES = ("awal", "tu", "kepsek")
+HEAVY_MODULES = ("matplotlib", "seaborn", "fpdf", "kmodes", "sklearn", "scipy", "pyarrow", "openpyxl")
+DEFAULT_RESULTS_PATH = os.path.join("benchmark_results", "hasil_startup.jsonl")
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Dijalankan di proses anak. "awal" hanya mengeksekusi tingkat modul app.py
+# (yang dilihat pengguna sebelum memilih peran); "tu"/"kepsek" memanggil halaman perannya.
+_HARNESS = """
+import runpy, sys
+sys.path.insert(0, {repo!r})
+g = runpy.run_path({app!r})
+page = {page!r}
+if page == "tu":
+    g["show_operator_tu_page"]()
+elif page == "kepsek":
+    g["show_kepala_sekolah_page"]()
+"""
+
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+def payload_bytes(node):
+    # Ukuran protobuf setiap elemen dan blok: perkiraan byte yang dikirim ke browser.
+    total = len(node.proto.SerializeToString()) if getattr(node, "proto", None) is not None else 0
+    for child in getattr(node, "children", {{}}).values():
+        total += payload_bytes(child)
+    return total
+
+at = AppTest.from_string({harness!r}, default_timeout=120)
+t0 = time.perf_counter()
+at.run()
+first = time.perf_counter() - t0
+first_bytes = payload_bytes(at._tree)
+t0 = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - t0
+print(json.dumps({{
+    "run_pertama_s": round(first, 3),
+    "rerun_s": round(rerun, 3),
+    "byte_run_pertama": first_bytes,
+    "byte_rerun": payload_bytes(at._tree),
+    "galat": [str(e.value) for e in at.exception],
+    "modul_berat": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def measure_page(page, workdir=None, python=sys.executable):
+    # Folder kerja kosong: tidak ada registri model atau cache dari percobaan lain.
+    repo = os.path.dirname(APP_PATH)
+    harness = _HARNESS.format(repo=repo, app=APP_PATH, page=page)
+    code = _CHILD.format(harness=harness, heavy=HEAVY_MODULES)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [repo, os.environ.get("PYTHONPATH")]))}
+        output = subprocess.run([python, "-c", code], cwd=workdir or tmp, env=env, capture_output=True,
+                                text=True, check=True).stdout
+    return {"halaman": page, **json.loads(output.strip().splitlines()[-1])}
+
+
+def run_startup_benchmark(pages=PAGES, repeats=3, label=""):
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    records = []
+    for page in pages:
+        samples = [measure_page(page) for _ in range(repeats)]
+        best = min(samples, key=lambda s: s["run_pertama_s"])
+        record = {"run_id": run_id, "label": label, **best,
+                  "run_pertama_median_s": sorted(s["run_pertama_s"] for s in samples)[len(samples) // 2]}
+        records.append(record)
+        first_bytes, rerun_bytes = (f"{record[key]:,}".replace(",", ".") for key in ("byte_run_pertama", "byte_rerun"))
+        print(f"{page:>7}: run pertama {record['run_pertama_median_s']:.2f} s (median), rerun {record['rerun_s']:.3f} s, "
+              f"{first_bytes} byte lalu {rerun_bytes} byte per rerun, "
+              f"modul berat: {', '.join(record['modul_berat']) or '-'}")
+        if record["galat"]:
+            print(f"         galat: {record['galat']}")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur waktu mulai dan byte per rerun halaman app.py.")
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=list(PAGES), help="Halaman yang diukur (default: semua).")
+    parser.add_argument("--repeats", type=int, default=3, help="Pengulangan per halaman, diambil median (default: 3).")
+    parser.add_argument("--label", default="", help="Catatan percobaan, misalnya nama cabang atau perubahan yang diuji.")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH,
+                        help=f"Berkas JSON Lines tempat hasil ditambahkan (default: {DEFAULT_RESULTS_PATH}).")
+    args = parser.parse_args(argv)
+
+    records = run_startup_benchmark(args.pages, args.repeats, args.label)
+    os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+    with open(args.results, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    print(f"Hasil ditambahkan ke '{args.results}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
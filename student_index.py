@@ -0,0 +1,161 @@
+# Indeks pencarian siswa untuk "Lihat Profil Siswa Individual": dibangun
+# sekali per versi model, lalu setiap pencarian No bersifat O(1) dan pencarian
+# nama memakai awalan (bisect) serta trigram untuk salah ketik.
+import bisect
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from pipeline import preprocess_frame, feature_matrix, prototype_costs
+
+DEFAULT_LIMIT = 20
+# Kandidat fuzzy yang dinilai dengan difflib setelah disaring trigram.
+FUZZY_CANDIDATES = 200
+FUZZY_CUTOFF = 0.6
+
+
+def normalize_name(text):
+    # Huruf besar tanpa aksen dan tanda baca, spasi tunggal: "Siti  Nur'aini" -> "SITI NURAINI".
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^A-Za-z0-9 ]+", "", text.upper())
+    return " ".join(text.split())
+
+
+def normalize_number(value):
+    # 12, 12.0, "12", dan " 012 " dianggap nomor yang sama.
+    text = str(value).strip()
+    try:
+        number = float(text)
+    except ValueError:
+        return text.upper()
+    return str(int(number)) if number.is_integer() else text
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StudentIndex:
+    def __init__(self, results, model=None, scaler=None, categorical_indices=None, descriptions=None):
+        self.results = results.reset_index(drop=True)
+        self.descriptions = descriptions or {}
+        n = len(self.results)
+        self.clusters = self.results["Klaster"].to_numpy() if "Klaster" in self.results.columns else np.full(n, -1)
+        self.distances = np.full(n, np.nan)
+        if model is not None and scaler is not None and n:
+            # Jarak ke prototipe klaster masing-masing dihitung sekali untuk semua siswa.
+            df_preprocessed, _, _ = preprocess_frame(self.results, scaler=scaler)
+            X, categorical = feature_matrix(df_preprocessed)
+            costs = prototype_costs(model, X, categorical_indices if categorical_indices is not None else categorical)
+            self.distances = costs[np.arange(n), self.clusters.astype(int)]
+
+        self._by_number = defaultdict(list)
+        if "No" in self.results.columns:
+            for pos, value in enumerate(self.results["No"].to_numpy()):
+                self._by_number[normalize_number(value)].append(pos)
+        self._by_number = dict(self._by_number)
+
+        names = self.results["Nama"].map(normalize_name).tolist() if "Nama" in self.results.columns else [""] * n
+        # Awalan dicari pada nama lengkap maupun setiap kata nama (nama tengah/belakang).
+        keys = []
+        for pos, name in enumerate(names):
+            keys.append((name, pos))
+            keys.extend((token, pos) for token in name.split()[1:])
+        keys.sort()
+        self._prefix_keys = [key for key, _ in keys]
+        self._prefix_positions = np.array([pos for _, pos in keys], dtype=np.int64)
+
+        self._names = sorted(set(names) - {""})
+        self._name_positions = defaultdict(list)
+        for pos, name in enumerate(names):
+            self._name_positions[name].append(pos)
+        self._name_positions = dict(self._name_positions)
+        trigram_index = defaultdict(list)
+        for name_id, name in enumerate(self._names):
+            for gram in _trigrams(name):
+                trigram_index[gram].append(name_id)
+        self._trigrams = {gram: np.array(ids, dtype=np.int64) for gram, ids in trigram_index.items()}
+
+    def __len__(self):
+        return len(self.results)
+
+    def by_number(self, value):
+        return list(self._by_number.get(normalize_number(value), []))
+
+    def by_prefix(self, text, limit=DEFAULT_LIMIT):
+        prefix = normalize_name(text)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        found = []
+        for i in range(start, len(self._prefix_keys)):
+            if not self._prefix_keys[i].startswith(prefix):
+                break
+            pos = int(self._prefix_positions[i])
+            if pos not in found:
+                found.append(pos)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def fuzzy(self, text, limit=DEFAULT_LIMIT, cutoff=FUZZY_CUTOFF):
+        query = normalize_name(text)
+        grams = [self._trigrams[g] for g in _trigrams(query) if g in self._trigrams]
+        if not grams:
+            return []
+        # Nama dengan trigram bersama terbanyak dinilai ulang dengan difflib.
+        counts = np.bincount(np.concatenate(grams), minlength=len(self._names))
+        if len(counts) > FUZZY_CANDIDATES:
+            top = np.argpartition(-counts, FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]
+        else:
+            top = np.arange(len(counts))
+        scored = []
+        for name_id in top[counts[top] > 0]:
+            name = self._names[name_id]
+            ratio = difflib.SequenceMatcher(None, query, name).ratio()
+            if ratio >= cutoff:
+                scored.append((-ratio, name))
+        found = []
+        for _, name in sorted(scored):
+            found.extend(self._name_positions[name])
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        # Urutan: nomor induk persis, awalan nama, lalu kemiripan nama.
+        query = str(query).strip()
+        if not query:
+            return []
+        found = self.by_number(query)
+        for pos in self.by_prefix(query, limit):
+            if pos not in found:
+                found.append(pos)
+        if len(found) < limit:
+            for pos in self.fuzzy(query, limit):
+                if pos not in found:
+                    found.append(pos)
+        return found[:limit]
+
+    def record(self, pos):
+        row = self.results.iloc[pos].to_dict()
+        klaster = int(self.clusters[pos])
+        return {
+            "row": row,
+            "Klaster": klaster,
+            "Deskripsi Klaster": self.descriptions.get(klaster, "Deskripsi klaster tidak tersedia."),
+            "Jarak ke Prototipe": float(self.distances[pos]),
+        }
+
+    def label(self, pos):
+        row = self.results.iloc[pos]
+        return f"{row.get('No', '-')} - {row.get('Nama', '-')} ({row.get('Kelas', '-')})"
+
+
+def build_student_index(artifact):
+    return StudentIndex(artifact.results, artifact.model, artifact.scaler, artifact.categorical_indices,
+                        artifact.descriptions)
@@ -0,0 +1,116 @@
+# Indeks untuk menampilkan tabel siswa per halaman: urutan setiap kolom dihitung
+# sekali (argsort stabil) lalu dipakai ulang untuk semua kombinasi filter,
+# sehingga setiap klik hanya memotong satu halaman dari tabel di server dan
+# browser tidak pernah menerima seluruh tabel.
+import numpy as np
+import pandas as pd
+
+from result_store import FILTER_COLUMNS, SORT_COLUMNS, DEFAULT_PAGE_SIZE
+
+# Kolom yang dapat disaring dengan rentang nilai.
+RANGE_COLUMNS = ("Rata Rata Nilai Akademik", "Kehadiran")
+
+
+def _factorize(values):
+    # Kode berurutan sesuai nilai; kolom campuran (misalnya No berupa angka dan teks) diurutkan sebagai teks.
+    try:
+        return pd.factorize(values, sort=True)
+    except TypeError:
+        codes, uniques = pd.factorize(values.astype(str).where(values.notna()), sort=True)
+        return codes, uniques
+
+
+class TableIndex:
+    def __init__(self, df):
+        self.df = df
+        self.filter_columns = [col for col in FILTER_COLUMNS if col in df.columns]
+        self.sort_columns = [col for col in SORT_COLUMNS if col in df.columns]
+        self.range_columns = [col for col in RANGE_COLUMNS
+                              if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+        # Dibangun saat pertama diminta; indeks dipakai bersama rerun sehingga tiap kolom cukup diurutkan sekali.
+        self._codes = {}
+        self._ranks = {}
+        self._orders = {}
+        self._sorted = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def _factorized(self, column):
+        if column not in self._codes:
+            self._codes[column] = _factorize(self.df[column])
+        return self._codes[column]
+
+    def _rank(self, column):
+        # Kunci urut numerik per baris: nilai asli untuk kolom angka, kode berurutan untuk kolom lain; kosong = NaN.
+        if column not in self._ranks:
+            values = self.df[column]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                rank = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                codes, _ = self._factorized(column)
+                rank = np.where(codes < 0, np.nan, codes).astype(np.float64)
+            self._ranks[column] = rank
+        return self._ranks[column]
+
+    def order(self, column, descending=False):
+        # Posisi baris terurut; seri dipecah menurut urutan asli dan nilai kosong selalu di akhir.
+        key = (column, descending)
+        if key not in self._orders:
+            rank = self._rank(column)
+            rank = np.where(np.isnan(rank), np.inf, -rank if descending else rank)
+            self._orders[key] = np.argsort(rank, kind="stable")
+        return self._orders[key]
+
+    def options(self, column):
+        _, uniques = self._factorized(column)
+        return pd.Index(uniques).tolist()
+
+    def value_range(self, column):
+        rank = self._rank(column)
+        if np.isnan(rank).all():
+            return None
+        return float(np.nanmin(rank)), float(np.nanmax(rank))
+
+    def mask(self, filters=None, ranges=None):
+        # filters: {kolom: [nilai, ...]}, daftar kosong berarti tanpa filter; ranges: {kolom: (bawah, atas)}.
+        # Mengembalikan None bila tidak ada filter yang aktif.
+        mask = None
+        for column, values in (filters or {}).items():
+            if column not in self.filter_columns:
+                raise ValueError(f"Kolom '{column}' tidak dapat dipakai sebagai filter. Pilihan: {', '.join(self.filter_columns)}.")
+            if not values:
+                continue
+            codes, uniques = self._factorized(column)
+            wanted = pd.Index(uniques).get_indexer(list(values))
+            selected = np.isin(codes, wanted[wanted >= 0])
+            mask = selected if mask is None else mask & selected
+        for column, (low, high) in (ranges or {}).items():
+            if column not in self.range_columns:
+                raise ValueError(f"Kolom '{column}' tidak dapat disaring dengan rentang. Pilihan: {', '.join(self.range_columns)}.")
+            # Batas rentang dicari dengan pencarian biner pada urutan naik kolom (NaN berada di akhir).
+            order = self.order(column)
+            if column not in self._sorted:
+                self._sorted[column] = self._rank(column)[order]
+            sorted_values = self._sorted[column]
+            start = np.searchsorted(sorted_values, low, side="left")
+            stop = np.searchsorted(sorted_values, high, side="right")
+            selected = np.zeros(len(self.df), dtype=bool)
+            selected[order[start:stop]] = True
+            mask = selected if mask is None else mask & selected
+        return mask
+
+    def count(self, filters=None, ranges=None):
+        mask = self.mask(filters, ranges)
+        return len(self.df) if mask is None else int(mask.sum())
+
+    def query(self, filters=None, ranges=None, order_by=None, descending=False, page=0, page_size=DEFAULT_PAGE_SIZE):
+        # Mengembalikan (jumlah baris yang lolos filter, satu halaman tabel).
+        if order_by is not None and order_by not in self.sort_columns:
+            raise ValueError(f"Kolom urutan '{order_by}' tidak dikenal. Pilihan: {', '.join(self.sort_columns)}.")
+        positions = np.arange(len(self.df)) if order_by is None else self.order(order_by, descending)
+        mask = self.mask(filters, ranges)
+        if mask is not None:
+            positions = positions[mask[positions]]
+        start = int(page) * int(page_size)
+        return len(positions), self.df.iloc[positions[start:start + int(page_size)]]
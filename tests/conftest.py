@@ -0,0 +1,14 @@
+# Modul aplikasi berada di akar repositori, bukan dalam paket.
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+@pytest.fixture
+def data_path():
+    # Data contoh siswa yang ikut disimpan di repositori.
+    return os.path.join(REPO_DIR, "siswa_data.xlsx")
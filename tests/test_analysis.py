@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import analysis
+from analysis import _fit_group, cluster_by_group
+from pipeline import preprocess_frame, read_student_file
+
+
+@pytest.fixture
+def small_group(data_path):
+    df_group, _, _ = preprocess_frame(read_student_file(data_path).head(12))
+    return df_group
+
+
+def fit_auto(df_group, k_range=range(2, 5)):
+    return _fit_group(("XI", np.arange(len(df_group)), df_group, "auto", k_range, 2, 42))
+
+
+def test_auto_k_replaces_nan_silhouette(small_group, monkeypatch):
+    # Silhouette K=2 tidak terdefinisi (NaN); K berikutnya tetap dapat menggantikannya.
+    real_silhouette = analysis.mixed_silhouette
+
+    def silhouette(X, categorical, labels, gamma, **kwargs):
+        if len(np.unique(labels)) == 2:
+            return float("nan")
+        return real_silhouette(X, categorical, labels, gamma, **kwargs)
+
+    monkeypatch.setattr(analysis, "mixed_silhouette", silhouette)
+    _, _, labels, k, _, score, _, status = fit_auto(small_group)
+    assert status == "ok"
+    assert k in (3, 4)
+    assert not np.isnan(score)
+    assert len(np.unique(labels)) == k
+
+
+def test_auto_k_keeps_smallest_k_when_every_silhouette_is_nan(small_group, monkeypatch):
+    monkeypatch.setattr(analysis, "mixed_silhouette", lambda *args, **kwargs: float("nan"))
+    _, _, _, k, _, _, _, status = fit_auto(small_group)
+    assert (k, status) == (2, "ok")
+
+
+def test_failing_k_keeps_earlier_success(small_group, monkeypatch):
+    real_fit = analysis.fit_kprototypes
+
+    def fit(df_group, k, **kwargs):
+        if k == 3:
+            raise ValueError("K=3 gagal")
+        return real_fit(df_group, k, **kwargs)
+
+    monkeypatch.setattr(analysis, "fit_kprototypes", fit)
+    _, _, _, k, _, _, _, status = fit_auto(small_group, range(2, 4))
+    assert (k, status) == (2, "ok")
+
+
+def test_group_fails_only_when_every_k_fails(small_group, monkeypatch):
+    def fit(df_group, k, **kwargs):
+        raise ValueError(f"K={k} gagal")
+
+    monkeypatch.setattr(analysis, "fit_kprototypes", fit)
+    _, _, labels, k, _, _, _, status = fit_auto(small_group, range(2, 4))
+    assert (k, status) == (None, "gagal: K=3 gagal")
+    assert (labels == -1).all()
+
+
+def test_cluster_by_group_labels_every_row(data_path):
+    df = read_student_file(data_path)
+    df_preprocessed, _, _ = preprocess_frame(df)
+    assignments, summary, _ = cluster_by_group(df, df_preprocessed, "Kelas", 2, max_workers=1, n_init=2)
+    assert len(assignments) == len(df)
+    assert assignments.notna().all()
+    assert len(summary) == df["Kelas"].nunique()
@@ -0,0 +1,20 @@
+import os
+
+from charts import CHART_FORMATS, CHART_TITLES, version_charts
+from pipeline import ClusteringPipeline, data_fingerprint, read_student_file
+from registry import CHARTS_DIRNAME, ModelRegistry
+
+
+def test_version_charts_are_rendered_once_and_reused(tmp_path, data_path):
+    df = read_student_file(data_path)
+    pipeline = ClusteringPipeline(n_clusters=3, n_jobs=1).fit(df)
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(pipeline.result_frame(df), pipeline.model_, pipeline.scaler_, pipeline.categorical_indices_,
+                     pipeline.descriptions_, data_fingerprint(pipeline.transform(df)), profiles=pipeline.profiles_)
+    charts = version_charts(registry.load())
+    assert set(charts) == set(CHART_TITLES)
+    assert all(charts[name][fmt] for name in CHART_TITLES for fmt in CHART_FORMATS)
+    chart_dir = os.path.join(registry.load().path, CHARTS_DIRNAME)
+    assert len(os.listdir(chart_dir)) == len(CHART_TITLES) * len(CHART_FORMATS)
+    # Pemanggilan berikutnya membaca berkas yang sama dari disk.
+    assert version_charts(registry.load()) == charts
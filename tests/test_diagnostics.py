@@ -0,0 +1,35 @@
+import json
+
+from diagnostics import (RERUN_STAGE, DiagnosticsLog, begin_rerun, finish_rerun, instrumented, mark_cache_miss,
+                         new_session_events, stage, summarize_stages)
+
+
+@instrumented("dihitung", cached=True)
+def cached_stage(hit):
+    if not hit:
+        mark_cache_miss()
+
+
+def test_rerun_records_stages_and_cache_status(tmp_path):
+    log = DiagnosticsLog(str(tmp_path))
+    events = new_session_events()
+    begin_rerun(log, "sesi", 1, events)
+    cached_stage(hit=False)
+    cached_stage(hit=True)
+    with stage("baca", rows=10):
+        pass
+    finish_rerun(menu="Klasterisasi")
+    assert [e["stage"] for e in events] == ["dihitung", "dihitung", "baca", RERUN_STAGE]
+    assert [e["cache"] for e in events][:2] == ["miss", "hit"]
+    assert all(e["menu"] == "Klasterisasi" for e in events)
+    lines = log.read_bytes().decode("utf-8").splitlines()
+    assert [json.loads(line)["stage"] for line in lines] == [e["stage"] for e in events]
+    summary = summarize_stages(events).set_index("Tahap")
+    assert summary.loc["dihitung", "Cache Hit"] == 1
+    assert summary.loc["dihitung", "Cache Miss"] == 1
+
+
+def test_stage_outside_rerun_is_not_recorded():
+    with stage("cli") as record:
+        assert record.name == "cli"
+    assert finish_rerun() is None
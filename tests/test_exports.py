@@ -0,0 +1,68 @@
+import io
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from exports import (DESCRIPTION_COLUMN, DESCRIPTIONS_SHEET, PROFILES_SHEET, RESULTS_SHEET, export_filename,
+                     export_results)
+from pipeline import coerce_student_types, read_student_file
+
+DESCRIPTIONS = {0: "Rajin dan aktif", 1: "Perlu pendampingan"}
+
+
+@pytest.fixture
+def df_final(data_path):
+    df = read_student_file(data_path)
+    return df.assign(Klaster=[i % 2 for i in range(len(df))])
+
+
+def expected_results(df_final):
+    return df_final.assign(**{DESCRIPTION_COLUMN: df_final["Klaster"].map(DESCRIPTIONS)}).reset_index(drop=True)
+
+
+def assert_same_results(actual, df_final):
+    expected = expected_results(df_final)
+    actual = coerce_student_types(actual.drop(columns=[DESCRIPTION_COLUMN])).assign(
+        **{DESCRIPTION_COLUMN: actual[DESCRIPTION_COLUMN]})
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_categorical=False)
+
+
+def test_excel_export_round_trips_in_chunks(df_final):
+    output = io.BytesIO()
+    progress = []
+    assert export_results(df_final, None, DESCRIPTIONS, "xlsx", output, chunk_rows=25,
+                          progress=lambda done, total: progress.append((done, total))) == len(df_final)
+    total = len(df_final)
+    assert progress == [(25, total), (50, total), (total, total)]
+    sheets = pd.read_excel(io.BytesIO(output.getvalue()), sheet_name=None)
+    assert list(sheets) == [RESULTS_SHEET, PROFILES_SHEET, "Klaster 0", "Klaster 1", DESCRIPTIONS_SHEET]
+    assert_same_results(sheets[RESULTS_SHEET], df_final)
+    assert sheets[DESCRIPTIONS_SHEET][DESCRIPTION_COLUMN].tolist() == list(DESCRIPTIONS.values())
+
+
+def test_csv_bundle_round_trips_in_chunks(df_final):
+    output = io.BytesIO()
+    export_results(df_final, None, DESCRIPTIONS, "csv", output, chunk_rows=25)
+    with zipfile.ZipFile(output) as archive:
+        assert sorted(archive.namelist()) == ["deskripsi_klaster.csv", "hasil_klasterisasi.csv", "profil_klaster.csv"]
+        with archive.open("hasil_klasterisasi.csv") as entry:
+            assert_same_results(pd.read_csv(entry), df_final)
+
+
+def test_parquet_bundle_writes_one_row_group_per_chunk(df_final):
+    output = io.BytesIO()
+    export_results(df_final, None, DESCRIPTIONS, "parquet", output, chunk_rows=25)
+    with zipfile.ZipFile(output) as archive:
+        with archive.open("hasil_klasterisasi.parquet") as entry:
+            parquet = pq.ParquetFile(io.BytesIO(entry.read()))
+    assert parquet.metadata.num_row_groups == 3
+    assert_same_results(parquet.read().to_pandas(), df_final)
+
+
+def test_unknown_format_and_filenames():
+    with pytest.raises(ValueError):
+        export_results(pd.DataFrame(), None, {}, "json", io.BytesIO())
+    assert export_filename("v3", "xlsx") == "hasil_klasterisasi_v3.xlsx"
+    assert export_filename(None, "parquet") == "hasil_klasterisasi_sesi_parquet.zip"
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from governor import ComputeGovernor
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "kondisi tidak tercapai"
+        time.sleep(0.01)
+
+
+def test_background_is_capped_and_interactive_keeps_its_reservation():
+    governor = ComputeGovernor(max_workers=4)
+    with governor.slots(8, owner="A") as granted:
+        assert granted == 3
+        # Permintaan bersarang di thread yang sama memakai jatah yang sudah dipegang.
+        with governor.slots(2, owner="A") as nested:
+            assert nested == 3
+        result = []
+
+        def read():
+            with governor.slots(1, interactive=True) as reader_granted:
+                result.append(reader_granted)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(5)
+        assert result == [1]
+
+
+def test_single_core_server_still_serves_interactive_reads():
+    governor = ComputeGovernor(max_workers=1)
+    with governor.slots(4, owner="A") as granted:
+        assert granted == 1
+        done = threading.Event()
+
+        def read():
+            with governor.slots(1, interactive=True):
+                done.set()
+
+        threading.Thread(target=read).start()
+        assert done.wait(5)
+
+
+def test_background_queue_takes_turns_between_sessions():
+    governor = ComputeGovernor(max_workers=2)
+    order = []
+    release = threading.Event()
+
+    def run(owner, name, hold=None):
+        with governor.slots(1, owner=owner):
+            order.append(name)
+            if hold is not None:
+                hold.wait(5)
+
+    threads = [threading.Thread(target=run, args=("A", "A1", release))]
+    threads[0].start()
+    wait_until(lambda: order == ["A1"])
+    for n, (owner, name) in enumerate([("A", "A2"), ("A", "A3"), ("B", "B1")], start=1):
+        threads.append(threading.Thread(target=run, args=(owner, name)))
+        threads[-1].start()
+        wait_until(lambda: governor.status()["Antrean"] == n)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    # Sesi B belum pernah dilayani, jadi mendahului antrean sesi A yang datang lebih dulu.
+    assert order == ["A1", "B1", "A2", "A3"]
+    assert governor.status()["Worker Terpakai"] == 0
+
+
+def test_cancelled_wait_leaves_the_queue():
+    governor = ComputeGovernor(max_workers=2)
+    errors = []
+
+    def cancelled():
+        raise RuntimeError("batal")
+
+    with governor.slots(1, owner="A"):
+        def wait():
+            try:
+                with governor.slots(1, owner="B", check=cancelled):
+                    pass
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        thread.join(5)
+    assert errors == ["batal"]
+    assert governor.status()["Antrean"] == 0
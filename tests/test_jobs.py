@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from governor import ComputeGovernor
+from jobs import CANCELLED, DONE, FAILED, JobManager, export_job, partition_job
+from pipeline import preprocess_frame, read_student_file
+
+
+def wait(job, timeout=60):
+    for _ in range(int(timeout * 20)):
+        if job.done:
+            return job
+        threading.Event().wait(0.05)
+    raise AssertionError(f"Pekerjaan {job.id} tidak selesai.")
+
+
+def test_job_result_failure_and_shared_key():
+    manager = JobManager(ComputeGovernor(max_workers=2))
+    release = threading.Event()
+
+    def slow(job, value):
+        release.wait(5)
+        return value * 2
+
+    first = manager.submit("uji", "lambat", slow, 21, key="sama")
+    assert manager.submit("uji", "lambat", slow, 21, key="sama") is first
+    release.set()
+    assert wait(first).status == DONE and first.result == 42
+
+    def broken(job):
+        raise ValueError("rusak")
+
+    failed = wait(manager.submit("uji", "gagal", broken))
+    assert (failed.status, failed.error) == (FAILED, "rusak")
+
+
+def test_cancel_stops_job_at_next_report():
+    manager = JobManager(ComputeGovernor(max_workers=2))
+    started = threading.Event()
+
+    def loop(job):
+        started.set()
+        while True:
+            job.report(0.5, "berjalan")
+            threading.Event().wait(0.01)
+
+    job = manager.submit("uji", "berulang", loop)
+    started.wait(5)
+    manager.cancel(job.id)
+    assert wait(job).status == CANCELLED
+
+
+def test_partition_job_reports_progress_and_cancels(data_path):
+    df = read_student_file(data_path)
+    df_preprocessed, _, _ = preprocess_frame(df)
+    manager = JobManager(ComputeGovernor(max_workers=2))
+    job = wait(manager.submit("per_kelompok", "uji", partition_job, df, df_preprocessed, "Kelas", 2, {}))
+    assert job.status == DONE
+    assignments, summary, _ = job.result
+    assert len(assignments) == len(df)
+    assert job.details["kelompok_selesai"] == len(summary)
+
+    job = manager.submit("per_kelompok", "batal", partition_job, df, df_preprocessed, "Kelas", 2, {})
+    job.cancel()
+    assert wait(job).status == CANCELLED
+
+
+@pytest.mark.parametrize("filename", ["../laporan.zip", "a/b.pdf", ".."])
+def test_export_rejects_paths_as_filenames(filename):
+    with pytest.raises(ValueError):
+        export_job(None, None, {}, "zip", filename)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from kproto_native import BinaryKPrototypes, synthetic_feature_matrix
+from pipeline import feature_matrix, preprocess_frame, read_student_file
+
+kprototypes = pytest.importorskip("kmodes.kprototypes")
+
+
+def fit_both(X, categorical, n_clusters, random_state):
+    reference = kprototypes.KPrototypes(n_clusters=n_clusters, init="Huang", n_init=10, verbose=0,
+                                        random_state=random_state, n_jobs=1)
+    reference_labels = reference.fit_predict(X, categorical=categorical)
+    native = BinaryKPrototypes(n_clusters=n_clusters, init="Huang", n_init=10, random_state=random_state)
+    native_labels = native.fit_predict(X, categorical=categorical)
+    return reference, reference_labels, native, native_labels
+
+
+@pytest.mark.parametrize("n_clusters, seed", [(2, 0), (3, 1), (4, 2)])
+def test_native_matches_kmodes_on_synthetic_data(n_clusters, seed):
+    X, categorical = synthetic_feature_matrix(400, random_state=seed)
+    reference, reference_labels, native, native_labels = fit_both(X, categorical, n_clusters, random_state=42)
+    np.testing.assert_array_equal(native_labels, reference_labels)
+    assert native.cost_ == pytest.approx(reference.cost_, rel=1e-12)
+    np.testing.assert_allclose(native._enc_cluster_centroids[0], reference._enc_cluster_centroids[0], rtol=1e-12)
+    assert native.gamma == pytest.approx(reference.gamma, rel=1e-12)
+
+
+def test_native_matches_kmodes_on_student_data(data_path):
+    df_preprocessed, _, _ = preprocess_frame(read_student_file(data_path))
+    X, categorical = feature_matrix(df_preprocessed)
+    reference, reference_labels, native, native_labels = fit_both(X, categorical, 5, random_state=42)
+    np.testing.assert_array_equal(native_labels, reference_labels)
+    assert native.cost_ == pytest.approx(reference.cost_, rel=1e-12)
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import (CATEGORICAL_COLS, MODEL_FILENAME, NUMERIC_COLS, RESULT_CSV_FILENAME, ClusteringPipeline,
+                      ProfileAccumulator, assign_clusters, data_fingerprint, feature_matrix, profile_clusters,
+                      read_student_file)
+from registry import DEFAULT_REGISTRY_DIR, RESULTS_FILENAME, ModelRegistry
+
+PIPELINE_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pipeline.py")
+
+
+def run_cli(tmp_path, data_path, *args):
+    # Dijalankan sebagai `python pipeline.py`, persis seperti lewat cron; folder bawaan ikut berada di tmp_path.
+    output_dir = tmp_path / "hasil"
+    command = [sys.executable, PIPELINE_SCRIPT, data_path, "-o", str(output_dir), "--n-jobs", "1", *args]
+    subprocess.run(command, cwd=tmp_path, check=True, capture_output=True, text=True)
+    return output_dir
+
+
+def test_cli_model_loads_from_another_module(tmp_path, data_path):
+    output_dir = run_cli(tmp_path, data_path, "-k", "3")
+    pipeline = ClusteringPipeline.load(str(output_dir / MODEL_FILENAME))
+    assert isinstance(pipeline, ClusteringPipeline)
+    assert pipeline.n_clusters == 3
+    assert sorted(pipeline.describe()) == [0, 1, 2]
+    df = read_student_file(data_path)
+    np.testing.assert_array_equal(pipeline.predict(df), pipeline.labels_)
+
+
+def test_minibatch_cli_streams_labels_to_csv(tmp_path, data_path):
+    output_dir = run_cli(tmp_path, data_path, "-k", "3", "--minibatch", "--chunksize", "20")
+    pipeline = ClusteringPipeline.load(str(output_dir / MODEL_FILENAME))
+    results = read_student_file(str(output_dir / RESULT_CSV_FILENAME))
+    assert len(results) == len(read_student_file(data_path))
+    np.testing.assert_array_equal(results["Klaster"].to_numpy(), pipeline.labels_)
+    assert sorted(pipeline.describe()) == sorted(set(pipeline.labels_))
+
+
+def test_minibatch_cli_publishes_to_registry(tmp_path, data_path):
+    output_dir = run_cli(tmp_path, data_path, "-k", "3", "--minibatch", "--chunksize", "20")
+    pipeline = ClusteringPipeline.load(str(output_dir / MODEL_FILENAME))
+    artifact = ModelRegistry(str(tmp_path / DEFAULT_REGISTRY_DIR)).load()
+    df = read_student_file(data_path)
+    assert artifact.metadata["engine"] == "MiniBatchKPrototypes"
+    assert artifact.metadata["n_rows"] == len(df)
+    assert sum(artifact.metadata["cluster_sizes"].values()) == len(df)
+    # Sidik jari dari potongan sama dengan sidik jari atas seluruh tabel.
+    assert artifact.metadata["fingerprint"] == data_fingerprint(pipeline.transform(df))
+    assert not os.path.exists(os.path.join(artifact.path, RESULTS_FILENAME))
+    np.testing.assert_array_equal(artifact.results["Klaster"].to_numpy(), pipeline.labels_)
+    assert artifact.profiles["Jumlah Siswa"].to_dict() == artifact.results["Klaster"].value_counts().to_dict()
+
+
+@pytest.mark.parametrize("engine", ["native", "kmodes"])
+def test_assign_clusters_matches_model_predict(data_path, engine):
+    df = read_student_file(data_path)
+    pipeline = ClusteringPipeline(n_clusters=4, n_jobs=1, engine=engine).fit(df)
+    X, categorical = feature_matrix(pipeline.transform(df))
+    labels, distances = assign_clusters(pipeline.model_, X, categorical)
+    np.testing.assert_array_equal(labels, pipeline.model_.predict(X, categorical=categorical))
+    assert (distances >= 0).all()
+
+
+def test_csv_and_snapshot_reads_match_workbook(tmp_path, data_path):
+    df = read_student_file(data_path)
+    csv_path = tmp_path / "siswa.csv"
+    df.to_csv(csv_path, index=False)
+    pd.testing.assert_frame_equal(read_student_file(str(csv_path)), df)
+    snapshot_dir = str(tmp_path / "snapshot")
+    read_student_file(data_path, snapshot_dir)
+    assert len(os.listdir(snapshot_dir)) == 1
+    pd.testing.assert_frame_equal(read_student_file(data_path, snapshot_dir), df)
+
+
+def test_profile_accumulator_matches_profile_clusters(data_path):
+    df = read_student_file(data_path)
+    df_final = df.assign(Klaster=np.arange(len(df)) % 3)
+    accumulator = ProfileAccumulator()
+    for start in range(0, len(df_final), 20):
+        accumulator.update(df_final.iloc[start:start + 20])
+    pd.testing.assert_frame_equal(accumulator.profiles(), profile_clusters(df_final))
+
+
+@pytest.mark.parametrize("engine", ["native", "kmodes"])
+def test_incremental_fit_keeps_cluster_ids(data_path, engine):
+    df = read_student_file(data_path)
+    previous = ClusteringPipeline(n_clusters=3, n_jobs=1, engine=engine).fit(df)
+    pipeline = ClusteringPipeline(n_jobs=1).fit_incremental(df, previous.model_, previous.scaler_,
+                                                            previous.result_frame(df))
+    assert pipeline.n_changed_ == 0
+    np.testing.assert_array_equal(pipeline.labels_, previous.labels_)
+
+
+def test_typed_reader_keeps_labels_of_plain_float64_data(data_path):
+    # Tipe ringkas tidak boleh mengubah hasil: data yang sama harus memberi label yang persis sama.
+    df_typed = read_student_file(data_path)
+    df_plain = pd.read_excel(data_path)
+    df_plain.columns = [str(col).strip() for col in df_plain.columns]
+    assert all(df_typed[col].dtype == np.uint8 for col in CATEGORICAL_COLS)
+    assert all(df_typed[col].dtype == np.float64 for col in NUMERIC_COLS)
+    labels_typed = ClusteringPipeline(n_clusters=5, n_jobs=1).fit(df_typed).labels_
+    labels_plain = ClusteringPipeline(n_clusters=5, n_jobs=1).fit(df_plain).labels_
+    np.testing.assert_array_equal(labels_typed, labels_plain)
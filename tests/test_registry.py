@@ -0,0 +1,35 @@
+import pytest
+
+from pipeline import ClusteringPipeline, data_fingerprint, read_student_file
+from registry import ModelRegistry
+
+
+def publish(registry, df, n_clusters):
+    pipeline = ClusteringPipeline(n_clusters=n_clusters, n_jobs=1).fit(df)
+    return registry.publish(pipeline.result_frame(df), pipeline.model_, pipeline.scaler_,
+                            pipeline.categorical_indices_, pipeline.descriptions_,
+                            data_fingerprint(pipeline.transform(df)))
+
+
+def test_publish_load_and_rollback(tmp_path, data_path):
+    df = read_student_file(data_path)
+    registry = ModelRegistry(str(tmp_path))
+    first = publish(registry, df, 3)
+    second = publish(registry, df, 4)
+    assert registry.active_version() == second
+    artifact = registry.load()
+    assert artifact.n_clusters == 4
+    assert len(artifact.results) == len(df)
+    assert registry.rollback() == first
+    assert registry.load().n_clusters == 3
+    with pytest.raises(ValueError):
+        registry.rollback()
+
+
+def test_compare_reports_same_data(tmp_path, data_path):
+    df = read_student_file(data_path)
+    registry = ModelRegistry(str(tmp_path))
+    first, second = publish(registry, df, 3), publish(registry, df, 3)
+    table = registry.compare(first, second).set_index("Aspek")
+    assert table.loc["Data sama", second] == "Ya"
+    assert table.loc["Siswa yang sama", second] == str(len(df))
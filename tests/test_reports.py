@@ -0,0 +1,33 @@
+import io
+import zipfile
+
+from pipeline import read_student_file
+from reports import (MAX_FILENAME_LENGTH, export_student_reports, filter_students, report_filename,
+                     student_filename)
+
+
+def test_report_filename_is_sanitized_and_bounded():
+    assert report_filename("Kelas", ["X/IPA 1", "../XI"], "zip") == "laporan_kelas_X_IPA_1_XI.zip"
+    name = report_filename("Kelas", [f"Kelas {i} " + "x" * 50 for i in range(200)], "pdf")
+    assert "/" not in name and name.endswith(".pdf")
+    assert len(name) <= MAX_FILENAME_LENGTH + len(".pdf")
+    assert report_filename("Klaster", [0, 1, 2, 3, 4], "zip") == "laporan_klaster_0_1_2_dan_2_lainnya.zip"
+
+
+def test_zip_export_has_one_pdf_per_student(data_path):
+    df = read_student_file(data_path).assign(Klaster=0)
+    df_kelas = filter_students(df, "Kelas", df["Kelas"].iloc[:1].tolist())
+    output = io.BytesIO()
+    assert export_student_reports(df_kelas, {0: "Contoh"}, "zip", output) == len(df_kelas)
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        assert len(names) == len(df_kelas) == len(set(names))
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    assert student_filename({"No": 7, "Nama": "../Budi Santoso"}) == "7_Budi_Santoso.pdf"
+
+
+def test_combined_pdf_export(data_path):
+    df = read_student_file(data_path).assign(Klaster=1).head(5)
+    output = io.BytesIO()
+    assert export_student_reports(df, {1: "Contoh"}, "pdf", output) == 5
+    assert output.getvalue().startswith(b"%PDF")
@@ -0,0 +1,73 @@
+import pytest
+
+from pipeline import ClusteringPipeline, data_fingerprint, read_student_file
+from registry import ModelRegistry
+from result_store import ResultStore
+
+
+@pytest.fixture
+def df_final(data_path):
+    df = read_student_file(data_path)
+    return df.assign(Klaster=[i % 3 for i in range(len(df))])
+
+
+def metadata(version):
+    return {"version": version, "created_at": "2026-01-01 00:00:00", "n_clusters": 3, "cost": 1.0, "engine": "uji"}
+
+
+def test_frame_and_chunks_store_the_same_rows(tmp_path, df_final):
+    store = ResultStore(str(tmp_path / "hasil.sqlite"))
+    descriptions = {0: "A", 1: "B", 2: "C"}
+    store.write_version(metadata("v1"), df_final, descriptions)
+    store.write_version(metadata("v2"), (df_final.iloc[start:start + 7] for start in range(0, len(df_final), 7)),
+                        descriptions)
+    versions = store.versions().set_index("versi")
+    assert versions["jumlah_siswa"].tolist() == [len(df_final)] * 2
+    first = store.query_students("v1", page_size=len(df_final))
+    second = store.query_students("v2", page_size=len(df_final))
+    assert first.equals(second)
+    assert first["No"].tolist() == sorted(df_final["No"].tolist())
+    assert store.descriptions("v2") == descriptions
+    # Menulis ulang versi yang sama mengganti isinya, bukan menggandakan.
+    store.write_version(metadata("v1"), df_final.head(5), descriptions)
+    assert store.count_students("v1") == 5
+
+
+def test_filters_pages_and_summary(tmp_path, df_final):
+    store = ResultStore(str(tmp_path / "hasil.sqlite"))
+    store.write_version(metadata("v1"), df_final, {})
+    kelas = df_final["Kelas"].iloc[0]
+    expected = df_final[(df_final["Kelas"] == kelas) & (df_final["Klaster"] == 1)]
+    filters = {"Kelas": [kelas], "Klaster": [1]}
+    assert store.count_students("v1", filters) == len(expected)
+    page = store.query_students("v1", filters, order_by="No", descending=True, page=0, page_size=2)
+    assert page["No"].tolist() == sorted(expected["No"].tolist(), reverse=True)[:2]
+    summary = store.cluster_summary("v1").set_index("Klaster")
+    assert summary["Jumlah Siswa"].tolist() == df_final["Klaster"].value_counts().sort_index().tolist()
+    assert summary.loc[0, "Kehadiran Rata-rata"] == pytest.approx(df_final.loc[df_final["Klaster"] == 0, "Kehadiran"].mean())
+    nama = df_final["Nama"].iloc[0]
+    assert nama in store.query_students("v1", search=nama[:4].lower())["Nama"].tolist()
+    with pytest.raises(ValueError):
+        store.query_students("v1", order_by="Nama; DROP TABLE siswa")
+
+
+def test_registry_publishes_streamed_results_to_store(tmp_path, data_path):
+    df = read_student_file(data_path)
+    pipeline = ClusteringPipeline(n_clusters=3, n_jobs=1).fit(df)
+    results = pipeline.result_frame(df)
+    results_path = tmp_path / "hasil.csv"
+    results.to_csv(results_path, index=False)
+    registry = ModelRegistry(str(tmp_path / "registri"))
+    version = registry.publish(None, pipeline.model_, pipeline.scaler_, pipeline.categorical_indices_,
+                               pipeline.descriptions_, data_fingerprint(pipeline.transform(df)),
+                               results_path=str(results_path))
+    store = registry.store()
+    assert store.count_students(version) == len(df)
+    sizes = store.cluster_summary(version).set_index("Klaster")["Jumlah Siswa"]
+    assert sizes.to_dict() == results["Klaster"].value_counts().to_dict()
+    chunks = list(registry.load(version).iter_results(chunk_rows=20))
+    assert [len(chunk) for chunk in chunks] == [20, 20, len(df) - 40]
+    # Versi yang hilang dari penyimpanan diisi ulang dari berkas registrinya.
+    store.delete_version(version)
+    store.ensure_version(registry.load(version))
+    assert store.count_students(version) == len(df)
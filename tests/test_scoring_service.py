@@ -0,0 +1,97 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from pipeline import ClusteringPipeline, data_fingerprint, read_student_file
+from registry import ModelRegistry
+from scoring_service import RequestBatcher, RequestError, ScoringService, _student_records, make_server
+
+
+@pytest.fixture
+def registry_dir(tmp_path, data_path):
+    df = read_student_file(data_path)
+    pipeline = ClusteringPipeline(n_clusters=3, n_jobs=1).fit(df)
+    ModelRegistry(str(tmp_path)).publish(pipeline.result_frame(df), pipeline.model_, pipeline.scaler_,
+                                         pipeline.categorical_indices_, pipeline.descriptions_,
+                                         data_fingerprint(pipeline.transform(df)))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def records(data_path):
+    return json.loads(read_student_file(data_path).head(4).to_json(orient="records"))
+
+
+def test_student_records_require_feature_columns(records):
+    padded = [{f" {key} ": value for key, value in record.items()} for record in records]
+    assert _student_records({"siswa": padded}, batch=True) == records
+    incomplete = dict(records[0])
+    del incomplete["Kehadiran"]
+    with pytest.raises(RequestError) as error:
+        _student_records([records[0], incomplete], batch=True)
+    assert error.value.status == 400 and "Siswa ke-2" in str(error.value) and "Kehadiran" in str(error.value)
+
+
+def test_batched_requests_keep_their_own_warnings(registry_dir, records):
+    service = ScoringService(registry_dir)
+    service.batcher = RequestBatcher(service, wait_seconds=0.5)
+    with_gap = [dict(records[0], Kehadiran=None)]
+    first = service.batcher.submit(records[1:])
+    second = service.batcher.submit(with_gap)
+    _, results, warnings = first.result(5)
+    assert [result["No"] for result in results] == [record["No"] for record in records[1:]]
+    assert warnings == []
+    _, results, warnings = second.result(5)
+    assert len(results) == 1 and len(warnings) == 1 and "Kehadiran" in warnings[0]
+    assert service.status()["batch"] == 1 and service.status()["permintaan"] == 2
+
+
+class FlakyModel:
+    version = 1
+
+    def predict(self, requests):
+        if any(record.get("rusak") for records in requests for record in records):
+            raise ValueError("data rusak")
+        return [([{"Klaster": 0}] * len(records), []) for records in requests]
+
+
+class FlakyService:
+    model = FlakyModel()
+
+    def record_batch(self, n_requests, n_students):
+        pass
+
+
+def test_failing_request_does_not_fail_its_batch():
+    batcher = RequestBatcher(FlakyService(), wait_seconds=0.5)
+    good = batcher.submit([{"No": 1}])
+    bad = batcher.submit([{"No": 2, "rusak": True}])
+    assert good.result(5) == (1, [{"Klaster": 0}], [])
+    with pytest.raises(ValueError):
+        bad.result(5)
+
+
+def test_http_prediction_returns_warnings(registry_dir, records):
+    server = make_server(port=0, registry_dir=registry_dir)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+
+    def post(path, body):
+        connection.request("POST", path, body=json.dumps(body).encode("utf-8"))
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    try:
+        status, body = post("/prediksi", dict(records[0], **{"Rata Rata Nilai Akademik": None}))
+        assert status == 200 and body["No"] == records[0]["No"]
+        assert len(body["peringatan"]) == 1 and "Rata Rata Nilai Akademik" in body["peringatan"][0]
+        status, body = post("/prediksi/batch", {"siswa": records})
+        assert status == 200 and len(body["hasil"]) == len(records) and body["peringatan"] == []
+        status, body = post("/prediksi", {"No": 1, "Nama": "Budi"})
+        assert status == 400 and "galat" in body
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
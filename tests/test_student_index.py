@@ -0,0 +1,29 @@
+import pandas as pd
+
+from student_index import StudentIndex, normalize_name, normalize_number
+
+
+def make_index():
+    results = pd.DataFrame({
+        "No": [12, 7, "013"],
+        "Nama": ["Siti Nur'aini", "Budi Santoso", "Ahmad Budiman"],
+        "Kelas": ["X", "XI", "XI"],
+        "Klaster": [0, 1, 1],
+    })
+    return StudentIndex(results, descriptions={0: "A", 1: "B"})
+
+
+def test_normalizers():
+    assert normalize_name("  Siti  Nur'aini ") == "SITI NURAINI"
+    assert normalize_number(" 012 ") == normalize_number(12.0) == "12"
+
+
+def test_search_by_number_prefix_and_typo():
+    index = make_index()
+    assert index.search("13") == [2]
+    # Awalan juga dicocokkan pada kata nama berikutnya.
+    assert index.by_prefix("bud") == [1, 2]
+    assert index.by_prefix("santo") == [1]
+    assert index.fuzzy("Budi Santosa")[0] == 1
+    record = index.record(1)
+    assert record["Klaster"] == 1 and record["Deskripsi Klaster"] == "B"
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from pipeline import read_student_file
+from table_index import TableIndex
+
+
+def test_query_matches_pandas_filter_and_sort(data_path):
+    df = read_student_file(data_path)
+    df = df.assign(Klaster=[i % 3 for i in range(len(df))])
+    index = TableIndex(df)
+    kelas = df["Kelas"].iloc[0]
+    low, high = df["Kehadiran"].quantile([0.25, 0.75])
+    expected = df[(df["Kelas"] == kelas) & df["Kehadiran"].between(low, high)]
+    expected = expected.sort_values("Rata Rata Nilai Akademik", ascending=False, kind="stable")
+    total, page = index.query({"Kelas": [kelas], "Klaster": []}, {"Kehadiran": (low, high)},
+                              order_by="Rata Rata Nilai Akademik", descending=True, page=1, page_size=3)
+    assert total == len(expected) == index.count({"Kelas": [kelas]}, {"Kehadiran": (low, high)})
+    pd.testing.assert_frame_equal(page, expected.iloc[3:6])
+    assert index.options("Klaster") == [0, 1, 2]
+    assert index.value_range("Kehadiran") == (df["Kehadiran"].min(), df["Kehadiran"].max())
+
+
+def test_unfiltered_query_keeps_original_order(data_path):
+    df = read_student_file(data_path)
+    total, page = TableIndex(df).query(page=0, page_size=10)
+    assert total == len(df)
+    pd.testing.assert_frame_equal(page, df.head(10))
@@ -0,0 +1,124 @@
+# Cache unggahan beralamat konten: setiap file dikenali dari hash isi byte-nya,
+# sehingga hasil baca, validasi, dan praproses dipakai ulang tanpa menghitung
+# hash DataFrame atau membaca ulang workbook yang sama.
+import hashlib
+import io
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from pipeline import (preprocess_frame, data_fingerprint, coerce_student_types, read_workbook_columns,
+                      read_workbook_snapshot, DEFAULT_SNAPSHOT_DIR)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def read_upload_bytes(data, filename, digest=None, snapshot_dir=None):
+    suffix = filename.lower()
+    if suffix.endswith(".csv"):
+        return coerce_student_types(pd.read_csv(io.BytesIO(data)))
+    if suffix.endswith(".parquet"):
+        return coerce_student_types(pd.read_parquet(io.BytesIO(data)))
+    if digest is None or not snapshot_dir:
+        return read_workbook_columns(io.BytesIO(data))
+    return read_workbook_snapshot(io.BytesIO(data), digest, snapshot_dir)
+
+
+def _estimate_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_nbytes(v) for v in value.values())
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+class UploadCache:
+    # LRU dengan batas total ukuran; kunci: (hash file, tahap).
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        self.max_bytes = max_bytes
+        self.snapshot_dir = snapshot_dir
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # Hanya memeriksa keberadaan; tidak mengubah urutan LRU maupun penghitung hit/miss.
+        with self._lock:
+            return key in self._entries
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        nbytes = _estimate_nbytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return value
+            self._entries[key] = (value, nbytes)
+            self._total_bytes += nbytes
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    # --- TAHAPAN UNGGAHAN ---
+
+    def parsed(self, digest, data, filename):
+        # Tabel dasar bersama seluruh sesi: tidak pernah diubah di tempat; hasil per sesi
+        # dibentuk di atasnya dengan pipeline.with_labels.
+        return self.get_or_compute((digest, "parsed"), lambda: read_upload_bytes(data, filename, digest, self.snapshot_dir))
+
+    def preprocessed(self, digest, df_original=None):
+        # Kesalahan validasi ikut disimpan agar file yang sama tidak divalidasi ulang.
+        def compute():
+            df = df_original if df_original is not None else self.get((digest, "parsed"))
+            if df is None:
+                raise KeyError(f"Data unggahan {digest} tidak ada di cache.")
+            try:
+                df_clean, scaler, warnings = preprocess_frame(df)
+            except ValueError as e:
+                return {"error": str(e)}
+            return {"df": df_clean, "scaler": scaler, "warnings": warnings,
+                    "fingerprint": data_fingerprint(df_clean)}
+        return self.get_or_compute((digest, "preprocessed"), compute)